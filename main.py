@@ -1,7 +1,39 @@
+import sys
+
+# Perfil de arranque: debe correr antes de cualquier import pesado
+if __name__ == "__main__" and "--startup-profile" in sys.argv:
+    from tools.startup_profile import main as startup_profile
+    sys.exit(startup_profile([arg for arg in sys.argv[1:] if arg != "--startup-profile"]))
+
+import asyncio
+import math
+import time
 from fastapi import FastAPI
+from fastapi.encoders import jsonable_encoder
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse
 from src.infrastructure.config import get_settings
-from src.api.routes import feedback_router
+from src.infrastructure.llm import LLMOverloadedError
+from src.api.routes import feedback_router, metrics_router, debug_router, session_router
+from src.api.middleware import TracingMiddleware, PriorityMiddleware, DrainMiddleware
+from src.api.dependencies import (
+    close_attempt_log,
+    close_feedback_cache,
+    close_outbound_delivery,
+    close_shadow_runner,
+    close_feedback_prefetcher,
+    close_trace_exporter,
+    close_traffic_capture,
+    get_drain_state,
+    get_outbound_delivery,
+    get_trace_exporter,
+    get_traffic_capture,
+    load_feedback_snapshot,
+    start_loop_monitor,
+    stop_loop_monitor,
+    warm_up_llm_client
+)
 
 
 # Obtener configuración
@@ -22,10 +54,66 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Request-ID", "Server-Timing"],
+)
+
+# Trabajo en vuelo y rechazo de trabajo nuevo durante el drenado (SIGTERM)
+app.add_middleware(
+    DrainMiddleware,
+    get_state=get_drain_state,
+    retry_after_seconds=settings.DRAIN_RETRY_AFTER_SECONDS
 )
 
+# Clase de prioridad de las llamadas al LLM (header X-Priority)
+app.add_middleware(PriorityMiddleware)
+
+# Tracing por request (último middleware agregado = el más externo)
+if settings.TRACING_ENABLED:
+    app.add_middleware(
+        TracingMiddleware,
+        server_timing=settings.TRACING_SERVER_TIMING,
+        get_exporter=get_trace_exporter
+    )
+
 # Registrar routers
 app.include_router(feedback_router)
+app.include_router(session_router)
+app.include_router(metrics_router)
+app.include_router(debug_router)
+
+
+# Endpoints que dependen solo del LLM (sin fallback): load shedding -> 503
+@app.exception_handler(RequestValidationError)
+async def validation_error_handler(request, exc: RequestValidationError):
+    """
+    422 como el de FastAPI, pero serializable con NaN/inf en el input.
+    
+    El parser JSON acepta NaN; el handler por defecto lo devuelve en
+    "input" y la respuesta falla con 500. El camino MessagePack
+    responde 422 (ver content_negotiation.decode_fields).
+    """
+    return JSONResponse(status_code=422, content={"detail": _json_safe(jsonable_encoder(exc.errors()))})
+
+
+def _json_safe(value):
+    """Reemplaza floats no finitos por su representación en texto"""
+    if isinstance(value, float) and not math.isfinite(value):
+        return str(value)
+    if isinstance(value, dict):
+        return {key: _json_safe(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_json_safe(item) for item in value]
+    return value
+
+
+@app.exception_handler(LLMOverloadedError)
+async def llm_overloaded_handler(request, exc: LLMOverloadedError):
+    """503 + Retry-After cuando el límite adaptativo del LLM está alcanzado"""
+    return JSONResponse(
+        status_code=503,
+        content={"detail": str(exc)},
+        headers={"Retry-After": str(int(exc.retry_after))}
+    )
 
 
 # Root endpoint
@@ -35,11 +123,21 @@ async def root():
     return {
         "service": settings.SERVICE_NAME,
         "version": settings.SERVICE_VERSION,
-        "status": "running",
+        "status": "running" if get_drain_state().ready else "draining",
         "docs": "/docs"
     }
 
 
+# Readiness (el balanceador deja de enrutar al recibir 503)
+@app.get("/ready")
+async def ready():
+    """Readiness: 503 mientras el proceso se drena para reiniciar"""
+    state = get_drain_state()
+    if not state.ready:
+        return JSONResponse(status_code=503, content={"ready": False, "reason": state.reason})
+    return {"ready": True}
+
+
 # Startup event
 @app.on_event("startup")
 async def startup_event():
@@ -48,6 +146,26 @@ async def startup_event():
     print(f"   Listening on {settings.HOST}:{settings.PORT}")
     print(f"   Debug: {settings.DEBUG}")
     print(f"   Docs: http://{settings.HOST}:{settings.PORT}/docs")
+    
+    # Lag del event loop y stacks de bloqueos (tiempos en /metrics, stacks en /debug/stalls)
+    start_loop_monitor()
+    
+    # Feedback pre-generado para no esperar a Gemini en horario pico
+    loaded = load_feedback_snapshot()
+    if loaded:
+        print(f"   Feedback pre-generado: {loaded} entradas")
+    
+    # Valida la configuración de la captura (sin sal no se habilita)
+    get_traffic_capture()
+    
+    # Delivery downstream: reenvía el spill que haya quedado de la ejecución anterior
+    delivery = get_outbound_delivery()
+    if delivery is not None:
+        print(f"   Delivery: {len(delivery.channels)} destinos")
+    
+    # Importar el SDK de Gemini y crear el modelo sin bloquear el arranque
+    if settings.LLM_FEEDBACK_ENABLED:
+        asyncio.get_running_loop().run_in_executor(None, warm_up_llm_client)
 
 
 # Shutdown event
@@ -55,15 +173,72 @@ async def startup_event():
 async def shutdown_event():
     """Evento de cierre"""
     print(f"👋 Shutting down {settings.SERVICE_NAME}")
+    
+    # Sin GracefulServer (ej: `uvicorn main:app`) el drenado empieza aquí
+    drain = get_drain_state()
+    drain.stop_accepting()
+    
+    await _shutdown_step("shadow", close_shadow_runner)
+    await _shutdown_step("prefetch", close_feedback_prefetcher)
+    await _shutdown_step("attempt_log", close_attempt_log)
+    await _shutdown_step("traffic_capture", close_traffic_capture)
+    await _shutdown_step("delivery", close_outbound_delivery)
+    await _shutdown_step("feedback_cache", close_feedback_cache)
+    await _shutdown_step("trace_exporter", close_trace_exporter)
+    await _shutdown_step("loop_monitor", stop_loop_monitor)
+    
+    report = drain.save_report()
+    print(f"   Drenado: {report['total_seconds']}s, "
+          f"{report['dropped_requests']} requests y {report['dropped_sessions']} sesiones descartados, "
+          f"{report['rejected_requests']} rechazados")
 
 
-if __name__ == "__main__":
-    import uvicorn
+async def _shutdown_step(name: str, close) -> None:
+    """
+    Corre un paso del cierre midiendo su duración para el reporte de drenado.
     
-    uvicorn.run(
-        "main:app",
-        host=settings.HOST,
-        port=settings.PORT,
-        reload=settings.DEBUG,
-        log_level=settings.LOG_LEVEL.lower()
-    )
\ No newline at end of file
+    Cada paso tiene DRAIN_STEP_TIMEOUT_SECONDS: los close síncronos corren
+    en un thread para que uno colgado no bloquee el loop ni los pasos
+    siguientes (el thread sigue, pero el cierre avanza).
+    """
+    started = time.perf_counter()
+    error = None
+    try:
+        if asyncio.iscoroutinefunction(close):
+            step = close()
+        else:
+            step = asyncio.to_thread(close)
+        await asyncio.wait_for(step, timeout=settings.DRAIN_STEP_TIMEOUT_SECONDS)
+    except asyncio.TimeoutError:
+        error = f"timeout ({settings.DRAIN_STEP_TIMEOUT_SECONDS}s)"
+        print(f"⚠️ Shutdown ({name}) no terminó en {settings.DRAIN_STEP_TIMEOUT_SECONDS}s, se continúa")
+    except Exception as e:
+        error = str(e)
+        print(f"⚠️ Error en shutdown ({name}): {e}")
+    get_drain_state().record_step(name, time.perf_counter() - started, error)
+
+
+if __name__ == "__main__":
+    if settings.DEBUG:
+        import uvicorn
+        
+        uvicorn.run(
+            "main:app",
+            host=settings.HOST,
+            port=settings.PORT,
+            reload=True,
+            log_level=settings.LOG_LEVEL.lower()
+        )
+    else:
+        # Drenado ante SIGTERM (systemctl restart / deploy.sh)
+        from src.api.server import run
+        
+        run(
+            "main:app",
+            get_state=get_drain_state,
+            drain_timeout=settings.DRAIN_TIMEOUT_SECONDS,
+            readiness_delay=settings.DRAIN_READINESS_DELAY_SECONDS,
+            host=settings.HOST,
+            port=settings.PORT,
+            log_level=settings.LOG_LEVEL.lower()
+        )
\ No newline at end of file
@@ -1,3 +1,3 @@
-from .routes import feedback_router
+from .routes import feedback_router, metrics_router, debug_router, session_router
 
-__all__ = ["feedback_router"]
\ No newline at end of file
+__all__ = ["feedback_router", "metrics_router", "debug_router", "session_router"]
\ No newline at end of file
@@ -0,0 +1,260 @@
+"""
+Content Negotiation - MessagePack junto a JSON
+
+Para llamadas servicio a servicio de alto volumen (ML Service ->
+/feedback/generate), el body puede enviarse como MessagePack:
+
+    Content-Type: application/msgpack   (o application/x-msgpack,
+                                         application/vnd.msgpack)
+
+En ese caso el request no pasa por la validación de FastAPI/pydantic:
+se decodifica y valida contra los campos del modelo pydantic del
+endpoint (tipos y límites ge/le) con chequeos simples de Python, y se
+entrega un dict listo para construir el modelo de dominio. La respuesta
+se codifica en MessagePack si el Accept lo pide o si el request vino en
+MessagePack sin Accept explícito.
+
+Los requests JSON siguen el camino normal de FastAPI sin cambios.
+"""
+
+import json
+import math
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import msgpack
+from fastapi import BackgroundTasks, HTTPException
+from fastapi.routing import APIRoute
+from starlette.requests import Request
+from starlette.responses import Response
+
+
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+MSGPACK_MEDIA_TYPES = {MSGPACK_MEDIA_TYPE, "application/x-msgpack", "application/vnd.msgpack"}
+
+
+class MsgpackResponse(Response):
+    media_type = MSGPACK_MEDIA_TYPE
+
+    def render(self, content: Any) -> bytes:
+        return msgpack.packb(content, use_bin_type=True)
+
+
+class PayloadValidationError(Exception):
+    """Payload que no cumple el modelo (equivalente al 422 de FastAPI)"""
+
+    def __init__(self, errors: List[dict]):
+        super().__init__(errors)
+        self.errors = errors
+
+
+# ============================================================================
+# VALIDACIÓN CONTRA EL MODELO PYDANTIC
+# ============================================================================
+
+# (nombre, tipos aceptados, requerido, default, ge, le)
+FieldSpec = Tuple[str, tuple, bool, Any, Optional[float], Optional[float]]
+
+_NUMERIC = (int, float)
+_specs_cache: Dict[type, List[FieldSpec]] = {}
+
+
+def _field_specs(model_cls: type) -> List[FieldSpec]:
+    """Tipos y límites de cada campo, leídos una vez de model_fields"""
+    specs = _specs_cache.get(model_cls)
+    if specs is not None:
+        return specs
+
+    specs = []
+    for name, info in model_cls.model_fields.items():
+        annotation = info.annotation
+        optional = False
+        args = getattr(annotation, "__args__", None)
+        if args and type(None) in args:
+            optional = True
+            annotation = next(arg for arg in args if arg is not type(None))
+
+        if annotation is float:
+            accepted = _NUMERIC
+        elif annotation in (int, bool, str):
+            accepted = (annotation,)
+        else:
+            raise TypeError(f"Tipo no soportado en el camino MessagePack: {name}: {annotation}")
+        if optional:
+            accepted = accepted + (type(None),)
+
+        ge = le = None
+        for constraint in info.metadata:
+            ge = getattr(constraint, "ge", ge)
+            le = getattr(constraint, "le", le)
+
+        default = None if info.is_required() else info.get_default(call_default_factory=True)
+        specs.append((name, accepted, info.is_required(), default, ge, le))
+
+    _specs_cache[model_cls] = specs
+    return specs
+
+
+def decode_fields(model_cls: type, payload: Any) -> Dict[str, Any]:
+    """
+    Valida un payload decodificado contra los campos de un modelo pydantic.
+
+    Más estricto que pydantic en modo lax: no convierte strings a
+    números ni números a bool (MessagePack ya transporta los tipos).
+
+    Args:
+        model_cls: Modelo pydantic (ej: GenerateFeedbackRequest)
+        payload: Objeto decodificado
+
+    Returns:
+        dict: Valores por campo, con defaults aplicados
+
+    Raises:
+        PayloadValidationError: Si algún campo no es válido
+    """
+    if not isinstance(payload, dict):
+        raise PayloadValidationError([{"loc": ["body"], "msg": "Se espera un objeto", "type": "dict_type"}])
+
+    values: Dict[str, Any] = {}
+    errors: List[dict] = []
+    for name, accepted, required, default, ge, le in _field_specs(model_cls):
+        if name not in payload:
+            if required:
+                errors.append({"loc": ["body", name], "msg": "Field required", "type": "missing"})
+            else:
+                values[name] = default
+            continue
+
+        value = payload[name]
+        # bool es subclase de int: no aceptarlo donde se espera un número
+        if not isinstance(value, accepted) or (isinstance(value, bool) and bool not in accepted):
+            errors.append({"loc": ["body", name], "msg": "Tipo inválido", "type": "type_error"})
+            continue
+        if value is not None:
+            # NaN pasa las comparaciones con ge/le (siempre son False)
+            if isinstance(value, float) and not math.isfinite(value):
+                errors.append({"loc": ["body", name], "msg": "Debe ser un número finito", "type": "finite_number"})
+                continue
+            if ge is not None and value < ge:
+                errors.append({"loc": ["body", name], "msg": f"Debe ser >= {ge}", "type": "greater_than_equal"})
+                continue
+            if le is not None and value > le:
+                errors.append({"loc": ["body", name], "msg": f"Debe ser <= {le}", "type": "less_than_equal"})
+                continue
+            if float in accepted and isinstance(value, int):
+                value = float(value)
+        values[name] = value
+
+    if errors:
+        raise PayloadValidationError(errors)
+    return values
+
+
+def encode_fields(model_cls: type, obj: Any) -> Dict[str, Any]:
+    """Dict con los campos de `model_cls` tomados de `obj` (sin instanciar el modelo)"""
+    return {name: getattr(obj, name) for name in model_cls.model_fields}
+
+
+# ============================================================================
+# ROUTE
+# ============================================================================
+
+MsgpackHandler = Callable[[Dict[str, Any], BackgroundTasks], Awaitable[Any]]
+
+
+def msgpack_handler(handler: MsgpackHandler):
+    """
+    Registra el handler del camino MessagePack de un endpoint.
+    
+    El handler recibe el payload decodificado y un BackgroundTasks que
+    se ejecuta después de enviar la respuesta.
+
+    Uso:
+        @router.post("/generate", response_model=FeedbackResponse)
+        @msgpack_handler(generate_feedback_msgpack)
+        async def generate_feedback(request: GenerateFeedbackRequest): ...
+    """
+    def decorator(endpoint):
+        endpoint.msgpack_handler = handler
+        return endpoint
+    return decorator
+
+
+def wants_msgpack(request: Request, request_is_msgpack: bool) -> bool:
+    accept = request.headers.get("accept", "")
+    if any(media_type in accept for media_type in MSGPACK_MEDIA_TYPES):
+        return True
+    if request_is_msgpack and (not accept or accept.strip() == "*/*"):
+        return True
+    return False
+
+
+class NegotiatedRoute(APIRoute):
+    """
+    APIRoute que agrega el camino MessagePack.
+
+    - Request MessagePack + endpoint con msgpack_handler: se decodifica
+      y se llama al handler sin pasar por FastAPI/pydantic.
+    - Request JSON con Accept MessagePack: se usa el camino normal y la
+      respuesta JSON se re-codifica.
+    """
+
+    def get_route_handler(self) -> Callable[[Request], Awaitable[Response]]:
+        default_handler = super().get_route_handler()
+        fast_handler: Optional[MsgpackHandler] = getattr(self.endpoint, "msgpack_handler", None)
+
+        async def handler(request: Request) -> Response:
+            content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+            is_msgpack = content_type in MSGPACK_MEDIA_TYPES
+            respond_msgpack = wants_msgpack(request, is_msgpack)
+
+            if is_msgpack and fast_handler is not None:
+                return await self._handle_msgpack(request, fast_handler, respond_msgpack)
+
+            response = await default_handler(request)
+            if respond_msgpack and response.media_type == "application/json":
+                return MsgpackResponse(
+                    json.loads(response.body),
+                    status_code=response.status_code,
+                    headers=_passthrough_headers(response),
+                    # Las BackgroundTasks del endpoint (ej: shadow) viajan en la respuesta
+                    background=response.background
+                )
+            return response
+
+        return handler
+
+    async def _handle_msgpack(
+        self,
+        request: Request,
+        fast_handler: MsgpackHandler,
+        respond_msgpack: bool
+    ) -> Response:
+        response_class = MsgpackResponse if respond_msgpack else _JSONBytesResponse
+        try:
+            payload = msgpack.unpackb(await request.body(), raw=False)
+        except Exception as e:
+            return response_class({"detail": f"MessagePack inválido: {e}"}, status_code=400)
+
+        background_tasks = BackgroundTasks()
+        try:
+            result = await fast_handler(payload, background_tasks)
+        except PayloadValidationError as e:
+            return response_class({"detail": e.errors}, status_code=422)
+        except HTTPException as e:
+            return response_class({"detail": e.detail}, status_code=e.status_code)
+
+        return response_class(result, background=background_tasks)
+
+
+class _JSONBytesResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def _passthrough_headers(response: Response) -> Dict[str, str]:
+    return {
+        key: value for key, value in response.headers.items()
+        if key not in ("content-length", "content-type")
+    }
@@ -2,15 +2,62 @@
 FastAPI Dependencies
 """
 
+import os
+from concurrent.futures import ThreadPoolExecutor
 from functools import lru_cache
-from src.infrastructure.llm import GeminiClient
+from typing import Optional
+from src.infrastructure.llm import (
+    GeminiClient,
+    SYSTEM_PROMPT,
+    STRUCTURED_SYSTEM_PROMPT,
+    OutputGuardrail,
+    schema_from_model
+)
+from src.infrastructure.llm.hedging import HedgePolicy
+from src.infrastructure.llm.concurrency_limit import AdaptiveConcurrencyLimit
+from src.infrastructure.llm.scheduler import (
+    PriorityScheduler,
+    PRIORITY_INTERACTIVE,
+    PRIORITY_BATCH
+)
+from src.infrastructure.llm.retry_policy import RetryPolicy, RetryRule, ErrorClass
 from src.infrastructure.config import get_settings
+from src.infrastructure.storage import AttemptLog
+from src.infrastructure.traffic import TrafficCapture
+from src.infrastructure.delivery import OutboundDelivery
+from src.infrastructure.tracing import OtlpFileExporter
+from src.infrastructure.diagnostics import LoopMonitor
+from src.infrastructure.cache import (
+    SimilarityFeedbackCache,
+    TieredFeedbackCache,
+    PrefetchCache,
+    create_backend,
+    load_snapshot
+)
 from src.application.use_cases import GenerateFeedbackUseCase
+from src.application.shadow import ShadowRunner, ShadowArm
+from src.application.prefetch import FeedbackPrefetcher
+from src.api.lifecycle import DrainState
 
 
 # Global instances
 _gemini_client = None
 _use_case = None
+_attempt_log = None
+_traffic_capture = None
+_traffic_capture_refused = False
+_similarity_cache = None
+_feedback_cache = None
+_trace_exporter = None
+_loop_monitor = None
+_shadow_runner = None
+_prefetch_cache = None
+_feedback_prefetcher = None
+_prefetch_executor = None
+_llm_scheduler = None
+_llm_concurrency_limit = None
+_outbound_delivery = None
+_drain_state = None
 
 
 def get_gemini_client() -> GeminiClient:
@@ -24,9 +71,95 @@ def get_gemini_client() -> GeminiClient:
     
     if _gemini_client is None:
         settings = get_settings()
-        _gemini_client = GeminiClient(api_key=settings.GOOGLE_API_KEY)
+        
+        hedge_policy = None
+        if settings.LLM_HEDGING_ENABLED:
+            hedge_policy = HedgePolicy(
+                percentile=settings.LLM_HEDGE_PERCENTILE,
+                min_delay=settings.LLM_HEDGE_MIN_DELAY_SECONDS,
+                max_hedge_ratio=settings.LLM_HEDGE_MAX_RATIO
+            )
+        
+        _gemini_client = GeminiClient(
+            api_key=settings.GOOGLE_API_KEY,
+            timeout_seconds=settings.LLM_TIMEOUT_SECONDS,
+            hedge_policy=hedge_policy,
+            model_cache_path=settings.GEMINI_MODEL_CACHE_PATH,
+            model_cache_ttl_seconds=settings.GEMINI_MODEL_CACHE_TTL_SECONDS,
+            scheduler=get_llm_scheduler(),
+            concurrency_limit=get_llm_concurrency_limit()
+        )
     
-        return _gemini_client
+    return _gemini_client
+
+
+def get_llm_scheduler() -> Optional[PriorityScheduler]:
+    """
+    Dependency para obtener el scheduler de llamadas al LLM.
+    
+    Lo comparten todos los clientes LLM del proceso (principal y shadow).
+    
+    Returns:
+        PriorityScheduler: Scheduler singleton, o None si está deshabilitado
+    """
+    global _llm_scheduler
+    
+    settings = get_settings()
+    if not settings.LLM_SCHEDULER_ENABLED:
+        return None
+    
+    if _llm_scheduler is None:
+        _llm_scheduler = PriorityScheduler(
+            max_concurrency=settings.LLM_MAX_CONCURRENCY,
+            max_per_minute=settings.LLM_MAX_REQUESTS_PER_MINUTE,
+            interactive_reserved_share=settings.LLM_INTERACTIVE_RESERVED_SHARE,
+            weights={
+                PRIORITY_INTERACTIVE: settings.LLM_INTERACTIVE_WEIGHT,
+                PRIORITY_BATCH: settings.LLM_BATCH_WEIGHT,
+            }
+        )
+    
+    return _llm_scheduler
+
+
+def get_llm_concurrency_limit() -> Optional[AdaptiveConcurrencyLimit]:
+    """
+    Dependency para obtener el límite adaptativo de llamadas al LLM.
+    
+    Solo lo usa el cliente principal: el tráfico shadow y el prefetch no
+    deben consumir ni mover el límite del tráfico real.
+    
+    Returns:
+        AdaptiveConcurrencyLimit: Límite singleton, o None si está deshabilitado
+    """
+    global _llm_concurrency_limit
+    
+    settings = get_settings()
+    if not settings.LLM_ADAPTIVE_LIMIT_ENABLED:
+        return None
+    
+    if _llm_concurrency_limit is None:
+        _llm_concurrency_limit = AdaptiveConcurrencyLimit(
+            initial_limit=settings.LLM_ADAPTIVE_INITIAL_LIMIT,
+            min_limit=settings.LLM_ADAPTIVE_MIN_LIMIT,
+            max_limit=settings.LLM_ADAPTIVE_MAX_LIMIT,
+            backoff_ratio=settings.LLM_ADAPTIVE_BACKOFF_RATIO,
+            latency_tolerance=settings.LLM_ADAPTIVE_LATENCY_TOLERANCE
+        )
+    
+    return _llm_concurrency_limit
+
+
+def warm_up_llm_client() -> None:
+    """
+    Crea el cliente LLM y su modelo por adelantado.
+    
+    Es bloqueante (importa el SDK): llamarlo desde un thread pool.
+    """
+    try:
+        get_gemini_client().warm_up()
+    except Exception as e:
+        print(f"⚠️ Warm-up del cliente LLM falló: {e}")
 
 
 def get_generate_feedback_use_case() -> GenerateFeedbackUseCase:
@@ -39,7 +172,550 @@ def get_generate_feedback_use_case() -> GenerateFeedbackUseCase:
     global _use_case
     
     if _use_case is None:
+        settings = get_settings()
         gemini_client = get_gemini_client()
-        _use_case = GenerateFeedbackUseCase(llm_client=gemini_client)
+        _use_case = GenerateFeedbackUseCase(
+            llm_client=gemini_client,
+            use_llm=settings.LLM_FEEDBACK_ENABLED,
+            similarity_cache=get_similarity_cache(),
+            response_schema=get_feedback_response_schema(),
+            feedback_cache=get_feedback_cache(),
+            repair_json_enabled=settings.LLM_JSON_REPAIR_ENABLED,
+            prefetch_cache=get_prefetch_cache(),
+            output_guardrail=get_output_guardrail()
+        )
+    
+    return _use_case
+
+
+def get_prefetch_cache() -> Optional[PrefetchCache]:
+    """
+    Dependency para obtener la cache de feedback especulativo.
+    
+    Returns:
+        PrefetchCache: Cache singleton, o None si el prefetch está deshabilitado
+    """
+    global _prefetch_cache
+    
+    settings = get_settings()
+    if not (settings.PREFETCH_ENABLED and settings.LLM_FEEDBACK_ENABLED):
+        return None
+    
+    if _prefetch_cache is None:
+        _prefetch_cache = PrefetchCache(
+            ttl_seconds=settings.PREFETCH_TTL_SECONDS,
+            max_entries=settings.PREFETCH_MAX_ENTRIES,
+            max_wait_seconds=settings.PREFETCH_MAX_WAIT_SECONDS
+        )
+    
+    return _prefetch_cache
+
+
+def get_feedback_prefetcher() -> Optional[FeedbackPrefetcher]:
+    """
+    Dependency para obtener el prefetcher de feedback.
+    
+    Las generaciones especulativas usan un cliente propio (sin límite
+    adaptativo ni reintentos, con su thread pool): comparten el scheduler,
+    donde compiten como batch, pero no ocupan lugares del límite del
+    tráfico real ni sus latencias lo mueven.
+    
+    Returns:
+        FeedbackPrefetcher: Prefetcher singleton, o None si está deshabilitado
+    """
+    global _feedback_prefetcher, _prefetch_executor
+    
+    cache = get_prefetch_cache()
+    if cache is None:
+        return None
+    
+    if _feedback_prefetcher is None:
+        settings = get_settings()
+        primary = get_gemini_client()
+        _prefetch_executor = ThreadPoolExecutor(
+            max_workers=settings.PREFETCH_MAX_CONCURRENCY,
+            thread_name_prefix="prefetch-llm"
+        )
+        prefetch_client = GeminiClient(
+            api_key=settings.GOOGLE_API_KEY,
+            timeout_seconds=settings.LLM_TIMEOUT_SECONDS,
+            retry_policy=RetryPolicy(rules={c: RetryRule(max_retries=0) for c in ErrorClass}),
+            model_cache_path=settings.GEMINI_MODEL_CACHE_PATH,
+            model_cache_ttl_seconds=settings.GEMINI_MODEL_CACHE_TTL_SECONDS,
+            model_names=primary.model_names_to_try,
+            executor=_prefetch_executor,
+            scheduler=get_llm_scheduler()
+        )
+        use_case = GenerateFeedbackUseCase(
+            llm_client=prefetch_client,
+            use_llm=True,
+            response_schema=get_feedback_response_schema(),
+            repair_json_enabled=settings.LLM_JSON_REPAIR_ENABLED,
+            output_guardrail=get_output_guardrail()
+        )
+        _feedback_prefetcher = FeedbackPrefetcher(
+            generate=use_case.generate_llm_feedback,
+            cache=cache,
+            max_buckets=settings.PREFETCH_MAX_BUCKETS,
+            max_concurrency=settings.PREFETCH_MAX_CONCURRENCY,
+            max_per_minute=settings.PREFETCH_MAX_REQUESTS_PER_MINUTE
+        )
+    
+    return _feedback_prefetcher
+
+
+async def close_feedback_prefetcher() -> None:
+    """Cancela los prefetch en vuelo y libera su thread pool"""
+    global _feedback_prefetcher, _prefetch_executor
+    
+    if _feedback_prefetcher is not None:
+        await _feedback_prefetcher.close()
+        _feedback_prefetcher = None
+    if _prefetch_executor is not None:
+        _prefetch_executor.shutdown(wait=False)
+        _prefetch_executor = None
+
+
+def get_shadow_runner() -> Optional[ShadowRunner]:
+    """
+    Dependency para obtener el runner de tráfico espejo.
+    
+    Los arms usan clientes propios (sin reintentos ni hedging) y un
+    thread pool propio, para no competir con el camino principal.
+    
+    Returns:
+        ShadowRunner: Runner singleton, o None si está deshabilitado
+    """
+    global _shadow_runner
+    
+    settings = get_settings()
+    if not settings.SHADOW_ENABLED:
+        return None
+    
+    if _shadow_runner is None:
+        primary = get_gemini_client()
+        response_schema = get_feedback_response_schema()
+        base_prompt = STRUCTURED_SYSTEM_PROMPT if response_schema is not None else SYSTEM_PROMPT
+        executor = ThreadPoolExecutor(
+            max_workers=settings.SHADOW_MAX_CONCURRENCY,
+            thread_name_prefix="shadow-llm"
+        )
+        
+        def shadow_client(model_name: str) -> GeminiClient:
+            return GeminiClient(
+                api_key=settings.GOOGLE_API_KEY,
+                timeout_seconds=settings.SHADOW_TIMEOUT_SECONDS,
+                retry_policy=RetryPolicy(rules={c: RetryRule(max_retries=0) for c in ErrorClass}),
+                model_names=[model_name],
+                executor=executor,
+                scheduler=get_llm_scheduler()
+            )
+        
+        candidate_prompt = base_prompt
+        if settings.SHADOW_CANDIDATE_PROMPT_PATH:
+            with open(settings.SHADOW_CANDIDATE_PROMPT_PATH, encoding="utf-8") as f:
+                candidate_prompt = f.read().strip()
+        
+        arms = []
+        if settings.SHADOW_INCLUDE_BASELINE:
+            arms.append(ShadowArm("baseline", shadow_client(primary.model_name), base_prompt, response_schema))
+        arms.append(ShadowArm(
+            "candidate",
+            shadow_client(settings.SHADOW_CANDIDATE_MODEL or primary.model_name),
+            candidate_prompt,
+            response_schema
+        ))
+        
+        _shadow_runner = ShadowRunner(
+            arms=arms,
+            # Validez del JSON sin reparación local
+            parse_response=lambda response, structured: (
+                get_generate_feedback_use_case().parse_llm_output(response, structured, repair=False)
+            ),
+            sample_rate=settings.SHADOW_SAMPLE_RATE,
+            max_concurrency=settings.SHADOW_MAX_CONCURRENCY,
+            max_per_minute=settings.SHADOW_MAX_REQUESTS_PER_MINUTE
+        )
+        print(f"👥 Shadow traffic: {', '.join(f'{a.name}={a.model_name}' for a in arms)}")
+    
+    return _shadow_runner
+
+
+async def close_shadow_runner() -> None:
+    """Cancela los shadows en vuelo y libera su thread pool"""
+    global _shadow_runner
+    
+    if _shadow_runner is not None:
+        await _shadow_runner.close()
+        _shadow_runner = None
+
+
+def get_feedback_response_schema() -> Optional[dict]:
+    """
+    Schema de salida estructurada derivado de FeedbackResponse.
+    
+    `tone` se excluye porque se determina localmente según el score.
+    
+    Returns:
+        dict: response_schema, o None si la salida estructurada está deshabilitada
+    """
+    settings = get_settings()
+    if not settings.LLM_STRUCTURED_OUTPUT_ENABLED:
+        return None
+    
+    # Import local: feedback_routes importa este módulo
+    from src.api.routes.feedback_routes import FeedbackResponse
+    
+    return schema_from_model(FeedbackResponse, exclude=("tone",))
+
+
+def get_output_guardrail() -> Optional[OutputGuardrail]:
+    """
+    Guardrail local del feedback del LLM.
+    
+    Returns:
+        OutputGuardrail: Guardrail con la lista configurada, o None si está deshabilitado
+    """
+    settings = get_settings()
+    if not settings.LLM_GUARDRAIL_ENABLED:
+        return None
+    
+    if settings.LLM_GUARDRAIL_TERMS_PATH:
+        return OutputGuardrail.from_file(settings.LLM_GUARDRAIL_TERMS_PATH)
+    return OutputGuardrail()
+
+
+def get_similarity_cache() -> Optional[SimilarityFeedbackCache]:
+    """
+    Dependency para obtener la cache de feedback por similitud.
+    
+    Returns:
+        SimilarityFeedbackCache: Cache singleton, o None si está deshabilitada
+    """
+    global _similarity_cache
+    
+    settings = get_settings()
+    if not settings.SIMILARITY_CACHE_ENABLED:
+        return None
+    
+    if _similarity_cache is None:
+        _similarity_cache = SimilarityFeedbackCache(
+            max_distance=settings.SIMILARITY_CACHE_MAX_DISTANCE,
+            max_entries_per_key=settings.SIMILARITY_CACHE_MAX_ENTRIES_PER_KEY
+        )
+    
+    return _similarity_cache
+
+
+def get_feedback_cache() -> Optional[TieredFeedbackCache]:
+    """
+    Dependency para obtener la cache de feedback de dos niveles.
+    
+    Returns:
+        TieredFeedbackCache: Cache singleton, o None si está deshabilitada
+    """
+    global _feedback_cache
+    
+    settings = get_settings()
+    if not settings.FEEDBACK_CACHE_ENABLED:
+        return None
+    
+    if _feedback_cache is None:
+        _feedback_cache = TieredFeedbackCache(
+            l2=create_backend(
+                settings.FEEDBACK_CACHE_BACKEND,
+                redis_url=settings.FEEDBACK_CACHE_REDIS_URL,
+                sqlite_path=settings.FEEDBACK_CACHE_SQLITE_PATH
+            ),
+            l1_max_entries=settings.FEEDBACK_CACHE_L1_MAX_ENTRIES,
+            ttl_seconds=settings.FEEDBACK_CACHE_TTL_SECONDS,
+            negative_ttl_seconds=settings.FEEDBACK_CACHE_NEGATIVE_TTL_SECONDS
+        )
+    
+    return _feedback_cache
+
+
+async def close_feedback_cache() -> None:
+    """Escribe las entradas pendientes en L2 y cierra la cache si está abierta"""
+    global _feedback_cache
+    
+    if _feedback_cache is not None:
+        await _feedback_cache.close()
+        _feedback_cache = None
+
+
+def get_attempt_log() -> Optional[AttemptLog]:
+    """
+    Dependency para obtener el attempt log columnar.
+    
+    Returns:
+        AttemptLog: Writer singleton, o None si está deshabilitado
+    """
+    global _attempt_log
+    
+    settings = get_settings()
+    if not settings.ATTEMPT_LOG_ENABLED:
+        return None
+    
+    if _attempt_log is None:
+        _attempt_log = AttemptLog(
+            directory=settings.ATTEMPT_LOG_DIR,
+            segment_max_bytes=settings.ATTEMPT_LOG_SEGMENT_MAX_BYTES,
+            flush_interval=settings.ATTEMPT_LOG_FLUSH_INTERVAL_SECONDS,
+            max_pending=settings.ATTEMPT_LOG_MAX_PENDING
+        )
+    
+    return _attempt_log
+
+
+def close_attempt_log() -> None:
+    """Escribe las filas pendientes y cierra el attempt log si está abierto"""
+    global _attempt_log
+    
+    if _attempt_log is not None:
+        _attempt_log.close()
+        _attempt_log = None
+
+
+def get_drain_state() -> DrainState:
+    """
+    Dependency para obtener el estado de drenado del proceso.
+    
+    Returns:
+        DrainState: Singleton (readiness, trabajo en vuelo, reporte del drenado)
+    """
+    global _drain_state
+    
+    if _drain_state is None:
+        _drain_state = DrainState(report_path=get_settings().DRAIN_REPORT_PATH)
+    
+    return _drain_state
+
+
+def get_outbound_delivery() -> Optional[OutboundDelivery]:
+    """
+    Dependency para obtener el delivery del feedback a servicios downstream.
+    
+    Returns:
+        OutboundDelivery: Singleton, o None si está deshabilitado o sin destinos
+    """
+    global _outbound_delivery
+    
+    settings = get_settings()
+    if not settings.DELIVERY_ENABLED or not settings.delivery_urls_list:
+        return None
+    
+    if _outbound_delivery is None:
+        _outbound_delivery = OutboundDelivery(
+            urls=settings.delivery_urls_list,
+            directory=settings.DELIVERY_DIR,
+            batch_size=settings.DELIVERY_BATCH_SIZE,
+            flush_interval=settings.DELIVERY_FLUSH_INTERVAL_SECONDS,
+            max_pending=settings.DELIVERY_MAX_PENDING,
+            max_retries=settings.DELIVERY_MAX_RETRIES,
+            backoff_max=settings.DELIVERY_BACKOFF_MAX_SECONDS,
+            timeout_seconds=settings.DELIVERY_TIMEOUT_SECONDS,
+            shutdown_timeout=settings.DELIVERY_SHUTDOWN_TIMEOUT_SECONDS,
+            auth_token=settings.DELIVERY_AUTH_TOKEN
+        )
+    
+    return _outbound_delivery
+
+
+def close_outbound_delivery() -> None:
+    """Envía lo pendiente, deja el resto en disco y cierra el delivery si está abierto"""
+    global _outbound_delivery
+    
+    if _outbound_delivery is not None:
+        _outbound_delivery.close()
+        _outbound_delivery = None
+
+
+def load_feedback_snapshot() -> int:
+    """
+    Carga el snapshot de feedback pre-generado en la cache de similitud.
+    
+    Returns:
+        int: Entradas cargadas (0 si no hay snapshot o cache)
+    """
+    settings = get_settings()
+    cache = get_similarity_cache()
+    path = settings.FEEDBACK_SNAPSHOT_PATH
+    
+    if cache is None or not path:
+        return 0
+    
+    if not os.path.exists(path):
+        print(f"⚠️ Snapshot de feedback no encontrado: {path}")
+        return 0
+    
+    return load_snapshot(cache, path)
+
+
+def get_traffic_capture() -> Optional[TrafficCapture]:
+    """
+    Dependency para obtener la captura de tráfico.
+    
+    Returns:
+        TrafficCapture: Captura singleton, o None si está deshabilitada
+    """
+    global _traffic_capture, _traffic_capture_refused
+    
+    settings = get_settings()
+    if not settings.TRAFFIC_CAPTURE_ENABLED or _traffic_capture_refused:
+        return None
+    
+    if not settings.TRAFFIC_CAPTURE_SALT:
+        # Con sal vacía el hash de user_id se revierte probando ids conocidos
+        print("⚠️ Traffic capture deshabilitada: TRAFFIC_CAPTURE_SALT está vacía")
+        _traffic_capture_refused = True
+        return None
+    
+    if _traffic_capture is None:
+        _traffic_capture = TrafficCapture(
+            path=settings.TRAFFIC_CAPTURE_PATH,
+            sample_rate=settings.TRAFFIC_CAPTURE_SAMPLE_RATE,
+            salt=settings.TRAFFIC_CAPTURE_SALT
+        )
+    
+    return _traffic_capture
+
+
+def close_traffic_capture() -> None:
+    """Escribe las muestras pendientes y cierra la captura si está abierta"""
+    global _traffic_capture
+    
+    if _traffic_capture is not None:
+        _traffic_capture.close()
+        _traffic_capture = None
+
+
+def get_trace_exporter() -> Optional[OtlpFileExporter]:
+    """
+    Dependency para obtener el exporter de spans OTLP/JSON.
+    
+    Returns:
+        OtlpFileExporter: Exporter singleton, o None si no hay TRACING_EXPORT_PATH
+    """
+    global _trace_exporter
+    
+    settings = get_settings()
+    if not settings.TRACING_ENABLED or not settings.TRACING_EXPORT_PATH:
+        return None
+    
+    if _trace_exporter is None:
+        _trace_exporter = OtlpFileExporter(
+            path=settings.TRACING_EXPORT_PATH,
+            service_name=settings.SERVICE_NAME,
+            service_version=settings.SERVICE_VERSION,
+            sample_rate=settings.TRACING_EXPORT_SAMPLE_RATE
+        )
+    
+    return _trace_exporter
+
+
+def close_trace_exporter() -> None:
+    """Escribe los traces pendientes y cierra el exporter si está abierto"""
+    global _trace_exporter
+    
+    if _trace_exporter is not None:
+        _trace_exporter.close()
+        _trace_exporter = None
+
+
+def start_loop_monitor() -> Optional[LoopMonitor]:
+    """
+    Arranca el monitor del event loop (llamar desde el loop, en startup).
+    
+    Returns:
+        LoopMonitor: Monitor singleton, o None si está deshabilitado
+    """
+    global _loop_monitor
+    
+    settings = get_settings()
+    if not settings.LOOP_MONITOR_ENABLED:
+        return None
+    
+    if _loop_monitor is None:
+        _loop_monitor = LoopMonitor(
+            interval=settings.LOOP_MONITOR_INTERVAL_SECONDS,
+            block_threshold=settings.LOOP_BLOCK_THRESHOLD_SECONDS
+        )
+        _loop_monitor.start()
+    
+    return _loop_monitor
+
+
+def get_loop_monitor() -> Optional[LoopMonitor]:
+    """
+    Retorna el monitor del event loop si está corriendo.
+    
+    Returns:
+        LoopMonitor: Monitor singleton, o None si no arrancó
+    """
+    return _loop_monitor
+
+
+async def stop_loop_monitor() -> None:
+    """Detiene el monitor del event loop si está corriendo"""
+    global _loop_monitor
+    
+    if _loop_monitor is not None:
+        await _loop_monitor.stop()
+        _loop_monitor = None
+
+
+def get_metrics_snapshot() -> dict:
+    """
+    Recolecta las métricas de los componentes ya inicializados.
+    
+    Returns:
+        dict: Métricas por componente
+    """
+    metrics = {}
+    
+    if _gemini_client is not None:
+        metrics["llm_retries"] = _gemini_client.retry_policy.stats()
+        if _gemini_client.hedge_policy is not None:
+            metrics["llm_hedging"] = _gemini_client.hedge_policy.stats()
+    
+    if _llm_scheduler is not None:
+        metrics["llm_scheduler"] = _llm_scheduler.stats()
+    if _feedback_prefetcher is not None:
+        metrics["prefetch"] = _feedback_prefetcher.stats()
+    if _llm_concurrency_limit is not None:
+        metrics["llm_concurrency_limit"] = _llm_concurrency_limit.stats()
+    
+    if _use_case is not None and _use_case.use_llm:
+        metrics["llm_json_repair"] = _use_case.json_repair_stats.stats()
+        if _use_case.output_guardrail is not None:
+            metrics["llm_guardrail"] = _use_case.output_guardrail.stats()
+    
+    if _attempt_log is not None:
+        metrics["attempt_log"] = _attempt_log.stats()
+    
+    if _traffic_capture is not None:
+        metrics["traffic_capture"] = _traffic_capture.stats()
+    
+    if _outbound_delivery is not None:
+        metrics["delivery"] = _outbound_delivery.stats()
+    
+    if _drain_state is not None:
+        metrics["drain"] = _drain_state.report()
+    
+    if _similarity_cache is not None:
+        metrics["similarity_cache"] = _similarity_cache.stats()
+    
+    if _feedback_cache is not None:
+        metrics["feedback_cache"] = _feedback_cache.stats()
+    
+    if _trace_exporter is not None:
+        metrics["trace_exporter"] = _trace_exporter.stats()
+    
+    if _loop_monitor is not None:
+        metrics["event_loop"] = _loop_monitor.stats()
+    
+    if _shadow_runner is not None:
+        metrics["shadow"] = _shadow_runner.report()
     
-    return _use_case
\ No newline at end of file
+    return metrics
\ No newline at end of file
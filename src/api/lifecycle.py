@@ -0,0 +1,165 @@
+"""
+Lifecycle - Estado de drenado para reinicios sin errores
+
+Secuencia ante SIGTERM (ver src/api/server.py):
+
+1. draining: /ready responde 503 para que el balanceador deje de
+   mandar tráfico; durante `readiness_delay` se sigue atendiendo
+2. not accepting: los requests nuevos reciben 503 + Retry-After y las
+   conexiones WebSocket nuevas se rechazan (1012); las sesiones abiertas
+   terminan sus intentos en proceso y se cierran con 1012
+3. Se espera a que terminen los requests y sesiones en vuelo, hasta
+   `timeout`; lo que quede cuenta como descartado
+4. uvicorn cierra el socket y corre el shutdown de la app (flush de
+   caches, logs y delivery); cada paso se mide
+
+El reporte del último drenado se guarda en disco y se expone en
+/metrics ("drain") en el próximo arranque.
+"""
+
+import asyncio
+import json
+import os
+import time
+from typing import Dict, Optional
+
+
+class DrainState:
+    """
+    Estado de drenado del proceso y contadores de trabajo en vuelo.
+
+    Se usa desde el event loop (no es thread-safe).
+    """
+
+    def __init__(self, report_path: Optional[str] = None):
+        """
+        Args:
+            report_path: Archivo JSON donde guardar el reporte del drenado
+        """
+        self.report_path = report_path
+        self.draining = False
+        self.accepting = True
+        self.reason: Optional[str] = None
+
+        self.in_flight_requests = 0
+        self.open_sessions = 0
+
+        self.rejected_requests = 0
+        self.rejected_sessions = 0
+        self.dropped_requests = 0
+        self.dropped_sessions = 0
+
+        self._started_at: Optional[float] = None
+        self._stopped_accepting_at: Optional[float] = None
+        self._idle_at: Optional[float] = None
+        self.steps: Dict[str, dict] = {}
+
+        self._stop_accepting = asyncio.Event()
+        self.previous = self._load_previous()
+
+    @property
+    def ready(self) -> bool:
+        return not self.draining
+
+    def begin(self, reason: str) -> None:
+        """Fase 1: readiness en false, se sigue atendiendo"""
+        if self.draining:
+            return
+        self.draining = True
+        self.reason = reason
+        self._started_at = time.monotonic()
+
+    def stop_accepting(self) -> None:
+        """Fase 2: rechazar trabajo nuevo y cerrar las sesiones WebSocket"""
+        self.begin(self.reason or "shutdown")
+        if not self.accepting:
+            return
+        self.accepting = False
+        self._stopped_accepting_at = time.monotonic()
+        self._stop_accepting.set()
+
+    async def wait_stop_accepting(self) -> None:
+        await self._stop_accepting.wait()
+
+    async def wait_idle(self, timeout: float) -> bool:
+        """
+        Fase 3: espera a que terminen los requests y sesiones en vuelo.
+
+        Args:
+            timeout: Segundos máximos de espera
+
+        Returns:
+            bool: True si no quedó trabajo en vuelo
+        """
+        self.stop_accepting()
+        deadline = time.monotonic() + timeout
+        while self.in_flight_requests or self.open_sessions:
+            if time.monotonic() >= deadline:
+                # Lo que siga en vuelo lo cancela uvicorn
+                self.dropped_requests += self.in_flight_requests
+                self.dropped_sessions += self.open_sessions
+                self._idle_at = time.monotonic()
+                return False
+            await asyncio.sleep(0.05)
+        self._idle_at = time.monotonic()
+        return True
+
+    def record_step(self, name: str, seconds: float, error: Optional[str] = None) -> None:
+        """Registra la duración de un paso del shutdown (flush, cierre)"""
+        self.steps[name] = {"seconds": round(seconds, 4), "error": error}
+
+    def report(self) -> dict:
+        """Reporte del drenado en curso (o del anterior si no hay uno)"""
+        if not self.draining:
+            return {
+                "ready": True,
+                "in_flight_requests": self.in_flight_requests,
+                "open_sessions": self.open_sessions,
+                "previous": self.previous,
+            }
+
+        now = time.monotonic()
+        accepting_until = self._stopped_accepting_at or now
+        idle_at = self._idle_at or now
+        return {
+            "ready": False,
+            "reason": self.reason,
+            "accepting": self.accepting,
+            "in_flight_requests": self.in_flight_requests,
+            "open_sessions": self.open_sessions,
+            "readiness_delay_seconds": round(accepting_until - self._started_at, 4),
+            "wait_in_flight_seconds": (
+                round(idle_at - self._stopped_accepting_at, 4)
+                if self._stopped_accepting_at is not None else None
+            ),
+            "total_seconds": round(now - self._started_at, 4),
+            "rejected_requests": self.rejected_requests,
+            "rejected_sessions": self.rejected_sessions,
+            "dropped_requests": self.dropped_requests,
+            "dropped_sessions": self.dropped_sessions,
+            "shutdown_steps": dict(self.steps),
+        }
+
+    def save_report(self) -> dict:
+        """Escribe el reporte final a disco (si hay report_path) y lo retorna"""
+        report = self.report()
+        report["finished_at"] = time.time()
+        if self.report_path:
+            try:
+                directory = os.path.dirname(self.report_path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                with open(self.report_path, "w", encoding="utf-8") as f:
+                    json.dump(report, f, indent=2)
+            except Exception as e:
+                print(f"⚠️ No se pudo guardar el reporte de drenado: {e}")
+        return report
+
+    def _load_previous(self) -> Optional[dict]:
+        if not self.report_path or not os.path.exists(self.report_path):
+            return None
+        try:
+            with open(self.report_path, encoding="utf-8") as f:
+                return json.load(f)
+        except Exception:
+            return None
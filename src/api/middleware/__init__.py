@@ -0,0 +1,9 @@
+"""
+API Middleware
+"""
+
+from .tracing import TracingMiddleware
+from .priority import PriorityMiddleware
+from .drain import DrainMiddleware
+
+__all__ = ["TracingMiddleware", "PriorityMiddleware", "DrainMiddleware"]
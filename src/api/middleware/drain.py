@@ -0,0 +1,90 @@
+"""
+Drain Middleware - Trabajo en vuelo y rechazo durante el drenado
+
+Middleware ASGI puro: cuenta los requests HTTP y las sesiones
+WebSocket abiertas en el DrainState y, cuando el proceso deja de
+aceptar trabajo (ver src/api/lifecycle.py):
+
+- HTTP: 503 con Retry-After y Connection: close (nginx lo puede
+  reintentar en otra instancia con error_page 503, ver nginx-llm-service.conf)
+- WebSocket: cierre 1012 (Service Restart) antes del handshake
+
+Las rutas de estado (/ready, /metrics, ...) siempre se atienden.
+"""
+
+from typing import Callable, Iterable
+
+from src.api.lifecycle import DrainState
+
+
+CLOSE_SERVICE_RESTART = 1012
+
+DEFAULT_EXEMPT_PATHS = ("/", "/ready", "/metrics", "/feedback/health")
+
+
+class DrainMiddleware:
+    """Cuenta el trabajo en vuelo y rechaza el nuevo durante el drenado"""
+
+    def __init__(
+        self,
+        app,
+        get_state: Callable[[], DrainState],
+        retry_after_seconds: int = 5,
+        exempt_paths: Iterable[str] = DEFAULT_EXEMPT_PATHS
+    ):
+        """
+        Args:
+            app: Aplicación ASGI
+            get_state: Retorna el DrainState del proceso
+            retry_after_seconds: Valor del header Retry-After de los 503
+            exempt_paths: Paths que se atienden aun sin aceptar trabajo
+        """
+        self.app = app
+        self.get_state = get_state
+        self.retry_after = str(retry_after_seconds).encode("latin-1")
+        self.exempt_paths = frozenset(exempt_paths)
+
+    async def __call__(self, scope, receive, send):
+        scope_type = scope["type"]
+        if scope_type not in ("http", "websocket") or scope["path"] in self.exempt_paths:
+            await self.app(scope, receive, send)
+            return
+
+        state = self.get_state()
+
+        if scope_type == "websocket":
+            if not state.accepting:
+                state.rejected_sessions += 1
+                await send({"type": "websocket.close", "code": CLOSE_SERVICE_RESTART})
+                return
+            state.open_sessions += 1
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                state.open_sessions -= 1
+            return
+
+        if not state.accepting:
+            state.rejected_requests += 1
+            await self._reject(send)
+            return
+
+        state.in_flight_requests += 1
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            state.in_flight_requests -= 1
+
+    async def _reject(self, send) -> None:
+        body = b'{"detail":"Servicio reiniciando"}'
+        await send({
+            "type": "http.response.start",
+            "status": 503,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode("latin-1")),
+                (b"retry-after", self.retry_after),
+                (b"connection", b"close"),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,31 @@
+"""
+Priority Middleware - Clase de prioridad del request (header X-Priority)
+
+Middleware ASGI puro: si el request trae `X-Priority: interactive` o
+`X-Priority: batch`, las llamadas al LLM que haga se encolan en esa
+clase del scheduler (ver src/infrastructure/llm/scheduler.py). Sin
+header vale el default del endpoint, o "interactive".
+"""
+
+from src.infrastructure.llm.scheduler import parse_priority, priority_scope
+
+
+class PriorityMiddleware:
+    """Propaga X-Priority al contextvar del scheduler"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket"):
+            await self.app(scope, receive, send)
+            return
+
+        priority = None
+        for name, value in scope.get("headers", []):
+            if name == b"x-priority":
+                priority = parse_priority(value.decode("latin-1"))
+                break
+
+        with priority_scope(priority):
+            await self.app(scope, receive, send)
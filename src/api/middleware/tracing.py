@@ -0,0 +1,77 @@
+"""
+Tracing Middleware - X-Request-ID y Server-Timing
+
+Middleware ASGI puro (sin BaseHTTPMiddleware) para no agregar una
+tarea extra por request:
+
+- Acepta el X-Request-ID entrante (nginx lo setea) o genera uno.
+- Activa un Trace para que los spans del endpoint, el use case y el
+  cliente LLM se registren en él.
+- Agrega X-Request-ID y Server-Timing a la respuesta.
+- Entrega el trace al exporter OTLP si está configurado.
+"""
+
+from typing import Callable, Optional
+
+from src.infrastructure.tracing import OtlpFileExporter, start_trace, end_trace, sanitize_request_id
+
+
+class TracingMiddleware:
+    """Traza cada request HTTP"""
+
+    def __init__(
+        self,
+        app,
+        server_timing: bool = True,
+        get_exporter: Optional[Callable[[], Optional[OtlpFileExporter]]] = None
+    ):
+        """
+        Args:
+            app: Aplicación ASGI
+            server_timing: Si True, agrega el header Server-Timing
+            get_exporter: Retorna el exporter OTLP (o None si está deshabilitado)
+        """
+        self.app = app
+        self.server_timing = server_timing
+        self.get_exporter = get_exporter
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        incoming = None
+        for name, value in scope.get("headers", []):
+            if name == b"x-request-id":
+                incoming = value.decode("latin-1")
+                break
+        request_id = sanitize_request_id(incoming)
+
+        trace, token = start_trace(request_id, f"{scope['method']} {scope['path']}")
+        trace.attributes["http.method"] = scope["method"]
+        trace.attributes["http.target"] = scope["path"]
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                # Desde el último checkpoint del endpoint hasta aquí:
+                # serialización del response_model
+                if trace.has_checkpoints:
+                    trace.checkpoint("response.serialize")
+                trace.finish()
+                trace.attributes["http.status_code"] = message["status"]
+
+                headers = list(message.get("headers", []))
+                headers.append((b"x-request-id", request_id.encode("latin-1")))
+                if self.server_timing:
+                    headers.append((b"server-timing", trace.server_timing().encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            trace.finish()
+            end_trace(token)
+            exporter = self.get_exporter() if self.get_exporter is not None else None
+            if exporter is not None:
+                exporter.export(trace)
@@ -3,5 +3,8 @@ API Routes
 """
 
 from .feedback_routes import router as feedback_router
+from .metrics_routes import router as metrics_router
+from .debug_routes import router as debug_router
+from .session_routes import router as session_router
 
-__all__ = ["feedback_router"]
\ No newline at end of file
+__all__ = ["feedback_router", "metrics_router", "debug_router", "session_router"]
\ No newline at end of file
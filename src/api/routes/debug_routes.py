@@ -0,0 +1,127 @@
+"""
+Debug API Routes - Perfilado en vivo del worker
+
+Protegidas con el header X-Admin-Token. Si ADMIN_TOKEN no está
+configurado, las rutas responden 404.
+"""
+
+import asyncio
+import hmac
+from typing import Optional
+
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+
+from src.api.dependencies import get_loop_monitor
+from src.infrastructure.config import get_settings
+from src.infrastructure.diagnostics import (
+    SamplingProfiler,
+    ProfilerBusyError,
+    top_allocations,
+    HeapProfileBusyError
+)
+
+
+def require_admin_token(x_admin_token: Optional[str] = Header(None)) -> None:
+    """
+    Verifica el token de administración.
+
+    Raises:
+        HTTPException: 404 si no hay ADMIN_TOKEN, 403 si el token no coincide
+    """
+    settings = get_settings()
+    if not settings.ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token, settings.ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Token de administración inválido")
+
+
+router = APIRouter(
+    prefix="/debug",
+    tags=["Debug"],
+    dependencies=[Depends(require_admin_token)],
+    include_in_schema=False
+)
+
+
+@router.get("/profile", response_class=PlainTextResponse)
+async def profile(
+    seconds: float = Query(10.0, gt=0, description="Duración del perfil"),
+    hz: int = Query(100, ge=1, le=1000, description="Muestras por segundo"),
+    idle: bool = Query(False, description="Incluir threads ociosos")
+):
+    """
+    Perfila el proceso por muestreo de stacks de todos los threads.
+
+    Args:
+        seconds: Duración (acotada por DEBUG_PROFILE_MAX_SECONDS)
+        hz: Frecuencia de muestreo
+        idle: Incluir threads esperando en locks / select
+
+    Returns:
+        PlainTextResponse: Collapsed stacks ("thread;frame;...;frame N")
+    """
+    settings = get_settings()
+    seconds = min(seconds, settings.DEBUG_PROFILE_MAX_SECONDS)
+
+    profiler = SamplingProfiler(hz=hz, idle=idle)
+    try:
+        profiler.start()
+    except ProfilerBusyError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        profiler.stop()
+
+    return PlainTextResponse(
+        profiler.collapsed(),
+        headers={"X-Profile-Samples": str(profiler.samples)}
+    )
+
+
+@router.get("/heap")
+async def heap(
+    seconds: float = Query(10.0, gt=0, description="Ventana de trazado"),
+    limit: int = Query(25, ge=1, le=500, description="Entradas a retornar"),
+    key_type: str = Query("lineno", description="lineno | filename | traceback"),
+    frames: int = Query(1, ge=1, le=50, description="Frames por traceback")
+):
+    """
+    Principales puntos de asignación de memoria (tracemalloc).
+
+    Args:
+        seconds: Ventana (acotada por DEBUG_PROFILE_MAX_SECONDS)
+        limit: Cantidad de entradas
+        key_type: Agrupación de tracemalloc
+        frames: Profundidad de los tracebacks
+
+    Returns:
+        dict: Totales y principales asignaciones
+    """
+    settings = get_settings()
+    seconds = min(seconds, settings.DEBUG_PROFILE_MAX_SECONDS)
+
+    try:
+        return await top_allocations(seconds, limit=limit, key_type=key_type, frames=frames)
+    except HeapProfileBusyError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+@router.get("/stalls")
+async def stalls():
+    """
+    Bloqueos recientes del event loop con el stack que los causó.
+
+    /metrics solo expone sus tiempos; los stacks quedan detrás del token.
+
+    Returns:
+        dict: Bloqueos recientes (vacío si LOOP_MONITOR_ENABLED es False)
+    """
+    monitor = get_loop_monitor()
+    if monitor is None:
+        return {"stalls": 0, "recent_stalls": []}
+    return {"stalls": monitor.stall_count, "recent_stalls": monitor.recent_stalls()}
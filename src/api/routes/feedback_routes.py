@@ -2,16 +2,38 @@
 Feedback API Routes
 """
 
-from fastapi import APIRouter, HTTPException
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from fastapi import APIRouter, BackgroundTasks, HTTPException
 from pydantic import BaseModel, Field
 from typing import List, Optional
 
-from src.domain.models import AnalysisContext
+from src.domain.models import AnalysisContext, Feedback
 from src.application.use_cases import GenerateFeedbackUseCase
-from src.api.dependencies import get_generate_feedback_use_case
+from src.infrastructure.tracing import checkpoint, span
+from src.infrastructure.llm import priority_scope
+from src.infrastructure.delivery import feedback_record
+from src.api.content_negotiation import (
+    NegotiatedRoute,
+    msgpack_handler,
+    decode_fields,
+    encode_fields
+)
+from src.api.dependencies import (
+    get_generate_feedback_use_case,
+    get_attempt_log,
+    get_traffic_capture,
+    get_shadow_runner,
+    get_outbound_delivery,
+    get_feedback_prefetcher
+)
 
 
-router = APIRouter(prefix="/feedback", tags=["Feedback"])
+router = APIRouter(prefix="/feedback", tags=["Feedback"], route_class=NegotiatedRoute)
+
+# Pool propio del health check: un probe colgado no ocupa threads de generación
+_health_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="health-llm")
 
 
 # ============================================================================
@@ -72,6 +94,74 @@ class GenerateFeedbackRequest(BaseModel):
                 "previous_best_score": 78.0
             }
         }
+    
+    def to_context(self) -> AnalysisContext:
+        """
+        Convierte el request al contexto de análisis del dominio.
+        
+        Raises:
+            ValueError: Si el contexto no es válido (ej: exercise_type)
+        """
+        return AnalysisContext(
+            attempt_id=self.attempt_id,
+            user_id=self.user_id,
+            exercise_id=self.exercise_id,
+            pronunciation_score=self.pronunciation_score,
+            fluency_score=self.fluency_score,
+            rhythm_score=self.rhythm_score,
+            overall_score=self.overall_score,
+            exercise_type=self.exercise_type,
+            exercise_content=self.exercise_content,
+            difficulty_level=self.difficulty_level,
+            reference_text=self.reference_text,
+            user_age=self.user_age,
+            attempt_number=self.attempt_number,
+            passed=self.passed,
+            stars_earned=self.stars_earned,
+            unlocked_next=self.unlocked_next,
+            previous_best_score=self.previous_best_score
+        )
+
+
+class PrefetchFeedbackRequest(BaseModel):
+    """Request de prefetch: ejercicio y usuario, antes de tener los scores"""
+    
+    user_id: str = Field(..., description="ID del usuario")
+    exercise_id: str = Field(..., description="ID del ejercicio")
+    
+    exercise_type: str = Field(..., description="Tipo: fonema, ritmo, entonacion")
+    exercise_content: str = Field(..., description="Descripción del contenido")
+    difficulty_level: int = Field(..., ge=1, le=5, description="Nivel de dificultad")
+    reference_text: str = Field(..., description="Texto de referencia")
+    
+    user_age: Optional[int] = Field(None, ge=3, le=18, description="Edad del usuario")
+    attempt_number: int = Field(1, ge=1, description="Número de intento")
+    previous_best_score: Optional[float] = Field(None, ge=0, le=100)
+    unlocks_next_on_pass: bool = Field(False, description="Si aprobar desbloquea el siguiente nivel")
+    
+    def to_template(self) -> AnalysisContext:
+        """
+        Contexto base para los buckets (los scores se completan por bucket).
+        
+        Raises:
+            ValueError: Si el contexto no es válido (ej: exercise_type)
+        """
+        return AnalysisContext(
+            attempt_id="prefetch",
+            user_id=self.user_id,
+            exercise_id=self.exercise_id,
+            pronunciation_score=0.0,
+            fluency_score=0.0,
+            rhythm_score=0.0,
+            overall_score=0.0,
+            exercise_type=self.exercise_type,
+            exercise_content=self.exercise_content,
+            difficulty_level=self.difficulty_level,
+            reference_text=self.reference_text,
+            user_age=self.user_age,
+            attempt_number=self.attempt_number,
+            previous_best_score=self.previous_best_score
+        )
 
 
 # ============================================================================
@@ -106,6 +196,25 @@ class FeedbackResponse(BaseModel):
                 "tone": "positive"
             }
         }
+    
+    @classmethod
+    def from_feedback(cls, feedback: Feedback) -> "FeedbackResponse":
+        """Construye el response a partir del Feedback del dominio"""
+        return cls(
+            main_message=feedback.main_message,
+            strengths=feedback.strengths,
+            areas_to_improve=feedback.areas_to_improve,
+            specific_tip=feedback.specific_tip,
+            celebration=feedback.celebration,
+            encouragement=feedback.encouragement,
+            tone=feedback.tone
+        )
+
+
+class PrefetchResponse(BaseModel):
+    """Response del prefetch"""
+    
+    scheduled: List[str] = Field(..., description="Buckets en generación (ej: fail/rhythm)")
 
 
 class HealthResponse(BaseModel):
@@ -121,9 +230,97 @@ class HealthResponse(BaseModel):
 # ENDPOINTS
 # ============================================================================
 
+async def _generate(
+    context: AnalysisContext,
+    payload: dict,
+    background_tasks: BackgroundTasks
+) -> Feedback:
+    """
+    Pasos comunes de /feedback/generate para JSON y MessagePack.
+    
+    Args:
+        context: Contexto del análisis
+        payload: Campos del request (para la captura de tráfico)
+        background_tasks: Tareas que corren después de enviar la respuesta
+    
+    Returns:
+        Feedback: Feedback generado
+    """
+    # Muestrear payload para replay (user_id se guarda hasheado)
+    traffic_capture = get_traffic_capture()
+    if traffic_capture is not None:
+        traffic_capture.record("/feedback/generate", payload)
+    
+    # Obtener use case
+    use_case = get_generate_feedback_use_case()
+    
+    # Generar feedback
+    started = time.perf_counter()
+    with span("use_case", exercise_id=context.exercise_id), priority_scope(user=context.user_id):
+        feedback = await use_case.execute(context)
+    latency_ms = (time.perf_counter() - started) * 1000
+    
+    # Registrar intento (solo encola, la escritura es en background)
+    attempt_log = get_attempt_log()
+    if attempt_log is not None:
+        attempt_log.append(context, latency_ms)
+    
+    # Publicar a los servicios downstream (solo encola)
+    delivery = get_outbound_delivery()
+    if delivery is not None:
+        delivery.publish(feedback_record(context, feedback, "/feedback/generate"))
+    
+    # Espejar a los modelos/prompts candidatos, ya enviada la respuesta
+    shadow_runner = get_shadow_runner()
+    if shadow_runner is not None:
+        background_tasks.add_task(shadow_runner.submit, context)
+    
+    return feedback
+
+
+async def generate_feedback_msgpack(payload: dict, background_tasks: BackgroundTasks) -> dict:
+    """
+    Camino MessagePack de /feedback/generate (ver content_negotiation).
+    
+    El payload se valida contra GenerateFeedbackRequest y se construye
+    el AnalysisContext directamente, sin instanciar modelos pydantic.
+    
+    Args:
+        payload: Body decodificado
+        background_tasks: Tareas que corren después de enviar la respuesta
+    
+    Returns:
+        dict: Campos de FeedbackResponse
+    
+    Raises:
+        PayloadValidationError: Si el payload no cumple el modelo (422)
+        HTTPException: Si hay error en la generación
+    """
+    checkpoint("request.parse")
+    values = decode_fields(GenerateFeedbackRequest, payload)
+    
+    try:
+        context = AnalysisContext(**values)
+        feedback = await _generate(context, values, background_tasks)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        print(f"❌ Error en endpoint /feedback/generate (msgpack): {e}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Error generando feedback: {str(e)}"
+        )
+    
+    response = encode_fields(FeedbackResponse, feedback)
+    checkpoint("handler")
+    return response
+
+
 @router.post("/generate", response_model=FeedbackResponse)
+@msgpack_handler(generate_feedback_msgpack)
 async def generate_feedback(
-    request: GenerateFeedbackRequest
+    request: GenerateFeedbackRequest,
+    background_tasks: BackgroundTasks
 ):
     """
     Genera feedback personalizado para un intento de ejercicio.
@@ -131,8 +328,12 @@ async def generate_feedback(
     Este es el endpoint principal del servicio. Recibe los scores
     del ML Service y genera feedback motivador y específico para el niño.
     
+    Acepta JSON o MessagePack (Content-Type: application/msgpack) y
+    responde según el header Accept.
+    
     Args:
         request: Datos del intento y scores
+        background_tasks: Tareas posteriores a la respuesta (shadow)
     
     Returns:
         FeedbackResponse: Feedback generado
@@ -140,44 +341,19 @@ async def generate_feedback(
     Raises:
         HTTPException: Si hay error en la generación
     """
+    # Lectura del body + validación pydantic
+    checkpoint("request.parse")
+    
     try:
-        # Obtener use case
-        use_case = get_generate_feedback_use_case()
-        
         # Crear contexto de análisis
-        context = AnalysisContext(
-            attempt_id=request.attempt_id,
-            user_id=request.user_id,
-            exercise_id=request.exercise_id,
-            pronunciation_score=request.pronunciation_score,
-            fluency_score=request.fluency_score,
-            rhythm_score=request.rhythm_score,
-            overall_score=request.overall_score,
-            exercise_type=request.exercise_type,
-            exercise_content=request.exercise_content,
-            difficulty_level=request.difficulty_level,
-            reference_text=request.reference_text,
-            user_age=request.user_age,
-            attempt_number=request.attempt_number,
-            passed=request.passed,
-            stars_earned=request.stars_earned,
-            unlocked_next=request.unlocked_next,
-            previous_best_score=request.previous_best_score
-        )
+        context = request.to_context()
         
-        # Generar feedback
-        feedback = await use_case.execute(context)
+        feedback = await _generate(context, request.model_dump(), background_tasks)
         
         # Retornar response
-        return FeedbackResponse(
-            main_message=feedback.main_message,
-            strengths=feedback.strengths,
-            areas_to_improve=feedback.areas_to_improve,
-            specific_tip=feedback.specific_tip,
-            celebration=feedback.celebration,
-            encouragement=feedback.encouragement,
-            tone=feedback.tone
-        )
+        response = FeedbackResponse.from_feedback(feedback)
+        checkpoint("handler")
+        return response
         
     except ValueError as e:
         # Error de validación
@@ -191,29 +367,70 @@ async def generate_feedback(
         )
 
 
+@router.post("/prefetch", response_model=PrefetchResponse, status_code=202)
+async def prefetch_feedback(request: PrefetchFeedbackRequest):
+    """
+    Genera en background el feedback de los resultados más probables.
+    
+    La app lo llama al empezar a grabar; si el /feedback/generate del
+    intento cae en uno de los buckets generados, se responde sin esperar
+    al LLM. Con el prefetch deshabilitado (o sin presupuesto) no se
+    lanza nada, así que se puede llamar siempre.
+    
+    Args:
+        request: Ejercicio y usuario del intento por empezar
+    
+    Returns:
+        PrefetchResponse: Buckets lanzados
+    
+    Raises:
+        HTTPException: Si el contexto no es válido
+    """
+    prefetcher = get_feedback_prefetcher()
+    if prefetcher is None:
+        return PrefetchResponse(scheduled=[])
+    
+    try:
+        template = request.to_template()
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return PrefetchResponse(scheduled=prefetcher.submit(template, request.unlocks_next_on_pass))
+
+
 @router.get("/health", response_model=HealthResponse)
 async def health_check():
     """
     Health check del servicio.
     
     Verifica que el servicio esté funcionando y que la
-    conexión con OpenAI API esté disponible.
+    conexión con Gemini API esté disponible.
+    
+    El campo `azure_openai_api_connected` se mantiene por compatibilidad
+    con los clientes existentes; refleja la conexión con Gemini.
     
     Returns:
         HealthResponse: Estado del servicio
     """
     from src.infrastructure.config import get_settings
-    from src.api.dependencies import get_azure_openai_client
+    from src.api.dependencies import get_gemini_client
     
     settings = get_settings()
     
-    # Test conexión con OpenAI
+    # Test conexión con Gemini (bloqueante: en thread pool para no frenar el loop)
     llm_connected = False
+    timeout = settings.LLM_TIMEOUT_SECONDS
     try:
-        azure_openai_client = get_azure_openai_client()
-        llm_connected = azure_openai_client.test_connection()
+        gemini_client = get_gemini_client()
+        loop = asyncio.get_running_loop()
+        llm_connected = await asyncio.wait_for(
+            loop.run_in_executor(_health_executor, gemini_client.test_connection, timeout),
+            timeout
+        )
+    except asyncio.TimeoutError:
+        print(f"⚠️ Health check - Gemini API sin respuesta en {timeout}s")
     except Exception as e:
-        print(f"⚠️ Health check - Azure OpenAI API no disponible: {e}")
+        print(f"⚠️ Health check - Gemini API no disponible: {e}")
     
     return HealthResponse(
         status="healthy" if llm_connected else "degraded",
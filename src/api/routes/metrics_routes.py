@@ -0,0 +1,23 @@
+"""
+Metrics API Routes
+"""
+
+from fastapi import APIRouter
+
+from src.api.dependencies import get_metrics_snapshot
+
+
+router = APIRouter(tags=["Metrics"])
+
+
+@router.get("/metrics")
+async def metrics():
+    """
+    Métricas internas del servicio.
+    
+    Solo incluye los componentes que ya fueron inicializados.
+    
+    Returns:
+        dict: Métricas por componente
+    """
+    return get_metrics_snapshot()
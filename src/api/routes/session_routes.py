@@ -0,0 +1,259 @@
+"""
+Session API Routes - WebSocket para sesiones de práctica
+
+Una conexión por sesión en lugar de un request HTTPS por intento.
+
+Protocolo (JSON por mensaje):
+
+    Cliente -> servidor
+        {"type": "attempt", ...campos de GenerateFeedbackRequest}
+        {"type": "ping"}
+
+    Servidor -> cliente
+        {"type": "feedback", "attempt_id": ..., "stage": "instant",
+         "final": false, "feedback": {...FeedbackResponse}}
+        {"type": "feedback", "attempt_id": ..., "stage": "enriched",
+         "final": true, "feedback": {...} | null, "unchanged": bool}
+        {"type": "error", "attempt_id": ... | null, "detail": ...}
+        {"type": "pong"}
+
+Cada intento termina con exactamente un mensaje con "final": true.
+Si el feedback instantáneo ya es definitivo (LLM deshabilitado o
+acierto en la cache de similitud), ese es el mensaje final.
+
+Reinicio del servicio: la sesión deja de leer intentos nuevos, termina
+los que estén en proceso y se cierra con 1012 (Service Restart); el
+cliente debe reconectar.
+
+Control de flujo: con WS_MAX_IN_FLIGHT intentos en proceso el servidor
+deja de leer del socket hasta que uno termine, así la presión vuelve
+al cliente por TCP en lugar de acumularse en memoria.
+"""
+
+import asyncio
+import json
+import time
+from typing import Optional, Set
+
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+from pydantic import ValidationError
+
+from src.infrastructure.config import get_settings
+from src.infrastructure.llm import priority_scope
+from src.infrastructure.delivery import feedback_record
+from src.api.dependencies import (
+    get_generate_feedback_use_case,
+    get_attempt_log,
+    get_traffic_capture,
+    get_outbound_delivery,
+    get_drain_state
+)
+from src.api.routes.feedback_routes import GenerateFeedbackRequest, FeedbackResponse
+
+
+router = APIRouter(prefix="/feedback", tags=["Feedback"])
+
+
+# Códigos de cierre (RFC 6455)
+CLOSE_NORMAL = 1000
+CLOSE_MESSAGE_TOO_BIG = 1009
+CLOSE_SERVICE_RESTART = 1012
+
+# Resultado de la espera de mensaje cuando el proceso se está drenando
+DRAINING = object()
+
+
+class FeedbackSession:
+    """Estado de una conexión WebSocket"""
+
+    def __init__(self, websocket: WebSocket):
+        settings = get_settings()
+        self.websocket = websocket
+        self.idle_timeout = settings.WS_IDLE_TIMEOUT_SECONDS
+        self.max_message_bytes = settings.WS_MAX_MESSAGE_BYTES
+        self.slots = asyncio.Semaphore(settings.WS_MAX_IN_FLIGHT)
+        self.outbox: asyncio.Queue = asyncio.Queue(maxsize=settings.WS_SEND_QUEUE_SIZE)
+        self.tasks: Set[asyncio.Task] = set()
+        self.use_case = get_generate_feedback_use_case()
+        self.drain_state = get_drain_state()
+
+    async def run(self) -> None:
+        sender = asyncio.create_task(self._send_loop())
+        self.draining = asyncio.create_task(self.drain_state.wait_stop_accepting())
+        try:
+            await self._receive_loop()
+        except WebSocketDisconnect:
+            pass
+        finally:
+            for task in self.tasks:
+                task.cancel()
+            sender.cancel()
+            self.draining.cancel()
+            await asyncio.gather(sender, self.draining, *self.tasks, return_exceptions=True)
+
+    async def _receive_loop(self) -> None:
+        while True:
+            # Sin slot libre no se lee el siguiente mensaje (backpressure)
+            await self.slots.acquire()
+            try:
+                text = await self._receive_with_idle_timeout()
+            except BaseException:
+                self.slots.release()
+                raise
+            if text is None:
+                self.slots.release()
+                await self.websocket.close(code=CLOSE_NORMAL, reason="idle timeout")
+                return
+            if text is DRAINING:
+                self.slots.release()
+                await self._close_for_restart()
+                return
+
+            if len(text.encode()) > self.max_message_bytes:
+                self.slots.release()
+                await self.websocket.close(code=CLOSE_MESSAGE_TOO_BIG, reason="message too big")
+                return
+
+            message = _decode(text)
+            message_type = message.get("type") if message is not None else None
+            if message_type != "attempt":
+                self.slots.release()
+                if message is None:
+                    await self.outbox.put(_error(None, "Se espera un objeto JSON"))
+                elif message_type == "ping":
+                    await self.outbox.put({"type": "pong"})
+                else:
+                    await self.outbox.put(_error(None, f"Tipo de mensaje desconocido: {message_type}"))
+                continue
+
+            task = asyncio.create_task(self._handle_attempt(message))
+            self.tasks.add(task)
+            task.add_done_callback(self._attempt_done)
+
+    async def _receive_with_idle_timeout(self):
+        """
+        Retorna el texto recibido, None si no llega nada en idle_timeout
+        sin intentos en proceso, o DRAINING si el proceso se está drenando.
+        """
+        receive = asyncio.ensure_future(self.websocket.receive_text())
+        try:
+            while True:
+                done, _ = await asyncio.wait(
+                    {receive, self.draining},
+                    timeout=self.idle_timeout,
+                    return_when=asyncio.FIRST_COMPLETED
+                )
+                if receive in done:
+                    return receive.result()
+                if self.draining in done:
+                    return DRAINING
+                if not self.tasks:
+                    return None
+        finally:
+            if not receive.done():
+                receive.cancel()
+
+    async def _close_for_restart(self) -> None:
+        """Termina los intentos en proceso, envía sus resultados y cierra con 1012"""
+        if self.tasks:
+            await asyncio.gather(*self.tasks, return_exceptions=True)
+        await self.outbox.join()
+        await self.websocket.close(code=CLOSE_SERVICE_RESTART, reason="service restart")
+
+    def _attempt_done(self, task: asyncio.Task) -> None:
+        self.tasks.discard(task)
+        self.slots.release()
+
+    async def _handle_attempt(self, message: dict) -> None:
+        attempt_id = message.get("attempt_id")
+        try:
+            payload = {key: value for key, value in message.items() if key != "type"}
+            request = GenerateFeedbackRequest(**payload)
+            context = request.to_context()
+        except (ValidationError, ValueError) as e:
+            await self.outbox.put(_error(attempt_id, str(e)))
+            return
+
+        traffic_capture = get_traffic_capture()
+        if traffic_capture is not None:
+            # Se registra con la ruta HTTP equivalente para que replay_traffic
+            # pueda reproducirlo con un POST
+            traffic_capture.record("/feedback/generate", request.model_dump())
+
+        started = time.perf_counter()
+
+        # 1. Resultado instantáneo (cache de similitud o algorítmico)
+        instant, final = self.use_case.generate_instant_feedback(context)
+        delivered = instant
+        instant_response = FeedbackResponse.from_feedback(instant).model_dump()
+        await self.outbox.put({
+            "type": "feedback",
+            "attempt_id": attempt_id,
+            "stage": "instant",
+            "final": final,
+            "feedback": instant_response,
+        })
+
+        # 2. Resultado enriquecido por el LLM
+        if not final:
+            try:
+                with priority_scope(user=context.user_id):
+                    enriched = await self.use_case.execute(context)
+            except Exception as e:
+                print(f"❌ Error en /feedback/ws: {e}")
+                enriched = None
+            if enriched is not None:
+                delivered = enriched
+            enriched_response = (
+                FeedbackResponse.from_feedback(enriched).model_dump()
+                if enriched is not None else None
+            )
+            unchanged = enriched_response is None or enriched_response == instant_response
+            await self.outbox.put({
+                "type": "feedback",
+                "attempt_id": attempt_id,
+                "stage": "enriched",
+                "final": True,
+                "feedback": None if unchanged else enriched_response,
+                "unchanged": unchanged,
+            })
+
+        attempt_log = get_attempt_log()
+        if attempt_log is not None:
+            attempt_log.append(context, (time.perf_counter() - started) * 1000)
+
+        # Se publica el feedback final de la sesión (el enriquecido si lo hubo)
+        delivery = get_outbound_delivery()
+        if delivery is not None:
+            delivery.publish(feedback_record(context, delivered, "/feedback/ws"))
+
+    async def _send_loop(self) -> None:
+        while True:
+            message = await self.outbox.get()
+            await self.websocket.send_json(message)
+            self.outbox.task_done()
+
+
+def _decode(text: str) -> Optional[dict]:
+    try:
+        message = json.loads(text)
+    except ValueError:
+        return None
+    return message if isinstance(message, dict) else None
+
+
+def _error(attempt_id: Optional[str], detail: str) -> dict:
+    return {"type": "error", "attempt_id": attempt_id, "detail": detail}
+
+
+@router.websocket("/ws")
+async def feedback_session(websocket: WebSocket):
+    """
+    Sesión de práctica por WebSocket.
+
+    Recibe intentos con el mismo formato que /feedback/generate y
+    envía el feedback instantáneo seguido del enriquecido por el LLM.
+    Ver el docstring del módulo para el protocolo.
+    """
+    await websocket.accept()
+    await FeedbackSession(websocket).run()
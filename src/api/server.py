@@ -0,0 +1,95 @@
+"""
+Graceful Server - uvicorn con drenado antes de cerrar
+
+uvicorn, ante SIGTERM, cierra el socket y corta las sesiones WebSocket
+de inmediato. GracefulServer intercala las fases de drenado de
+DrainState antes de ceder el cierre a uvicorn:
+
+    SIGTERM -> readiness false -> (readiness_delay) -> rechazar trabajo
+            -> esperar en vuelo (hasta drain_timeout) -> shutdown de uvicorn
+
+Una segunda señal cierra sin esperar.
+"""
+
+import asyncio
+import signal
+import time
+from typing import Callable, Optional
+
+import uvicorn
+
+from src.api.lifecycle import DrainState
+
+
+class GracefulServer(uvicorn.Server):
+    """uvicorn.Server que drena antes de cerrar"""
+
+    def __init__(
+        self,
+        config: uvicorn.Config,
+        get_state: Callable[[], DrainState],
+        drain_timeout: float = 25.0,
+        readiness_delay: float = 2.0
+    ):
+        """
+        Args:
+            config: Configuración de uvicorn
+            get_state: Retorna el DrainState del proceso
+            drain_timeout: Espera máxima por el trabajo en vuelo (segundos)
+            readiness_delay: Tiempo con readiness en false atendiendo normalmente,
+                para que el balanceador deje de enrutar
+        """
+        super().__init__(config)
+        self.get_state = get_state
+        self.drain_timeout = drain_timeout
+        self.readiness_delay = readiness_delay
+        self._drain_task: Optional[asyncio.Task] = None
+
+    def handle_exit(self, sig, frame) -> None:
+        if self._drain_task is None and not self.should_exit:
+            self._drain_task = asyncio.get_event_loop().create_task(self._drain(sig, frame))
+            return
+        # Segunda señal: cerrar ya
+        super().handle_exit(sig, frame)
+
+    async def _drain(self, sig, frame) -> None:
+        state = self.get_state()
+        started = time.monotonic()
+        state.begin(signal.Signals(sig).name if sig else "shutdown")
+        print(f"🛑 {state.reason}: drenando (readiness=false)")
+
+        try:
+            if self.readiness_delay > 0:
+                await asyncio.sleep(self.readiness_delay)
+            state.stop_accepting()
+            print(f"   Esperando {state.in_flight_requests} requests y "
+                  f"{state.open_sessions} sesiones en vuelo")
+            remaining = max(0.0, self.drain_timeout - (time.monotonic() - started))
+            if not await state.wait_idle(remaining):
+                print(f"⚠️ Drenado incompleto: {state.dropped_requests} requests y "
+                      f"{state.dropped_sessions} sesiones descartados")
+        finally:
+            # Lo que siga en vuelo tiene un segundo más antes de cancelarse
+            self.config.timeout_graceful_shutdown = 1
+            super().handle_exit(sig, frame)
+
+
+def run(app: str, get_state: Callable[[], DrainState], drain_timeout: float,
+        readiness_delay: float, **config) -> None:
+    """
+    Corre la app con GracefulServer.
+
+    Args:
+        app: Import string de la app (ej: "main:app")
+        get_state: Retorna el DrainState del proceso
+        drain_timeout: Espera máxima por el trabajo en vuelo
+        readiness_delay: Segundos con readiness en false antes de rechazar trabajo
+        **config: Argumentos de uvicorn.Config
+    """
+    server = GracefulServer(
+        uvicorn.Config(app, **config),
+        get_state=get_state,
+        drain_timeout=drain_timeout,
+        readiness_delay=readiness_delay
+    )
+    server.run()
@@ -0,0 +1,3 @@
+from .feedback_prefetcher import FeedbackPrefetcher, bucket_context
+
+__all__ = ["FeedbackPrefetcher", "bucket_context"]
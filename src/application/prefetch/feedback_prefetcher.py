@@ -0,0 +1,244 @@
+"""
+Feedback Prefetcher - Generación especulativa al empezar un intento
+
+La app conoce el ejercicio varios segundos antes de que el ML service
+produzca los scores. Con POST /feedback/prefetch el prefetcher genera,
+en ese tiempo muerto, el feedback de los buckets de resultado más
+probables (pasa / no pasa × aspecto más débil) y lo deja en la
+PrefetchCache; el /feedback/generate real que cae en uno de esos
+buckets se responde sin esperar al LLM.
+
+Los buckets se eligen por los resultados reales observados en el
+ejercicio (y en todos los ejercicios como desempate). Cada bucket se
+genera con scores representativos: el mejor score previo del usuario
+si cae del mismo lado del umbral, si no un valor típico.
+
+Presupuesto estricto, como el shadow (si no hay lugar, el bucket se
+descarta; no se encola):
+- max_buckets: buckets por prefetch
+- max_concurrency: llamadas al LLM en vuelo
+- max_per_minute: llamadas al LLM por minuto (cuota)
+Las llamadas compiten como "batch" en el scheduler de prioridades.
+
+La cache es por proceso: con varios workers, el prefetch y el
+/feedback/generate del mismo intento deben llegar al mismo worker para
+acertar.
+"""
+
+import asyncio
+import contextvars
+import time
+from collections import deque
+from dataclasses import replace
+from typing import Awaitable, Callable, Deque, List, Optional, Set, Tuple
+
+from src.domain.models import AnalysisContext, Feedback
+from src.domain.rules import ASPECTS
+from src.infrastructure.cache import PrefetchCache, prefetch_key
+from src.infrastructure.llm import priority_scope, PRIORITY_BATCH
+
+
+PASS_THRESHOLD = 70.0
+
+# Score general representativo de cada lado del umbral
+TYPICAL_PASS_SCORE = 80.0
+TYPICAL_FAIL_SCORE = 55.0
+
+# Distancia del aspecto más débil al score general
+WEAKEST_GAP = 8.0
+
+
+def bucket_label(passed: bool, weakest: str) -> str:
+    """Nombre legible de un bucket (ej: "pass/rhythm")"""
+    return f"{'pass' if passed else 'fail'}/{weakest}"
+
+
+def bucket_context(
+    template: AnalysisContext,
+    passed: bool,
+    weakest: str,
+    unlocks_next: bool = False
+) -> AnalysisContext:
+    """
+    Contexto con scores representativos de un bucket.
+
+    Args:
+        template: Contexto del ejercicio y usuario (los scores se ignoran)
+        passed: Si el bucket es de intento aprobado
+        weakest: Aspecto más débil del bucket
+        unlocks_next: Si aprobar desbloquea el siguiente nivel
+
+    Returns:
+        AnalysisContext: Contexto cuyo prefetch_key es el del bucket
+    """
+    overall = TYPICAL_PASS_SCORE if passed else TYPICAL_FAIL_SCORE
+    best = template.previous_best_score
+    if best is not None and (best >= PASS_THRESHOLD) == passed:
+        overall = best
+
+    # El más débil queda WEAKEST_GAP por debajo y el resto compensa
+    others = min(100.0, overall + WEAKEST_GAP / 2)
+    scores = {aspect: others for aspect in ASPECTS}
+    scores[weakest] = max(0.0, overall - WEAKEST_GAP)
+
+    return replace(
+        template,
+        pronunciation_score=scores["pronunciation"],
+        fluency_score=scores["fluency"],
+        rhythm_score=scores["rhythm"],
+        overall_score=overall,
+        passed=passed,
+        stars_earned=(1 + (overall >= 80) + (overall >= 90)) if passed else 0,
+        unlocked_next=passed and unlocks_next
+    )
+
+
+class FeedbackPrefetcher:
+    """
+    Lanza la generación especulativa de los buckets más probables.
+
+    submit() no espera a la generación: las tareas quedan en la cache.
+    """
+
+    def __init__(
+        self,
+        generate: Callable[[AnalysisContext], Awaitable[Feedback]],
+        cache: PrefetchCache,
+        max_buckets: int = 2,
+        max_concurrency: int = 4,
+        max_per_minute: int = 30
+    ):
+        """
+        Args:
+            generate: Generación LLM sin cache ni fallback
+                (ej: GenerateFeedbackUseCase.generate_llm_feedback)
+            cache: Cache donde quedan los resultados
+            max_buckets: Buckets generados por prefetch
+            max_concurrency: Máximo de llamadas al LLM en vuelo
+            max_per_minute: Máximo de llamadas al LLM por minuto
+        """
+        self.generate = generate
+        self.cache = cache
+        self.max_buckets = max_buckets
+        self.max_concurrency = max_concurrency
+        self.max_per_minute = max_per_minute
+
+        self.requests = 0
+        self.scheduled = 0
+        self.skipped_cached = 0
+        self.dropped_concurrency = 0
+        self.dropped_quota = 0
+        self.generated = 0
+        self.errors = 0
+
+        self._in_flight = 0
+        self._calls: Deque[float] = deque()
+        self._tasks: Set[asyncio.Task] = set()
+
+    def likely_buckets(self, template: AnalysisContext) -> List[Tuple[bool, str]]:
+        """
+        Buckets (passed, aspecto más débil) ordenados por probabilidad.
+
+        Orden: resultados del ejercicio, resultados de todos los
+        ejercicios, y el lado del umbral del mejor score previo.
+        """
+        exercise_counts, global_counts = self.cache.outcome_counts(template.exercise_id)
+        best = template.previous_best_score
+        likely_pass = best is not None and best >= PASS_THRESHOLD
+
+        candidates = [(passed, weakest) for passed in (True, False) for weakest in ASPECTS]
+        return sorted(
+            candidates,
+            key=lambda outcome: (
+                exercise_counts[outcome],
+                global_counts[outcome],
+                outcome[0] == likely_pass,
+                -ASPECTS.index(outcome[1]),
+            ),
+            reverse=True
+        )
+
+    def submit(self, template: AnalysisContext, unlocks_next: bool = False) -> List[str]:
+        """
+        Lanza el prefetch de los buckets más probables que entren en el presupuesto.
+
+        Args:
+            template: Contexto del ejercicio y usuario (scores sin usar)
+            unlocks_next: Si aprobar desbloquea el siguiente nivel
+
+        Returns:
+            List[str]: Buckets lanzados (ej: ["fail/rhythm", "pass/fluency"])
+        """
+        self.requests += 1
+        launched: List[str] = []
+
+        for passed, weakest in self.likely_buckets(template)[:self.max_buckets]:
+            context = bucket_context(template, passed, weakest, unlocks_next)
+            key = prefetch_key(context)
+            if self.cache.has(key):
+                self.skipped_cached += 1
+                continue
+
+            if self._in_flight >= self.max_concurrency:
+                self.dropped_concurrency += 1
+                break
+
+            now = time.monotonic()
+            while self._calls and now - self._calls[0] >= 60:
+                self._calls.popleft()
+            if len(self._calls) >= self.max_per_minute:
+                self.dropped_quota += 1
+                break
+            self._calls.append(now)
+
+            self._in_flight += 1
+            self.scheduled += 1
+            # Contexto vacío: el prefetch no hereda el trace del request
+            task = asyncio.get_running_loop().create_task(
+                self._run(context),
+                context=contextvars.Context()
+            )
+            self._tasks.add(task)
+            task.add_done_callback(self._done)
+            self.cache.put(key, task)
+            launched.append(bucket_label(passed, weakest))
+
+        return launched
+
+    async def close(self) -> None:
+        """Cancela los prefetch en vuelo"""
+        self.cache.close()
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def stats(self) -> dict:
+        """Métricas del prefetch y de su cache"""
+        return {
+            "requests": self.requests,
+            "scheduled": self.scheduled,
+            "in_flight": self._in_flight,
+            "skipped_cached": self.skipped_cached,
+            "dropped_concurrency": self.dropped_concurrency,
+            "dropped_quota": self.dropped_quota,
+            "generated": self.generated,
+            "errors": self.errors,
+            "max_buckets": self.max_buckets,
+            "cache": self.cache.stats(),
+        }
+
+    async def _run(self, context: AnalysisContext) -> Feedback:
+        with priority_scope(PRIORITY_BATCH, context.user_id):
+            return await self.generate(context)
+
+    def _done(self, task: asyncio.Task) -> None:
+        self._tasks.discard(task)
+        self._in_flight -= 1
+        if task.cancelled():
+            return
+        error: Optional[BaseException] = task.exception()
+        if error is not None:
+            self.errors += 1
+            print(f"⚠️ Prefetch falló: {type(error).__name__}: {error}")
+        else:
+            self.generated += 1
@@ -0,0 +1,3 @@
+from .shadow_runner import ShadowRunner, ShadowArm
+
+__all__ = ["ShadowRunner", "ShadowArm"]
@@ -0,0 +1,277 @@
+"""
+Shadow Runner - Tráfico espejo hacia un modelo o prompt candidato
+
+Una muestra de los contextos de /feedback/generate se envía, después
+de responder al usuario, a uno o más "arms":
+
+- baseline: el modelo y prompt actuales
+- candidate: otro modelo (SHADOW_CANDIDATE_MODEL) y/o otro system
+  prompt (SHADOW_CANDIDATE_PROMPT_PATH)
+
+Ambos arms reciben el mismo contexto, así la comparación es pareada y
+no depende de los aciertos de cache del camino principal. Por arm se
+registra latencia, tokens de salida, validez del JSON y respuestas
+truncadas por max_output_tokens.
+
+El resultado del shadow nunca llega al usuario. Límites estrictos:
+- max_concurrency: llamadas al LLM en vuelo (si no hay lugar, la
+  muestra se descarta; no se encola)
+- max_per_minute: llamadas al LLM por minuto (cuota)
+"""
+
+import asyncio
+import contextvars
+import random
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Callable, Deque, List, Optional, Set
+
+from src.domain.models import AnalysisContext
+from src.infrastructure.llm import build_user_prompt, priority_scope, PRIORITY_BATCH
+from src.infrastructure.llm.gemini_client import FINISH_REASON_MAX_TOKENS
+from src.infrastructure.llm.hedging import LatencyTracker
+
+
+PERCENTILES = (50, 90, 99)
+
+
+@dataclass
+class ShadowArm:
+    """
+    Configuración de un arm del shadow.
+
+    Attributes:
+        name: "baseline" | "candidate"
+        llm_client: Cliente LLM con generate_completion (ej: GeminiClient)
+        system_prompt: System prompt a usar
+        response_schema: Schema de salida estructurada (None = prosa)
+    """
+
+    name: str
+    llm_client: object
+    system_prompt: str
+    response_schema: Optional[dict] = None
+
+    @property
+    def model_name(self) -> str:
+        return getattr(self.llm_client, "model_name", "unknown")
+
+
+class ArmStats:
+    """Resultados acumulados de un arm"""
+
+    def __init__(self, window: int = 2000):
+        self.runs = 0
+        self.errors = 0
+        self.json_valid = 0
+        self.json_invalid = 0
+        self.truncated = 0
+        self.latencies = LatencyTracker(window=window)
+        self.output_tokens = LatencyTracker(window=window)
+        self.error_types: dict = {}
+
+    def to_dict(self) -> dict:
+        answered = self.json_valid + self.json_invalid
+        tokens_mean = self.output_tokens.mean()
+        return {
+            "runs": self.runs,
+            "errors": self.errors,
+            "error_types": dict(self.error_types),
+            "json_valid": self.json_valid,
+            "json_invalid": self.json_invalid,
+            "json_valid_rate": round(self.json_valid / answered, 4) if answered else None,
+            "truncated": self.truncated,
+            "latency_seconds": {
+                f"p{q}": _round(self.latencies.percentile(q)) for q in PERCENTILES
+            },
+            "output_tokens": {
+                "mean": round(tokens_mean, 1) if tokens_mean is not None else None,
+                "p50": self.output_tokens.percentile(50),
+                "p99": self.output_tokens.percentile(99),
+            },
+        }
+
+
+class ShadowRunner:
+    """
+    Ejecuta el tráfico espejo y acumula el reporte de comparación.
+
+    submit() no espera al shadow: se agrega como background task del
+    endpoint, que corre después de enviar la respuesta.
+    """
+
+    def __init__(
+        self,
+        arms: List[ShadowArm],
+        parse_response: Callable[[str, bool], dict],
+        sample_rate: float = 0.05,
+        max_concurrency: int = 2,
+        max_per_minute: int = 10
+    ):
+        """
+        Args:
+            arms: Arms a ejecutar por cada muestra
+            parse_response: Parser del use case (response, structured) -> dict;
+                si levanta una excepción la respuesta cuenta como JSON inválido
+            sample_rate: Fracción de requests a espejar (0-1)
+            max_concurrency: Máximo de llamadas al LLM en vuelo
+            max_per_minute: Máximo de llamadas al LLM por minuto
+        """
+        self.arms = arms
+        self.parse_response = parse_response
+        self.sample_rate = sample_rate
+        self.max_concurrency = max_concurrency
+        self.max_per_minute = max_per_minute
+
+        self.stats = {arm.name: ArmStats() for arm in arms}
+        self.submitted = 0
+        self.dropped_concurrency = 0
+        self.dropped_quota = 0
+
+        self._in_flight = 0
+        self._calls: Deque[float] = deque()
+        self._tasks: Set[asyncio.Task] = set()
+
+    async def submit(self, context: AnalysisContext) -> bool:
+        """
+        Espeja el contexto con probabilidad `sample_rate` si hay lugar.
+
+        Es async para correr en el event loop como background task (las
+        funciones sync se ejecutan en un thread); no espera al shadow.
+
+        Args:
+            context: Contexto del request ya respondido
+
+        Returns:
+            bool: True si se lanzó el shadow
+        """
+        if not self.arms or random.random() >= self.sample_rate:
+            return False
+
+        calls = len(self.arms)
+        if self._in_flight + calls > self.max_concurrency:
+            self.dropped_concurrency += 1
+            return False
+
+        now = time.monotonic()
+        while self._calls and now - self._calls[0] >= 60:
+            self._calls.popleft()
+        if len(self._calls) + calls > self.max_per_minute:
+            self.dropped_quota += 1
+            return False
+        self._calls.extend([now] * calls)
+
+        self._in_flight += calls
+        self.submitted += 1
+        # Contexto vacío: el shadow no hereda el trace del request
+        task = asyncio.get_running_loop().create_task(
+            self._run(context),
+            context=contextvars.Context()
+        )
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return True
+
+    async def close(self) -> None:
+        """Cancela los shadows en vuelo"""
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        for arm in self.arms:
+            executor = getattr(arm.llm_client, "executor", None)
+            if executor is not None:
+                executor.shutdown(wait=False)
+
+    def report(self) -> dict:
+        """
+        Reporte de comparación por arm y diferencias candidate - baseline.
+
+        Returns:
+            dict: Métricas del shadow
+        """
+        arms = {}
+        for arm in self.arms:
+            arms[arm.name] = {"model": arm.model_name, **self.stats[arm.name].to_dict()}
+
+        report = {
+            "sample_rate": self.sample_rate,
+            "submitted": self.submitted,
+            "in_flight": self._in_flight,
+            "dropped_concurrency": self.dropped_concurrency,
+            "dropped_quota": self.dropped_quota,
+            "arms": arms,
+        }
+
+        baseline, candidate = arms.get("baseline"), arms.get("candidate")
+        if baseline and candidate:
+            report["candidate_vs_baseline"] = {
+                **{
+                    f"latency_p{q}_seconds": _delta(
+                        candidate["latency_seconds"][f"p{q}"],
+                        baseline["latency_seconds"][f"p{q}"]
+                    )
+                    for q in PERCENTILES
+                },
+                "output_tokens_mean": _delta(
+                    candidate["output_tokens"]["mean"],
+                    baseline["output_tokens"]["mean"]
+                ),
+                "json_valid_rate": _delta(candidate["json_valid_rate"], baseline["json_valid_rate"]),
+            }
+        return report
+
+    async def _run(self, context: AnalysisContext) -> None:
+        user_prompt = build_user_prompt(context)
+        try:
+            # Con scheduler, el shadow compite como "batch"
+            with priority_scope(PRIORITY_BATCH, context.user_id):
+                await asyncio.gather(*(self._run_arm(arm, user_prompt) for arm in self.arms))
+        finally:
+            self._in_flight -= len(self.arms)
+
+    async def _run_arm(self, arm: ShadowArm, user_prompt: str) -> None:
+        stats = self.stats[arm.name]
+        stats.runs += 1
+        usage: dict = {}
+        structured = arm.response_schema is not None
+
+        started = time.monotonic()
+        try:
+            kwargs = {"response_schema": arm.response_schema} if structured else {}
+            response = await arm.llm_client.generate_completion(
+                system_prompt=arm.system_prompt,
+                user_prompt=user_prompt,
+                temperature=0.7,
+                usage=usage,
+                **kwargs
+            )
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            stats.errors += 1
+            name = type(e).__name__
+            stats.error_types[name] = stats.error_types.get(name, 0) + 1
+            return
+        stats.latencies.record(time.monotonic() - started)
+
+        if usage.get("output_tokens") is not None:
+            stats.output_tokens.record(usage["output_tokens"])
+        if usage.get("finish_reason") == FINISH_REASON_MAX_TOKENS:
+            stats.truncated += 1
+
+        try:
+            self.parse_response(response, structured)
+            stats.json_valid += 1
+        except Exception:
+            stats.json_invalid += 1
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return round(value, 4) if value is not None else None
+
+
+def _delta(candidate: Optional[float], baseline: Optional[float]) -> Optional[float]:
+    if candidate is None or baseline is None:
+        return None
+    return round(candidate - baseline, 4)
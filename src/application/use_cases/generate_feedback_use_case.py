@@ -3,9 +3,37 @@ Generate Feedback Use Case
 """
 
 import json
-from typing import Optional
+from dataclasses import replace
+from datetime import datetime
+from typing import Optional, Tuple
 from src.domain.models import Feedback, AnalysisContext
-from src.infrastructure.llm import SYSTEM_PROMPT, build_user_prompt
+from src.domain.rules import build_fallback_feedback
+from src.infrastructure.llm import (
+    SYSTEM_PROMPT,
+    STRUCTURED_SYSTEM_PROMPT,
+    build_user_prompt,
+    repair_json,
+    JsonRepairError,
+    JsonRepairStats,
+    LLMOverloadedError,
+    OutputGuardrail
+)
+from src.infrastructure.cache import (
+    SimilarityFeedbackCache,
+    TieredFeedbackCache,
+    PrefetchCache,
+    CachedFailureError,
+    feedback_cache_key
+)
+from src.infrastructure.tracing import span
+
+
+# Campos que solo el LLM puede escribir; sin ellos la respuesta no sirve
+LLM_REQUIRED_FIELDS = ("main_message", "strengths", "specific_tip")
+
+# Campos que, si faltan tras reparar, se completan con el feedback algorítmico
+# (encouragement es el último campo del formato: el primero en perderse al truncar)
+FALLBACK_FILLABLE_FIELDS = ("areas_to_improve", "celebration", "encouragement")
 
 
 class GenerateFeedbackUseCase:
@@ -16,14 +44,42 @@ class GenerateFeedbackUseCase:
     Orquesta la generación de feedback usando un cliente LLM (Gemini, Claude, etc).
     """
     
-    def __init__(self, llm_client):
+    def __init__(
+        self,
+        llm_client,
+        use_llm: bool = False,
+        similarity_cache: Optional[SimilarityFeedbackCache] = None,
+        response_schema: Optional[dict] = None,
+        feedback_cache: Optional[TieredFeedbackCache] = None,
+        repair_json_enabled: bool = True,
+        prefetch_cache: Optional[PrefetchCache] = None,
+        output_guardrail: Optional[OutputGuardrail] = None
+    ):
         """
         Inicializa el use case.
         
         Args:
             llm_client: Cliente LLM (GeminiClient, ClaudeClient, etc)
+            use_llm: Si False, usa siempre el feedback algorítmico
+            similarity_cache: Cache de feedback por scores similares (opcional)
+            response_schema: Schema de salida estructurada; se usa si el
+                cliente LLM lo soporta (si no, se parsea la respuesta en prosa)
+            feedback_cache: Cache exacta L1/L2 compartida entre instancias (opcional)
+            repair_json_enabled: Reparar localmente respuestas JSON truncadas o
+                mal formadas en lugar de descartarlas
+            prefetch_cache: Feedback especulativo de POST /feedback/prefetch (opcional)
+            output_guardrail: Revisión local de términos técnicos y apertura
+                positiva del feedback del LLM (opcional)
         """
         self.llm_client = llm_client
+        self.use_llm = use_llm
+        self.similarity_cache = similarity_cache
+        self.response_schema = response_schema
+        self.feedback_cache = feedback_cache
+        self.repair_json_enabled = repair_json_enabled
+        self.prefetch_cache = prefetch_cache
+        self.output_guardrail = output_guardrail
+        self.json_repair_stats = JsonRepairStats()
     
     async def execute(self, context: AnalysisContext) -> Feedback:
         """
@@ -44,150 +100,418 @@ class GenerateFeedbackUseCase:
               f"Overall={context.overall_score:.1f}")
         
         # USAR FALLBACK POR DEFECTO (más confiable y rápido)
-        print(f"📝 Usando feedback algorítmico inteligente")
-        feedback = self._generate_fallback_feedback(context)
-        print(f"✨ Feedback generado exitosamente")
-        return feedback
-        
-    #     # CÓDIGO PARA USAR LLM (GEMINI/OPENAI) - Descomenta para activar:
-    #     """
-    #     try:
-    #         # 1. Construir prompts
-    #         user_prompt = build_user_prompt(context)
-            
-    #         print(f"📝 Llamando a LLM API...")
-            
-    #         # 2. Llamar al LLM
-    #         response = await self.llm_client.generate_completion(
-    #             system_prompt=SYSTEM_PROMPT,
-    #             user_prompt=user_prompt,
-    #             temperature=0.7
-    #         )
-            
-    #         print(f"✅ Respuesta recibida del LLM")
+        if not self.use_llm:
+            print(f"📝 Usando feedback algorítmico inteligente")
+            feedback = self._generate_fallback_feedback(context)
+            print(f"✨ Feedback generado exitosamente")
+            return feedback
+        
+        # Reutilizar feedback de un intento con scores similares
+        cached = self._lookup_similar(context)
+        if cached is not None:
+            print(f"♻️ Reutilizando feedback de scores similares")
+            return cached
+        
+        # Feedback generado durante la grabación para este resultado
+        prefetched = await self._take_prefetched(context)
+        if prefetched is not None:
+            print(f"🔮 Usando feedback precalculado (prefetch)")
+            return prefetched
+        
+        try:
+            if self.feedback_cache is not None:
+                with span("cache.feedback"):
+                    feedback = await self.feedback_cache.get_or_compute(
+                        feedback_cache_key(context),
+                        lambda: self.generate_llm_feedback(context)
+                    )
+                feedback = replace(feedback, tone=self._determine_tone(context.overall_score))
+            else:
+                feedback = await self.generate_llm_feedback(context)
             
-    #         # 3. Parsear respuesta JSON
-    #         feedback_data = self._parse_llm_response(response)
+            if self.similarity_cache is not None:
+                self.similarity_cache.store(context, feedback)
             
-    #         # 4. Determinar tono basado en score
-    #         tone = self._determine_tone(context.overall_score)
+            print(f"✨ Feedback generado exitosamente")
+            return feedback
             
-    #         # 5. Crear modelo Feedback
-    #         feedback = Feedback(
-    #             main_message=feedback_data["main_message"],
-    #             strengths=feedback_data["strengths"],
-    #             areas_to_improve=feedback_data["areas_to_improve"],
-    #             specific_tip=feedback_data["specific_tip"],
-    #             celebration=feedback_data.get("celebration"),
-    #             encouragement=feedback_data["encouragement"],
-    #             tone=tone,
-    #             model_used=getattr(self.llm_client, 'model_name', 'gemini-1.5-flash')
-    #         )
+        except CachedFailureError:
+            print(f"⚠️ Fallo reciente del LLM en cache, usando feedback de fallback")
+            return self._generate_fallback_feedback(context)
             
-    #         print(f"✨ Feedback generado exitosamente")
-    #         return feedback
+        except LLMOverloadedError as e:
+            # Load shedding: respuesta inmediata en vez de encolar
+            print(f"🚦 {e}, usando feedback de fallback")
+            with span("fallback", shed=True):
+                return self._generate_fallback_feedback(context)
             
-    #     except Exception as e:
-    #         print(f"❌ Error generando feedback: {e}")
-    #         print(f"⚠️ Usando feedback de fallback")
+        except Exception as e:
+            print(f"❌ Error generando feedback: {e}")
+            print(f"⚠️ Usando feedback de fallback")
             
-    #         # Fallback a feedback genérico
-    #         return self._generate_fallback_feedback(context)
+            # Fallback a feedback genérico
+            with span("fallback"):
+                return self._generate_fallback_feedback(context)
+    
+    def generate_instant_feedback(self, context: AnalysisContext) -> Tuple[Feedback, bool]:
+        """
+        Feedback inmediato, sin llamar al LLM.
+        
+        Usa la cache de similitud si hay un acierto; si no, el feedback
+        algorítmico.
+        
+        Args:
+            context: Contexto del análisis
+        
+        Returns:
+            Tuple[Feedback, bool]: (feedback, final) - final es False si
+                execute() puede mejorarlo con el LLM
+        """
+        if not self.use_llm:
+            return self._generate_fallback_feedback(context), True
+        
+        cached = self._lookup_similar(context)
+        if cached is not None:
+            return cached, True
+        
+        return self._generate_fallback_feedback(context), False
+    
+    async def _take_prefetched(self, context: AnalysisContext) -> Optional[Feedback]:
+        """Feedback del prefetch con tono y fecha actualizados"""
+        if self.prefetch_cache is None:
+            return None
+        
+        with span("cache.prefetch"):
+            prefetched = await self.prefetch_cache.take(context)
+        if prefetched is None:
+            return None
+        
+        return replace(
+            prefetched,
+            tone=self._determine_tone(context.overall_score),
+            generated_at=datetime.utcnow().isoformat()
+        )
+    
+    def _lookup_similar(self, context: AnalysisContext) -> Optional[Feedback]:
+        """Feedback de la cache de similitud con tono y fecha actualizados"""
+        if self.similarity_cache is None:
+            return None
+        
+        with span("cache.similarity"):
+            cached = self.similarity_cache.lookup(context)
+        if cached is None:
+            return None
+        
+        return replace(
+            cached,
+            tone=self._determine_tone(context.overall_score),
+            generated_at=datetime.utcnow().isoformat()
+        )
+    
+    async def generate_llm_feedback(self, context: AnalysisContext) -> Feedback:
+        """
+        Genera feedback llamando al LLM, sin cache ni fallback.
+        
+        Args:
+            context: Contexto del análisis
+        
+        Returns:
+            Feedback: Feedback generado por el LLM
+        
+        Raises:
+            Exception: Si falla la llamada o la respuesta no es válida
+        """
+        # 1. Construir prompts
+        user_prompt = build_user_prompt(context)
+        structured = self._use_structured_output()
+        
+        print(f"📝 Llamando a LLM API...")
+        
+        # 2. Llamar al LLM
+        with span("llm.generate", structured=structured):
+            if structured:
+                response = await self.llm_client.generate_completion(
+                    system_prompt=STRUCTURED_SYSTEM_PROMPT,
+                    user_prompt=user_prompt,
+                    temperature=0.7,
+                    response_schema=self.response_schema
+                )
+            else:
+                response = await self.llm_client.generate_completion(
+                    system_prompt=SYSTEM_PROMPT,
+                    user_prompt=user_prompt,
+                    temperature=0.7
+                )
+        
+        print(f"✅ Respuesta recibida del LLM")
+        
+        # 3. Parsear respuesta JSON
+        with span("llm.parse", structured=structured):
+            feedback_data = self.parse_llm_output(response, structured, context)
+        
+        # 4. Política del system prompt, sin otra llamada al LLM
+        if self.output_guardrail is not None:
+            with span("llm.guardrail"):
+                feedback_data = self._apply_guardrail(feedback_data, context)
+        
+        # 5. Determinar tono basado en score
+        tone = self._determine_tone(context.overall_score)
+        
+        # 6. Crear modelo Feedback
+        return Feedback(
+            main_message=feedback_data["main_message"],
+            strengths=feedback_data["strengths"],
+            areas_to_improve=feedback_data["areas_to_improve"],
+            specific_tip=feedback_data["specific_tip"],
+            celebration=feedback_data.get("celebration"),
+            encouragement=feedback_data["encouragement"],
+            tone=tone,
+            model_used=getattr(self.llm_client, 'model_name', 'gemini-1.5-flash')
+        )
+    
+    def parse_llm_output(
+        self,
+        response: str,
+        structured: bool,
+        context: Optional[AnalysisContext] = None,
+        repair: bool = True
+    ) -> dict:
+        """
+        Parsea la respuesta del LLM a los datos del feedback.
+        
+        Si el parseo estricto falla y la reparación está habilitada, se
+        repara el JSON localmente (ver json_repair) y los campos
+        opcionales faltantes se completan con el feedback algorítmico.
+        
+        Args:
+            response: Respuesta raw del LLM
+            structured: Si la respuesta se pidió con response_schema
+            context: Contexto del análisis (para completar campos faltantes)
+            repair: False para solo el parseo estricto
+        
+        Returns:
+            dict: Datos del feedback
+        
+        Raises:
+            ValueError: Si la respuesta no es JSON válido o faltan campos
+        """
+        try:
+            if structured:
+                return self._decode_structured_response(response)
+            return self._parse_llm_response(response)
+        except ValueError:
+            if not (repair and self.repair_json_enabled):
+                raise
+            return self._repair_llm_output(response, context)
+    
+    def _repair_llm_output(self, response: str, context: Optional[AnalysisContext]) -> dict:
+        """
+        Repara una respuesta que no pasó el parseo estricto.
+        
+        Args:
+            response: Respuesta raw del LLM
+            context: Contexto del análisis (None = no se completan campos)
+        
+        Returns:
+            dict: Datos del feedback reparados
+        
+        Raises:
+            ValueError: Si la respuesta no es recuperable
+        """
+        try:
+            data, repairs = repair_json(response)
+        except JsonRepairError:
+            self.json_repair_stats.record(None)
+            raise
+        
+        # Un string suelto donde se espera una lista
+        for key in ("strengths", "areas_to_improve"):
+            if isinstance(data.get(key), str):
+                data[key] = [data[key]]
+                repairs.append("list_fields")
+        
+        missing = [key for key in LLM_REQUIRED_FIELDS if not data.get(key)]
+        if missing:
+            self.json_repair_stats.record(None)
+            raise ValueError(f"Respuesta reparada sin campos requeridos: {missing}")
+        
+        filled = [key for key in FALLBACK_FILLABLE_FIELDS if key not in data]
+        if filled:
+            if context is None:
+                self.json_repair_stats.record(None)
+                raise ValueError(f"Faltan campos: {filled}")
+            fallback = self._generate_fallback_feedback(context)
+            for key in filled:
+                data[key] = getattr(fallback, key)
+        
+        self.json_repair_stats.record(repairs, filled)
+        print(f"🩹 JSON del LLM reparado: {', '.join(repairs + filled) or 'sin cambios'}")
+        return data
+    
+    def _apply_guardrail(self, data: dict, context: AnalysisContext) -> dict:
+        """
+        Reescribe términos técnicos y reemplaza los campos que violan la
+        política con los del feedback algorítmico.
+        
+        Args:
+            data: Datos del feedback parseados
+            context: Contexto del análisis (para el feedback algorítmico)
+        
+        Returns:
+            dict: Datos del feedback corregidos
+        """
+        data, actions = self.output_guardrail.apply(
+            data,
+            lambda: self._generate_fallback_feedback(context)
+        )
+        if actions:
+            print(f"🛡️ Guardrail: {', '.join(actions)}")
+        return data
+    
+    def _use_structured_output(self) -> bool:
+        """True si hay schema y el cliente LLM soporta response_schema"""
+        return (
+            self.response_schema is not None
+            and getattr(self.llm_client, "supports_response_schema", False)
+        )
+    
+    def _decode_structured_response(self, response: str) -> dict:
+        """
+        Decodifica una respuesta generada con response_schema.
+        
+        La respuesta ya es JSON puro; si aun así no decodifica, se
+        intenta el parseo en prosa.
+        
+        Args:
+            response: Respuesta raw del LLM
+        
+        Returns:
+            dict: Datos del feedback
+        """
+        try:
+            data = json.loads(response)
+        except json.JSONDecodeError:
+            return self._parse_llm_response(response)
+        
+        return self._validate_feedback_data(data)
+    
+    def _validate_feedback_data(self, data) -> dict:
+        """
+        Verifica que el JSON decodificado sea un objeto con los campos
+        del feedback.
+        
+        Args:
+            data: Valor decodificado de la respuesta
+        
+        Returns:
+            dict: Los mismos datos
+        
+        Raises:
+            ValueError: Si no es un objeto o falta algún campo (así la
+                reparación todavía puede intentarse)
+        """
+        if not isinstance(data, dict):
+            raise ValueError(f"Respuesta JSON no es un objeto: {type(data).__name__}")
+        
+        required = ["main_message", "strengths", "areas_to_improve", "specific_tip", "encouragement"]
+        for key in required:
+            if key not in data:
+                raise ValueError(f"Falta campo: {key}")
+        
+        return data
     
-    # def _parse_llm_response(self, response: str) -> dict:
-    #     """
-    #     Parsea la respuesta del LLM (JSON de GPT-4/Gemini).
-        
-    #     Args:
-    #         response: Respuesta raw del LLM
-        
-    #     Returns:
-    #         dict: Datos del feedback parseados
-        
-    #     Raises:
-    #         ValueError: Si no se puede parsear
-    #     """
-    #     try:
-    #         # Limpiar respuesta
-    #         response_clean = response.strip()
+    def _parse_llm_response(self, response: str) -> dict:
+        """
+        Parsea la respuesta del LLM (JSON de GPT-4/Gemini).
+        
+        Args:
+            response: Respuesta raw del LLM
+        
+        Returns:
+            dict: Datos del feedback parseados
+        
+        Raises:
+            ValueError: Si no se puede parsear
+        """
+        try:
+            # Limpiar respuesta
+            response_clean = response.strip()
             
-    #         # Remover markdown code blocks
-    #         if "```json" in response_clean:
-    #             # Extraer contenido entre ```json y ```
-    #             start = response_clean.find("```json") + 7
-    #             end = response_clean.find("```", start)
-    #             response_clean = response_clean[start:end].strip()
-    #         elif "```" in response_clean:
-    #             # Remover ``` al inicio y final
-    #             response_clean = response_clean.replace("```", "").strip()
+            # Remover markdown code blocks
+            if "```json" in response_clean:
+                # Extraer contenido entre ```json y ```
+                start = response_clean.find("```json") + 7
+                end = response_clean.find("```", start)
+                response_clean = response_clean[start:end].strip()
+            elif "```" in response_clean:
+                # Remover ``` al inicio y final
+                response_clean = response_clean.replace("```", "").strip()
             
-    #         # Si empieza con {, buscar el JSON completo
-    #         if response_clean.startswith("{"):
-    #             # Encontrar el cierre del JSON
-    #             brace_count = 0
-    #             json_end = 0
-    #             for i, char in enumerate(response_clean):
-    #                 if char == '{':
-    #                     brace_count += 1
-    #                 elif char == '}':
-    #                     brace_count -= 1
-    #                     if brace_count == 0:
-    #                         json_end = i + 1
-    #                         break
+            # Si empieza con {, buscar el JSON completo
+            if response_clean.startswith("{"):
+                # Encontrar el cierre del JSON
+                brace_count = 0
+                json_end = 0
+                for i, char in enumerate(response_clean):
+                    if char == '{':
+                        brace_count += 1
+                    elif char == '}':
+                        brace_count -= 1
+                        if brace_count == 0:
+                            json_end = i + 1
+                            break
                 
-    #             if json_end > 0:
-    #                 response_clean = response_clean[:json_end]
+                if json_end > 0:
+                    response_clean = response_clean[:json_end]
             
-    #         # Parsear JSON
-    #         data = json.loads(response_clean)
+            # Parsear JSON
+            data = json.loads(response_clean)
             
-    #         # Validar campos requeridos
-    #         required = ["main_message", "strengths", "areas_to_improve", "specific_tip", "encouragement"]
-    #         for key in required:
-    #             if key not in data:
-    #                 raise ValueError(f"Falta campo: {key}")
+        except json.JSONDecodeError as e:
+            print(f"⚠️ Error parseando JSON: {e}")
+            print(f"Response limpio intentado: {response_clean[:300]}...")
             
-    #         return data
+            # Último intento: buscar manualmente el JSON
+            data = None
+            try:
+                start_idx = response.find('{')
+                if start_idx >= 0:
+                    # Contar llaves para encontrar el cierre
+                    brace_count = 0
+                    for i in range(start_idx, len(response)):
+                        if response[i] == '{':
+                            brace_count += 1
+                        elif response[i] == '}':
+                            brace_count -= 1
+                            if brace_count == 0:
+                                json_str = response[start_idx:i+1]
+                                data = json.loads(json_str)
+                                break
+            except Exception:
+                pass
             
-    #     except json.JSONDecodeError as e:
-    #         print(f"⚠️ Error parseando JSON: {e}")
-    #         print(f"Response limpio intentado: {response_clean[:300]}...")
-            
-    #         # Último intento: buscar manualmente el JSON
-    #         try:
-    #             start_idx = response.find('{')
-    #             if start_idx >= 0:
-    #                 # Contar llaves para encontrar el cierre
-    #                 brace_count = 0
-    #                 for i in range(start_idx, len(response)):
-    #                     if response[i] == '{':
-    #                         brace_count += 1
-    #                     elif response[i] == '}':
-    #                         brace_count -= 1
-    #                         if brace_count == 0:
-    #                             json_str = response[start_idx:i+1]
-    #                             return json.loads(json_str)
-    #         except:
-    #             pass
-            
-    #         raise ValueError(f"Respuesta no es JSON válido: {e}")
+            if data is None:
+                raise ValueError(f"Respuesta no es JSON válido: {e}")
+        
+        # Validar campos requeridos (en todos los caminos)
+        return self._validate_feedback_data(data)
     
-    # def _determine_tone(self, overall_score: float) -> str:
-    #     """
-    #     Determina el tono apropiado basado en el score.
-        
-    #     Args:
-    #         overall_score: Score general (0-100)
-        
-    #     Returns:
-    #         str: Tono del feedback
-    #     """
-    #     if overall_score >= 80:
-    #         return "positive"
-    #     elif overall_score >= 60:
-    #         return "encouraging"
-    #     else:
-    #         return "motivational"
+    def _determine_tone(self, overall_score: float) -> str:
+        """
+        Determina el tono apropiado basado en el score.
+        
+        Args:
+            overall_score: Score general (0-100)
+        
+        Returns:
+            str: Tono del feedback
+        """
+        if overall_score >= 80:
+            return "positive"
+        elif overall_score >= 60:
+            return "encouraging"
+        else:
+            return "motivational"
     
     def _generate_fallback_feedback(self, context: AnalysisContext) -> Feedback:
         """
@@ -199,59 +523,4 @@ class GenerateFeedbackUseCase:
         Returns:
             Feedback: Feedback genérico pero apropiado
         """
-        
-        # Determinar si pasó
-        if context.passed:
-            # Feedback positivo
-            main_message = "¡Muy bien! Completaste el ejercicio."
-            
-            strengths = ["Hiciste un buen esfuerzo"]
-            if context.overall_score >= 80:
-                strengths.append("Tu pronunciación estuvo muy clara")
-            
-            areas_to_improve = []
-            if context.overall_score < 90:
-                areas_to_improve.append("Puedes seguir mejorando con más práctica")
-            
-            specific_tip = "Sigue practicando todos los días para mejorar aún más."
-            
-            celebration = None
-            if context.unlocked_next:
-                celebration = "¡Desbloqueaste el siguiente nivel! 🎉"
-            
-            encouragement = "¡Sigue así! Vas por muy buen camino."
-            tone = "positive"
-            
-        else:
-            # Feedback motivacional
-            main_message = "¡Buen intento! Sigamos practicando."
-            
-            strengths = ["Lo importante es que lo intentaste"]
-            
-            # Identificar área más débil
-            weakest = context.get_weakest_aspect()
-            areas_to_improve = []
-            
-            if weakest == "pronunciation":
-                areas_to_improve.append("Necesitas trabajar la claridad al pronunciar")
-                specific_tip = "Intenta pronunciar cada sonido más despacio y claro."
-            elif weakest == "fluency":
-                areas_to_improve.append("Necesitas hablar más seguido, sin pausas largas")
-                specific_tip = "Practica diciendo la frase completa de un solo golpe."
-            else:  # rhythm
-                areas_to_improve.append("Necesitas trabajar el ritmo y la velocidad")
-                specific_tip = "Intenta hablar ni muy rápido ni muy lento, busca un punto medio."
-            
-            celebration = None
-            encouragement = "¡No te rindas! Cada intento te acerca más a lograrlo."
-            tone = "motivational"
-        
-        return Feedback(
-            main_message=main_message,
-            strengths=strengths,
-            areas_to_improve=areas_to_improve,
-            specific_tip=specific_tip,
-            celebration=celebration,
-            encouragement=encouragement,
-            tone=tone
-        )
\ No newline at end of file
+        return build_fallback_feedback(context)
\ No newline at end of file
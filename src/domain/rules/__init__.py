@@ -0,0 +1,29 @@
+from .feedback_rules import (
+    ASPECTS,
+    SCORE_CATEGORIES,
+    aspect_tier,
+    score_category_index,
+    describe_aspect_tiers,
+    build_fallback_feedback
+)
+from .rule_engine import (
+    ScoreBatch,
+    RuleEvaluation,
+    evaluate,
+    build_feedback_batch,
+    generate_fallback_batch
+)
+
+__all__ = [
+    "ASPECTS",
+    "SCORE_CATEGORIES",
+    "aspect_tier",
+    "score_category_index",
+    "describe_aspect_tiers",
+    "build_fallback_feedback",
+    "ScoreBatch",
+    "RuleEvaluation",
+    "evaluate",
+    "build_feedback_batch",
+    "generate_fallback_batch"
+]
@@ -0,0 +1,201 @@
+"""
+Feedback Rules - Reglas del feedback algorítmico
+
+Tablas compartidas por:
+- El feedback de fallback del use case (un contexto a la vez)
+- El análisis de scores del prompt del LLM
+- El motor vectorizado para lotes (rule_engine)
+
+Las reglas se expresan como umbrales + tablas indexadas para que el
+camino escalar y el vectorizado produzcan exactamente lo mismo.
+"""
+
+from bisect import bisect_right
+from typing import List, Optional, Tuple
+
+from src.domain.models import Feedback, AnalysisContext
+
+
+# Orden de los aspectos: define los desempates de weakest/strongest
+# (igual que AnalysisContext.get_weakest_aspect / get_strongest_aspect)
+ASPECTS: Tuple[str, ...] = ("pronunciation", "fluency", "rhythm")
+
+# ============================================================================
+# TIERS POR ASPECTO
+# ============================================================================
+
+# Tier = cantidad de umbrales alcanzados: 0 (MUY BAJA) ... 4 (EXCELENTE)
+ASPECT_TIER_THRESHOLDS: Tuple[float, ...] = (50, 65, 75, 85)
+
+ASPECT_TIER_LINES = {
+    "pronunciation": (
+        "- ❌ Pronunciación MUY BAJA - Enfócate en pronunciar cada sonido despacio",
+        "- ⚠️ Pronunciación BAJA - Requiere más práctica en sonidos específicos",
+        "- ⚠️ Pronunciación REGULAR - Necesita practicar claridad",
+        "- ✅ Pronunciación BUENA - Claro con algunos detalles a pulir",
+        "- ✅ Pronunciación EXCELENTE - Muy claro y preciso",
+    ),
+    "fluency": (
+        "- ❌ Fluidez MUY BAJA - Habla muy cortado, practica decirlo de corrido",
+        "- ⚠️ Fluidez BAJA - Muchas pausas, necesita practicar continuidad",
+        "- ⚠️ Fluidez REGULAR - Hay algunas pausas o cortes",
+        "- ✅ Fluidez BUENA - Habla bastante seguido con pocas pausas",
+        "- ✅ Fluidez EXCELENTE - Habla muy natural y continua",
+    ),
+    "rhythm": (
+        "- ❌ Ritmo MUY BAJO - Practica la velocidad y el tono",
+        "- ⚠️ Ritmo BAJO - Muy lento o muy rápido, busca el punto medio",
+        "- ⚠️ Ritmo REGULAR - Necesita trabajar la velocidad o musicalidad",
+        "- ✅ Ritmo BUENO - Natural con algunos detalles menores",
+        "- ✅ Ritmo EXCELENTE - Muy natural y con buena cadencia",
+    ),
+}
+
+# ============================================================================
+# CATEGORÍA DEL SCORE GENERAL
+# ============================================================================
+
+# Categoría = cantidad de umbrales alcanzados (índice en SCORE_CATEGORIES)
+SCORE_CATEGORY_THRESHOLDS: Tuple[float, ...] = (50, 70, 80, 90)
+SCORE_CATEGORIES: Tuple[str, ...] = ("try_again", "needs_practice", "good", "great", "excellent")
+
+# ============================================================================
+# TEMPLATES DEL FEEDBACK DE FALLBACK
+# ============================================================================
+
+# Bandas del score general cuando pasó: <80, 80-90, >=90
+PASSED_BAND_THRESHOLDS: Tuple[float, ...] = (80, 90)
+
+# (main_message, strengths, areas_to_improve, specific_tip,
+#  celebration, encouragement, tone)
+FallbackTemplate = Tuple[str, Tuple[str, ...], Tuple[str, ...], str, Optional[str], str, str]
+
+
+def _passed_template(band: int, unlocked: bool) -> FallbackTemplate:
+    strengths = ("Hiciste un buen esfuerzo",)
+    if band >= 1:
+        strengths += ("Tu pronunciación estuvo muy clara",)
+    areas = ("Puedes seguir mejorando con más práctica",) if band < 2 else ()
+    return (
+        "¡Muy bien! Completaste el ejercicio.",
+        strengths,
+        areas,
+        "Sigue practicando todos los días para mejorar aún más.",
+        "¡Desbloqueaste el siguiente nivel! 🎉" if unlocked else None,
+        "¡Sigue así! Vas por muy buen camino.",
+        "positive",
+    )
+
+
+_WEAKEST_ADVICE = {
+    "pronunciation": (
+        "Necesitas trabajar la claridad al pronunciar",
+        "Intenta pronunciar cada sonido más despacio y claro.",
+    ),
+    "fluency": (
+        "Necesitas hablar más seguido, sin pausas largas",
+        "Practica diciendo la frase completa de un solo golpe.",
+    ),
+    "rhythm": (
+        "Necesitas trabajar el ritmo y la velocidad",
+        "Intenta hablar ni muy rápido ni muy lento, busca un punto medio.",
+    ),
+}
+
+
+def _not_passed_template(weakest: str) -> FallbackTemplate:
+    area, tip = _WEAKEST_ADVICE[weakest]
+    return (
+        "¡Buen intento! Sigamos practicando.",
+        ("Lo importante es que lo intentaste",),
+        (area,),
+        tip,
+        None,
+        "¡No te rindas! Cada intento te acerca más a lograrlo.",
+        "motivational",
+    )
+
+
+# Índices: pasó -> band * 2 + unlocked (0..5), no pasó -> 6 + weakest (6..8)
+FALLBACK_TEMPLATES: Tuple[FallbackTemplate, ...] = tuple(
+    [_passed_template(band, unlocked) for band in range(3) for unlocked in (False, True)]
+    + [_not_passed_template(aspect) for aspect in ASPECTS]
+)
+NOT_PASSED_TEMPLATE_OFFSET = 6
+
+
+# ============================================================================
+# REGLAS ESCALARES
+# ============================================================================
+
+def aspect_tier(score: float) -> int:
+    """Tier de un aspecto (0 = MUY BAJA ... 4 = EXCELENTE)"""
+    return bisect_right(ASPECT_TIER_THRESHOLDS, score)
+
+
+def score_category_index(overall_score: float) -> int:
+    """Índice en SCORE_CATEGORIES del score general"""
+    return bisect_right(SCORE_CATEGORY_THRESHOLDS, overall_score)
+
+
+def describe_aspect_tiers(context: AnalysisContext) -> List[str]:
+    """
+    Una línea por aspecto describiendo su tier (para el prompt del LLM).
+
+    Args:
+        context: Contexto del análisis
+
+    Returns:
+        list: Líneas en el orden de ASPECTS
+    """
+    scores = (context.pronunciation_score, context.fluency_score, context.rhythm_score)
+    return [
+        ASPECT_TIER_LINES[aspect][aspect_tier(score)]
+        for aspect, score in zip(ASPECTS, scores)
+    ]
+
+
+def fallback_template_index(context: AnalysisContext) -> int:
+    """Índice en FALLBACK_TEMPLATES para un contexto"""
+    if context.passed:
+        band = bisect_right(PASSED_BAND_THRESHOLDS, context.overall_score)
+        return band * 2 + int(context.unlocked_next)
+    return NOT_PASSED_TEMPLATE_OFFSET + ASPECTS.index(context.get_weakest_aspect())
+
+
+def feedback_from_template(index: int, generated_at: Optional[str] = None) -> Feedback:
+    """
+    Construye el Feedback de un template.
+
+    Args:
+        index: Índice en FALLBACK_TEMPLATES
+        generated_at: Timestamp ISO (si None, el default de Feedback)
+
+    Returns:
+        Feedback: Feedback con listas propias (no compartidas con la tabla)
+    """
+    main_message, strengths, areas, tip, celebration, encouragement, tone = FALLBACK_TEMPLATES[index]
+    extra = {} if generated_at is None else {"generated_at": generated_at}
+    return Feedback(
+        main_message=main_message,
+        strengths=list(strengths),
+        areas_to_improve=list(areas),
+        specific_tip=tip,
+        celebration=celebration,
+        encouragement=encouragement,
+        tone=tone,
+        **extra
+    )
+
+
+def build_fallback_feedback(context: AnalysisContext) -> Feedback:
+    """
+    Feedback algorítmico para un contexto (sin LLM).
+
+    Args:
+        context: Contexto del análisis
+
+    Returns:
+        Feedback: Feedback genérico pero apropiado
+    """
+    return feedback_from_template(fallback_template_index(context))
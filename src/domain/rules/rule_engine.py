@@ -0,0 +1,237 @@
+"""
+Rule Engine - Reglas del feedback algorítmico sobre lotes con NumPy
+
+Para batch y backfill (ej: recalcular el feedback de 100k intentos del
+attempt log). Las reglas de feedback_rules se evalúan en una pasada
+vectorizada sobre arrays de scores:
+
+- Tier de cada aspecto (umbrales 50/65/75/85)
+- Aspecto más débil y más fuerte (mismos desempates que AnalysisContext)
+- Categoría del score general (get_score_category)
+- Índice del template de fallback
+
+Después solo queda armar los objetos Feedback a partir de los índices.
+El resultado es idéntico al de build_fallback_feedback contexto por
+contexto.
+
+NumPy se importa al usarse (igual que el lector del attempt log).
+"""
+
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, List, Optional, Sequence
+
+from src.domain.models import Feedback, AnalysisContext
+from src.domain.rules.feedback_rules import (
+    ASPECTS,
+    ASPECT_TIER_THRESHOLDS,
+    ASPECT_TIER_LINES,
+    SCORE_CATEGORY_THRESHOLDS,
+    SCORE_CATEGORIES,
+    PASSED_BAND_THRESHOLDS,
+    FALLBACK_TEMPLATES,
+    NOT_PASSED_TEMPLATE_OFFSET
+)
+
+
+@dataclass
+class ScoreBatch:
+    """
+    Scores de un lote de intentos como arrays alineados.
+
+    Attributes:
+        scores: (n, 3) scores por aspecto en el orden de ASPECTS
+        overall: (n,) score general
+        passed: (n,) bool
+        unlocked_next: (n,) bool
+    """
+
+    scores: Any
+    overall: Any
+    passed: Any
+    unlocked_next: Any
+
+    def __len__(self) -> int:
+        return len(self.overall)
+
+    @classmethod
+    def from_arrays(
+        cls,
+        pronunciation: Any,
+        fluency: Any,
+        rhythm: Any,
+        overall: Any,
+        passed: Any,
+        unlocked_next: Any
+    ) -> "ScoreBatch":
+        """
+        Construye el lote desde columnas (listas o arrays de igual largo),
+        ej: las columnas de un segmento del attempt log.
+
+        Raises:
+            ValueError: Si las columnas tienen distinto largo
+        """
+        import numpy as np
+
+        scores = np.column_stack([
+            np.asarray(pronunciation, dtype=np.float64),
+            np.asarray(fluency, dtype=np.float64),
+            np.asarray(rhythm, dtype=np.float64),
+        ])
+        overall = np.asarray(overall, dtype=np.float64)
+        passed = np.asarray(passed, dtype=bool)
+        unlocked_next = np.asarray(unlocked_next, dtype=bool)
+        if not (len(scores) == len(overall) == len(passed) == len(unlocked_next)):
+            raise ValueError("Las columnas del lote deben tener el mismo largo")
+        return cls(scores=scores, overall=overall, passed=passed, unlocked_next=unlocked_next)
+
+    @classmethod
+    def from_contexts(cls, contexts: Sequence[AnalysisContext]) -> "ScoreBatch":
+        """Construye el lote desde contextos de análisis"""
+        import numpy as np
+
+        count = len(contexts)
+        scores = np.fromiter(
+            (
+                score
+                for c in contexts
+                for score in (c.pronunciation_score, c.fluency_score, c.rhythm_score)
+            ),
+            dtype=np.float64,
+            count=count * 3
+        ).reshape(count, 3)
+        return cls(
+            scores=scores,
+            overall=np.fromiter((c.overall_score for c in contexts), dtype=np.float64, count=count),
+            passed=np.fromiter((c.passed for c in contexts), dtype=bool, count=count),
+            unlocked_next=np.fromiter((c.unlocked_next for c in contexts), dtype=bool, count=count)
+        )
+
+
+@dataclass
+class RuleEvaluation:
+    """
+    Resultado de evaluar las reglas sobre un lote (índices en las tablas).
+
+    Attributes:
+        tiers: (n, 3) tier por aspecto, 0 (MUY BAJA) ... 4 (EXCELENTE)
+        weakest: (n,) índice en ASPECTS del aspecto más débil
+        strongest: (n,) índice en ASPECTS del aspecto más fuerte
+        category: (n,) índice en SCORE_CATEGORIES
+        template: (n,) índice en FALLBACK_TEMPLATES
+    """
+
+    tiers: Any
+    weakest: Any
+    strongest: Any
+    category: Any
+    template: Any
+
+    def __len__(self) -> int:
+        return len(self.template)
+
+    def weakest_aspects(self) -> List[str]:
+        return _lookup(ASPECTS, self.weakest)
+
+    def strongest_aspects(self) -> List[str]:
+        return _lookup(ASPECTS, self.strongest)
+
+    def categories(self) -> List[str]:
+        return _lookup(SCORE_CATEGORIES, self.category)
+
+    def tier_lines(self, row: int) -> List[str]:
+        """Líneas del análisis de scores de una fila (igual que el prompt)"""
+        return [
+            ASPECT_TIER_LINES[aspect][int(tier)]
+            for aspect, tier in zip(ASPECTS, self.tiers[row])
+        ]
+
+
+def evaluate(batch: ScoreBatch) -> RuleEvaluation:
+    """
+    Evalúa todas las reglas sobre el lote en una pasada vectorizada.
+
+    Args:
+        batch: Scores del lote
+
+    Returns:
+        RuleEvaluation: Índices por fila
+    """
+    import numpy as np
+
+    # searchsorted(side="right") == cantidad de umbrales <= score (bisect_right)
+    tiers = np.searchsorted(ASPECT_TIER_THRESHOLDS, batch.scores, side="right").astype(np.int8)
+    category = np.searchsorted(SCORE_CATEGORY_THRESHOLDS, batch.overall, side="right").astype(np.int8)
+
+    # argmin/argmax devuelven la primera ocurrencia: mismo desempate que min()/max()
+    weakest = np.argmin(batch.scores, axis=1).astype(np.int8)
+    strongest = np.argmax(batch.scores, axis=1).astype(np.int8)
+
+    band = np.searchsorted(PASSED_BAND_THRESHOLDS, batch.overall, side="right")
+    template = np.where(
+        batch.passed,
+        band * 2 + batch.unlocked_next,
+        NOT_PASSED_TEMPLATE_OFFSET + weakest
+    ).astype(np.int8)
+
+    return RuleEvaluation(
+        tiers=tiers,
+        weakest=weakest,
+        strongest=strongest,
+        category=category,
+        template=template
+    )
+
+
+def build_feedback_batch(
+    evaluation: RuleEvaluation,
+    generated_at: Optional[str] = None
+) -> List[Feedback]:
+    """
+    Arma los Feedback de un lote evaluado.
+
+    Args:
+        evaluation: Resultado de evaluate()
+        generated_at: Timestamp ISO común al lote (default: ahora)
+
+    Returns:
+        list: Un Feedback por fila, con listas propias
+    """
+    if generated_at is None:
+        generated_at = datetime.utcnow().isoformat()
+
+    templates = FALLBACK_TEMPLATES
+    feedbacks = []
+    append = feedbacks.append
+    for index in evaluation.template.tolist():
+        main_message, strengths, areas, tip, celebration, encouragement, tone = templates[index]
+        append(Feedback(
+            main_message,
+            list(strengths),
+            list(areas),
+            tip,
+            celebration,
+            encouragement,
+            tone,
+            generated_at
+        ))
+    return feedbacks
+
+
+def generate_fallback_batch(contexts: Sequence[AnalysisContext]) -> List[Feedback]:
+    """
+    Feedback algorítmico para un lote de contextos.
+
+    Equivalente a build_fallback_feedback(c) para cada contexto.
+
+    Args:
+        contexts: Contextos del lote
+
+    Returns:
+        list: Un Feedback por contexto, en el mismo orden
+    """
+    return build_feedback_batch(evaluate(ScoreBatch.from_contexts(contexts)))
+
+
+def _lookup(table: Sequence[str], indices: Any) -> List[str]:
+    return [table[i] for i in indices.tolist()]
@@ -1,10 +1,11 @@
 
-from .llm import GeminiClient, SYSTEM_PROMPT, build_user_prompt
+from .llm import GeminiClient, SYSTEM_PROMPT, STRUCTURED_SYSTEM_PROMPT, build_user_prompt
 from .config import Settings, get_settings
 
 __all__ = [
     "GeminiClient",
     "SYSTEM_PROMPT",
+    "STRUCTURED_SYSTEM_PROMPT",
     "build_user_prompt",
     "Settings",
     "get_settings"
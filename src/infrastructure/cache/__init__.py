@@ -0,0 +1,23 @@
+from .similarity_cache import SimilarityFeedbackCache
+from .snapshot import write_snapshot, read_snapshot, read_snapshot_header, load_snapshot
+from .backends import CacheBackend, CacheBackendError, RedisBackend, SQLiteBackend, create_backend
+from .tiered_cache import TieredFeedbackCache, CachedFailureError, feedback_cache_key
+from .prefetch_cache import PrefetchCache, prefetch_key
+
+__all__ = [
+    "SimilarityFeedbackCache",
+    "write_snapshot",
+    "read_snapshot",
+    "read_snapshot_header",
+    "load_snapshot",
+    "CacheBackend",
+    "CacheBackendError",
+    "RedisBackend",
+    "SQLiteBackend",
+    "create_backend",
+    "TieredFeedbackCache",
+    "CachedFailureError",
+    "feedback_cache_key",
+    "PrefetchCache",
+    "prefetch_key"
+]
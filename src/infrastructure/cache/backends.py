@@ -0,0 +1,318 @@
+"""
+Cache Backends - L2 compartido entre instancias del servicio
+
+Interfaz mínima (get/set/delete de bytes con TTL) y dos implementaciones:
+
+- RedisBackend: cliente RESP2 sobre asyncio (sin dependencias externas),
+  funciona con Redis o cualquier servidor compatible con el protocolo.
+- SQLiteBackend: archivo local, útil para varias instancias en la misma
+  máquina o para desarrollo.
+"""
+
+import asyncio
+import os
+import sqlite3
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+from urllib.parse import urlparse
+
+
+class CacheBackendError(Exception):
+    """Error de comunicación con el backend L2"""
+
+
+class CacheBackend(ABC):
+    """Interfaz de un backend L2"""
+
+    name = "backend"
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[bytes]:
+        """Retorna el valor o None si no existe / expiró"""
+
+    @abstractmethod
+    async def set(self, key: str, value: bytes, ttl_seconds: float) -> None:
+        """Guarda el valor con TTL"""
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        """Elimina la clave"""
+
+    async def close(self) -> None:
+        """Libera conexiones"""
+
+
+# ============================================================================
+# REDIS (RESP2)
+# ============================================================================
+
+class _RespConnection:
+    """Conexión RESP2 individual"""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+
+    async def execute(self, *args) -> object:
+        self.writer.write(_encode_command(args))
+        await self.writer.drain()
+        return await self._read_reply()
+
+    async def _read_reply(self) -> object:
+        line = await self.reader.readline()
+        if not line:
+            raise CacheBackendError("Conexión cerrada por el servidor")
+        prefix, payload = line[:1], line[1:-2]
+
+        if prefix == b"+":
+            return payload.decode()
+        if prefix == b"-":
+            raise CacheBackendError(payload.decode())
+        if prefix == b":":
+            return int(payload)
+        if prefix == b"$":
+            length = int(payload)
+            if length == -1:
+                return None
+            data = await self.reader.readexactly(length + 2)
+            return data[:-2]
+        if prefix == b"*":
+            count = int(payload)
+            if count == -1:
+                return None
+            return [await self._read_reply() for _ in range(count)]
+
+        raise CacheBackendError(f"Respuesta RESP inválida: {line!r}")
+
+    def close(self) -> None:
+        self.writer.close()
+
+
+def _encode_command(args) -> bytes:
+    parts: List[bytes] = [b"*%d\r\n" % len(args)]
+    for arg in args:
+        if isinstance(arg, bytes):
+            data = arg
+        else:
+            data = str(arg).encode()
+        parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+    return b"".join(parts)
+
+
+class RedisBackend(CacheBackend):
+    """
+    Backend L2 sobre el protocolo de Redis.
+
+    Mantiene un pool pequeño de conexiones (como mucho pool_size
+    abiertas); una conexión que falla o se cancela a mitad de un comando
+    se descarta en lugar de devolverse al pool.
+    """
+
+    name = "redis"
+
+    def __init__(
+        self,
+        url: str = "redis://localhost:6379/0",
+        prefix: str = "llm-feedback:",
+        timeout: float = 0.2,
+        pool_size: int = 8
+    ):
+        """
+        Args:
+            url: redis://[:password@]host:port/db
+            prefix: Prefijo de todas las claves
+            timeout: Timeout por operación en segundos
+            pool_size: Máximo de conexiones abiertas (en uso + ociosas);
+                sin lugar en `timeout` la operación falla
+        """
+        parsed = urlparse(url)
+        self.host = parsed.hostname or "localhost"
+        self.port = parsed.port or 6379
+        self.password = parsed.password
+        self.db = int(parsed.path.lstrip("/") or 0)
+        self.prefix = prefix
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self._idle: List[_RespConnection] = []
+        self._slots = asyncio.Semaphore(pool_size)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self._execute("GET", self.prefix + key)
+
+    async def set(self, key: str, value: bytes, ttl_seconds: float) -> None:
+        await self._execute("SET", self.prefix + key, value, "PX", max(1, int(ttl_seconds * 1000)))
+
+    async def delete(self, key: str) -> None:
+        await self._execute("DEL", self.prefix + key)
+
+    async def close(self) -> None:
+        while self._idle:
+            self._idle.pop().close()
+
+    async def _execute(self, *args):
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=self.timeout)
+        except asyncio.TimeoutError as e:
+            raise CacheBackendError(
+                f"Redis {args[0]} falló: las {self.pool_size} conexiones están en uso"
+            ) from e
+
+        connection = None
+        reusable = False
+        try:
+            connection = await self._acquire()
+            result = await asyncio.wait_for(connection.execute(*args), timeout=self.timeout)
+            reusable = True
+            return result
+        except (asyncio.TimeoutError, OSError, asyncio.IncompleteReadError, ValueError) as e:
+            raise CacheBackendError(f"Redis {args[0]} falló: {e!r}") from e
+        finally:
+            # Sin respuesta completa (error, timeout o cancelación) la
+            # conexión puede quedar a medio leer: no se reutiliza
+            if connection is not None:
+                if reusable:
+                    self._idle.append(connection)
+                else:
+                    connection.close()
+            self._slots.release()
+
+    async def _acquire(self) -> _RespConnection:
+        if self._idle:
+            return self._idle.pop()
+        try:
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection(self.host, self.port),
+                timeout=self.timeout
+            )
+        except (asyncio.TimeoutError, OSError) as e:
+            raise CacheBackendError(f"No se pudo conectar a Redis {self.host}:{self.port}: {e!r}") from e
+
+        connection = _RespConnection(reader, writer)
+        try:
+            if self.password:
+                await asyncio.wait_for(connection.execute("AUTH", self.password), timeout=self.timeout)
+            if self.db:
+                await asyncio.wait_for(connection.execute("SELECT", self.db), timeout=self.timeout)
+        except BaseException:
+            connection.close()
+            raise
+        return connection
+
+
+# ============================================================================
+# SQLITE
+# ============================================================================
+
+class SQLiteBackend(CacheBackend):
+    """
+    Backend L2 en un archivo SQLite local.
+
+    Todas las operaciones corren en un único thread dedicado para no
+    bloquear el event loop y serializar el acceso a la conexión.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, path: str, purge_interval_seconds: float = 300):
+        """
+        Args:
+            path: Archivo de la base de datos
+            purge_interval_seconds: Cada cuánto se eliminan entradas expiradas
+        """
+        self.path = path
+        self.purge_interval_seconds = purge_interval_seconds
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite-cache")
+        self._connection: Optional[sqlite3.Connection] = None
+        self._last_purge = time.time()
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self._run(self._get, key)
+
+    async def set(self, key: str, value: bytes, ttl_seconds: float) -> None:
+        await self._run(self._set, key, value, ttl_seconds)
+
+    async def delete(self, key: str) -> None:
+        await self._run(self._delete, key)
+
+    async def close(self) -> None:
+        await self._run(self._close)
+        self._executor.shutdown(wait=False)
+
+    async def _run(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(self._executor, fn, *args)
+        except sqlite3.Error as e:
+            raise CacheBackendError(f"SQLite falló: {e}") from e
+
+    def _db(self) -> sqlite3.Connection:
+        if self._connection is None:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self.path, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.execute(
+                "CREATE TABLE IF NOT EXISTS feedback_cache ("
+                " key TEXT PRIMARY KEY,"
+                " value BLOB NOT NULL,"
+                " expires_at REAL NOT NULL)"
+            )
+            connection.commit()
+            self._connection = connection
+        return self._connection
+
+    def _get(self, key: str) -> Optional[bytes]:
+        row = self._db().execute(
+            "SELECT value, expires_at FROM feedback_cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None or row[1] < time.time():
+            return None
+        return row[0]
+
+    def _set(self, key: str, value: bytes, ttl_seconds: float) -> None:
+        db = self._db()
+        now = time.time()
+        db.execute(
+            "INSERT OR REPLACE INTO feedback_cache (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, value, now + ttl_seconds)
+        )
+        if now - self._last_purge > self.purge_interval_seconds:
+            db.execute("DELETE FROM feedback_cache WHERE expires_at < ?", (now,))
+            self._last_purge = now
+        db.commit()
+
+    def _delete(self, key: str) -> None:
+        db = self._db()
+        db.execute("DELETE FROM feedback_cache WHERE key = ?", (key,))
+        db.commit()
+
+    def _close(self) -> None:
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
+
+
+def create_backend(kind: str, redis_url: str, sqlite_path: str) -> Optional[CacheBackend]:
+    """
+    Construye el backend L2 según la configuración.
+
+    Args:
+        kind: "none" | "redis" | "sqlite"
+        redis_url: URL de Redis (si kind == "redis")
+        sqlite_path: Archivo SQLite (si kind == "sqlite")
+
+    Returns:
+        CacheBackend: Backend, o None si kind == "none"
+    """
+    kind = (kind or "none").lower()
+    if kind == "none":
+        return None
+    if kind == "redis":
+        return RedisBackend(redis_url)
+    if kind == "sqlite":
+        return SQLiteBackend(sqlite_path)
+    raise ValueError(f"Backend de cache desconocido: {kind}")
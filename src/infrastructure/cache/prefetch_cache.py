@@ -0,0 +1,231 @@
+"""
+Prefetch Cache - Feedback especulativo de corta vida
+
+La app avisa con POST /feedback/prefetch cuando el usuario empieza a
+grabar; el feedback de los resultados más probables se genera mientras
+el ML service calcula los scores (ver FeedbackPrefetcher) y queda aquí
+unos segundos.
+
+Las entradas se indexan por bucket de resultado:
+
+    (user_id, exercise_id, passed, unlocked_next, aspecto más débil)
+
+que son los campos que cambian el contenido del mensaje (igual que en
+SimilarityFeedbackCache). Cada entrada es el Future de la generación:
+si el /feedback/generate real llega antes de que termine, se espera a
+esa llamada en vez de lanzar otra (como mucho max_wait_seconds; después
+se sigue por el camino normal).
+
+También registra los resultados reales por ejercicio, que el
+prefetcher usa para elegir qué buckets generar.
+"""
+
+import asyncio
+import time
+from collections import Counter, OrderedDict
+from typing import Optional, Tuple
+
+from src.domain.models import Feedback, AnalysisContext
+from src.domain.rules import ASPECTS
+
+
+BucketKey = Tuple[str, str, bool, bool, str]
+Outcome = Tuple[bool, str]
+
+
+def prefetch_key(context: AnalysisContext) -> BucketKey:
+    """Bucket de resultado de un intento"""
+    return (
+        context.user_id,
+        context.exercise_id,
+        context.passed,
+        context.unlocked_next,
+        context.get_weakest_aspect()
+    )
+
+
+class PrefetchCache:
+    """
+    Feedback precalculado por bucket, con TTL corto.
+
+    No es thread-safe: se usa desde el event loop.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: float = 60.0,
+        max_entries: int = 5000,
+        max_exercises: int = 10000,
+        max_wait_seconds: float = 3.0
+    ):
+        """
+        Args:
+            ttl_seconds: Vida de una entrada (desde que se lanza la generación)
+            max_entries: Máximo de entradas (evicción FIFO)
+            max_exercises: Ejercicios con historial de resultados (evicción LRU)
+            max_wait_seconds: Espera máxima por una generación en curso
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_wait_seconds = max_wait_seconds
+        self.max_entries = max_entries
+        self.max_exercises = max_exercises
+
+        # TTL fijo: el orden de inserción es el orden de vencimiento
+        self._entries: "OrderedDict[BucketKey, Tuple[asyncio.Future, float]]" = OrderedDict()
+        self._outcomes: "OrderedDict[str, Counter]" = OrderedDict()
+        self._global_outcomes: Counter = Counter()
+
+        self.stored = 0
+        self.lookups = 0
+        self.covered_lookups = 0
+        self.hits = 0
+        self.hits_pending = 0
+        self.misses = 0
+        self.failed = 0
+        self.wait_timeouts = 0
+        self.expired_unused = 0
+        self.evicted = 0
+
+    def put(self, key: BucketKey, future: asyncio.Future) -> None:
+        """
+        Guarda la generación en curso de un bucket.
+
+        Args:
+            key: Bucket (ver prefetch_key)
+            future: Future/Task que resuelve al Feedback
+        """
+        self._purge(time.monotonic())
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            previous[0].cancel()
+        self._entries[key] = (future, time.monotonic() + self.ttl_seconds)
+        self.stored += 1
+
+        while len(self._entries) > self.max_entries:
+            _, (old, _) = self._entries.popitem(last=False)
+            old.cancel()
+            self.evicted += 1
+
+    def has(self, key: BucketKey) -> bool:
+        """True si el bucket tiene una entrada vigente"""
+        entry = self._entries.get(key)
+        return entry is not None and entry[1] > time.monotonic()
+
+    async def take(self, context: AnalysisContext) -> Optional[Feedback]:
+        """
+        Retira el feedback precalculado para el intento, si hay.
+
+        Si la generación sigue en curso, la espera hasta
+        max_wait_seconds; si no termina, se cancela y retorna None.
+        Registra el resultado real del intento para el prefetcher.
+
+        Args:
+            context: Contexto del intento con los scores reales
+
+        Returns:
+            Feedback: Feedback del bucket, o None (sin entrada, falló o tardó)
+        """
+        self.lookups += 1
+        self._record_outcome(context)
+        self._purge(time.monotonic())
+
+        key = prefetch_key(context)
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            if self._has_sibling(key):
+                self.covered_lookups += 1
+                self.misses += 1
+            return None
+
+        self.covered_lookups += 1
+        future = entry[0]
+        if future.done():
+            self.hits += 1
+        else:
+            self.hits_pending += 1
+
+        try:
+            # shield: si cancelan este request, la generación no se pierde
+            return await asyncio.wait_for(asyncio.shield(future), self.max_wait_seconds)
+        except asyncio.TimeoutError:
+            # El camino normal hace su propia llamada: esta ya no se usa
+            future.cancel()
+            self.wait_timeouts += 1
+            return None
+        except asyncio.CancelledError:
+            if future.cancelled():
+                self.failed += 1
+                return None
+            raise
+        except Exception:
+            self.failed += 1
+            return None
+
+    def outcome_counts(self, exercise_id: str) -> Tuple[Counter, Counter]:
+        """
+        Resultados reales observados.
+
+        Returns:
+            Tuple[Counter, Counter]: (del ejercicio, de todos) por (passed, más débil)
+        """
+        return self._outcomes.get(exercise_id, Counter()), self._global_outcomes
+
+    def stats(self) -> dict:
+        """Métricas de la cache"""
+        served = self.hits + self.hits_pending
+        return {
+            "entries": len(self._entries),
+            "stored": self.stored,
+            "lookups": self.lookups,
+            "covered_lookups": self.covered_lookups,
+            "coverage": round(self.covered_lookups / self.lookups, 4) if self.lookups else None,
+            "hits": self.hits,
+            "hits_pending": self.hits_pending,
+            "misses": self.misses,
+            "hit_rate": (
+                round(served / self.covered_lookups, 4) if self.covered_lookups else None
+            ),
+            "failed": self.failed,
+            "wait_timeouts": self.wait_timeouts,
+            "expired_unused": self.expired_unused,
+            "evicted": self.evicted,
+            "ttl_seconds": self.ttl_seconds,
+            "max_wait_seconds": self.max_wait_seconds,
+        }
+
+    def close(self) -> None:
+        """Cancela las generaciones pendientes y vacía la cache"""
+        for future, _ in self._entries.values():
+            future.cancel()
+        self._entries.clear()
+
+    def _purge(self, now: float) -> None:
+        while self._entries:
+            key, (future, expires_at) = next(iter(self._entries.items()))
+            if expires_at > now:
+                break
+            del self._entries[key]
+            future.cancel()
+            self.expired_unused += 1
+
+    def _has_sibling(self, key: BucketKey) -> bool:
+        # Otro bucket del mismo usuario y ejercicio: se predijo mal el resultado
+        user_id, exercise_id = key[0], key[1]
+        return any(
+            (user_id, exercise_id, passed, unlocked, aspect) in self._entries
+            for passed in (True, False)
+            for unlocked in (True, False)
+            for aspect in ASPECTS
+        )
+
+    def _record_outcome(self, context: AnalysisContext) -> None:
+        outcome: Outcome = (context.passed, context.get_weakest_aspect())
+        counts = self._outcomes.pop(context.exercise_id, None)
+        if counts is None:
+            counts = Counter()
+        counts[outcome] += 1
+        self._outcomes[context.exercise_id] = counts
+        self._global_outcomes[outcome] += 1
+
+        while len(self._outcomes) > self.max_exercises:
+            self._outcomes.popitem(last=False)
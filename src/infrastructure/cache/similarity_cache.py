@@ -0,0 +1,263 @@
+"""
+Similarity Cache - Reutiliza feedback del LLM entre perfiles de scores cercanos
+
+Los scores son floats (85.5, 78.2...), así que una cache por clave exacta
+casi nunca acierta. Esta cache indexa el vector (pronunciación, fluidez,
+ritmo) en una grilla por ejercicio y devuelve el feedback guardado más
+cercano dentro de una distancia configurable.
+
+Solo se reutiliza feedback entre intentos que coinciden en exercise_id,
+passed, unlocked_next y aspecto más débil, porque esos campos cambian
+el contenido del mensaje (celebración, área a mejorar).
+
+El snapshot pre-generado es una grilla gruesa (ej: 40,60,75,90 por
+aspecto), mucho más espaciada que max_distance. Sus entradas no van al
+índice de vecinos: cada una cubre su bucket completo, y un intento que
+no tiene vecino cercano se redondea al punto de la grilla más cercano
+en cada aspecto (ver set_bucket_grid).
+"""
+
+import bisect
+import math
+from collections import deque
+from typing import Deque, Dict, Iterable, List, Optional, Tuple
+
+from src.domain.models import Feedback, AnalysisContext
+
+
+Vector = Tuple[float, float, float]
+IndexKey = Tuple[str, bool, bool, str]
+Cell = Tuple[int, int, int]
+
+
+def score_vector(context: AnalysisContext) -> Vector:
+    """Vector de scores usado para medir similitud"""
+    return (context.pronunciation_score, context.fluency_score, context.rhythm_score)
+
+
+def index_key(context: AnalysisContext) -> IndexKey:
+    """Campos que deben coincidir exactamente para reutilizar feedback"""
+    return (
+        context.exercise_id,
+        context.passed,
+        context.unlocked_next,
+        context.get_weakest_aspect()
+    )
+
+
+class _GridIndex:
+    """
+    Índice espacial de grilla uniforme en 3D.
+
+    Con celdas del tamaño de la distancia máxima, cualquier vecino
+    dentro de esa distancia está en la celda del punto o en una de
+    sus 26 adyacentes.
+    """
+
+    def __init__(self, cell_size: float, max_entries: int):
+        self.cell_size = cell_size
+        self.max_entries = max_entries
+        self.cells: Dict[Cell, List[Tuple[Vector, Feedback]]] = {}
+        self.order: Deque[Tuple[Cell, Vector]] = deque()
+
+    def __len__(self) -> int:
+        return len(self.order)
+
+    def _cell(self, vector: Vector) -> Cell:
+        size = self.cell_size
+        return (
+            int(math.floor(vector[0] / size)),
+            int(math.floor(vector[1] / size)),
+            int(math.floor(vector[2] / size)),
+        )
+
+    def nearest(self, vector: Vector, max_distance: float) -> Optional[Tuple[float, Feedback]]:
+        cx, cy, cz = self._cell(vector)
+        best: Optional[Tuple[float, Feedback]] = None
+        limit = max_distance * max_distance
+
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                for dz in (-1, 0, 1):
+                    entries = self.cells.get((cx + dx, cy + dy, cz + dz))
+                    if not entries:
+                        continue
+                    for stored, feedback in entries:
+                        d2 = (
+                            (stored[0] - vector[0]) ** 2
+                            + (stored[1] - vector[1]) ** 2
+                            + (stored[2] - vector[2]) ** 2
+                        )
+                        if d2 <= limit and (best is None or d2 < best[0]):
+                            best = (d2, feedback)
+
+        if best is None:
+            return None
+        return math.sqrt(best[0]), best[1]
+
+    def insert(self, vector: Vector, feedback: Feedback) -> None:
+        cell = self._cell(vector)
+        self.cells.setdefault(cell, []).append((vector, feedback))
+        self.order.append((cell, vector))
+
+        # Evicción FIFO por índice
+        while len(self.order) > self.max_entries:
+            old_cell, old_vector = self.order.popleft()
+            entries = self.cells.get(old_cell, [])
+            for i, (stored, _) in enumerate(entries):
+                if stored == old_vector:
+                    del entries[i]
+                    break
+            if not entries:
+                self.cells.pop(old_cell, None)
+
+
+class SimilarityFeedbackCache:
+    """
+    Cache de feedback por vecino más cercano.
+
+    No es thread-safe: se usa desde el event loop.
+    """
+
+    def __init__(self, max_distance: float = 3.0, max_entries_per_key: int = 500):
+        """
+        Inicializa la cache.
+
+        Args:
+            max_distance: Distancia euclidiana máxima entre vectores de scores
+            max_entries_per_key: Máximo de entradas por índice (evicción FIFO)
+        """
+        if max_distance <= 0:
+            raise ValueError("max_distance debe ser mayor que 0")
+
+        self.max_distance = max_distance
+        self.max_entries_per_key = max_entries_per_key
+        self._indexes: Dict[IndexKey, _GridIndex] = {}
+        self._bucket_grid: Tuple[float, ...] = ()
+        self._buckets: Dict[Tuple[IndexKey, Vector], Feedback] = {}
+
+        self.lookups = 0
+        self.hits = 0
+        self.bucket_hits = 0
+        self.stores = 0
+        self.skipped_duplicates = 0
+
+    def lookup(self, context: AnalysisContext) -> Optional[Feedback]:
+        """
+        Busca feedback reutilizable para el contexto.
+
+        Args:
+            context: Contexto del intento
+
+        Returns:
+            Feedback: Feedback guardado más cercano, o None
+        """
+        self.lookups += 1
+        key = index_key(context)
+        vector = score_vector(context)
+
+        index = self._indexes.get(key)
+        found = index.nearest(vector, self.max_distance) if index is not None else None
+        if found is not None:
+            self.hits += 1
+            return found[1]
+
+        if not (self._buckets and self._bucket_grid):
+            return None
+        feedback = self._buckets.get((key, self._snap(vector)))
+        if feedback is None:
+            return None
+
+        self.hits += 1
+        self.bucket_hits += 1
+        return feedback
+
+    def store(self, context: AnalysisContext, feedback: Feedback) -> bool:
+        """
+        Guarda feedback generado por el LLM.
+
+        Si ya hay una entrada muy cercana (menos de la mitad de la
+        distancia máxima) no se guarda, para mantener el índice disperso.
+
+        Args:
+            context: Contexto del intento
+            feedback: Feedback generado
+
+        Returns:
+            bool: True si se guardó
+        """
+        return self.store_vector(index_key(context), score_vector(context), feedback)
+
+    def store_vector(self, key: IndexKey, vector: Vector, feedback: Feedback) -> bool:
+        """
+        Guarda feedback por clave de índice y vector (ej: desde un snapshot).
+
+        Args:
+            key: (exercise_id, passed, unlocked_next, aspecto más débil)
+            vector: (pronunciación, fluidez, ritmo)
+            feedback: Feedback a guardar
+
+        Returns:
+            bool: True si se guardó
+        """
+        index = self._indexes.get(key)
+        if index is None:
+            index = _GridIndex(self.max_distance, self.max_entries_per_key)
+            self._indexes[key] = index
+
+        if index.nearest(vector, self.max_distance / 2) is not None:
+            self.skipped_duplicates += 1
+            return False
+
+        index.insert(vector, feedback)
+        self.stores += 1
+        return True
+
+    def set_bucket_grid(self, grid: Iterable[float]) -> None:
+        """
+        Define la grilla de los buckets pre-generados.
+
+        Args:
+            grid: Valores de score por aspecto (los mismos en los tres)
+        """
+        self._bucket_grid = tuple(sorted(set(float(value) for value in grid)))
+
+    def store_bucket(self, key: IndexKey, vector: Vector, feedback: Feedback) -> None:
+        """
+        Guarda el feedback de un punto de la grilla (ej: desde un snapshot).
+
+        Args:
+            key: (exercise_id, passed, unlocked_next, aspecto más débil)
+            vector: Punto de la grilla (pronunciación, fluidez, ritmo)
+            feedback: Feedback del bucket
+        """
+        self._buckets[(key, tuple(float(value) for value in vector))] = feedback
+
+    def _snap(self, vector: Vector) -> Vector:
+        grid = self._bucket_grid
+        snapped = []
+        for value in vector:
+            # Punto más cercano de la grilla (en empate, el menor)
+            i = bisect.bisect_left(grid, value)
+            if i == len(grid) or (i > 0 and value - grid[i - 1] <= grid[i] - value):
+                i -= 1
+            snapped.append(grid[i])
+        return tuple(snapped)
+
+    def __len__(self) -> int:
+        return sum(len(index) for index in self._indexes.values())
+
+    def stats(self) -> dict:
+        """Métricas de la cache"""
+        return {
+            "lookups": self.lookups,
+            "hits": self.hits,
+            "hit_rate": round(self.hits / self.lookups, 4) if self.lookups else 0.0,
+            "bucket_hits": self.bucket_hits,
+            "bucket_entries": len(self._buckets),
+            "stores": self.stores,
+            "skipped_duplicates": self.skipped_duplicates,
+            "entries": len(self),
+            "indexes": len(self._indexes),
+            "max_distance": self.max_distance,
+        }
@@ -0,0 +1,130 @@
+"""
+Feedback Snapshot - Archivo compacto de feedback pre-generado
+
+Formato: JSON Lines comprimido con gzip. La primera línea es un header
+con la versión y la grilla de scores por aspecto ("buckets"); cada
+línea siguiente es una entrada:
+
+    {"exercise_id": "fonema_r_suave_1", "passed": true,
+     "unlocked_next": false, "weakest": "fluency",
+     "scores": [85.0, 75.0, 90.0], "feedback": {...Feedback.to_dict()}}
+"""
+
+import gzip
+import json
+import os
+from datetime import datetime
+from typing import Iterable, Iterator, List, Optional
+
+from src.domain.models import Feedback
+from .similarity_cache import SimilarityFeedbackCache
+
+
+SNAPSHOT_VERSION = 1
+
+
+def write_snapshot(path: str, entries: Iterable[dict], buckets: Optional[List[float]] = None) -> int:
+    """
+    Escribe un snapshot de forma atómica (archivo temporal + rename).
+
+    Args:
+        path: Ruta del snapshot (.jsonl.gz)
+        entries: Entradas en el formato del módulo
+        buckets: Grilla de scores por aspecto con la que se generaron
+
+    Returns:
+        int: Número de entradas escritas
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    tmp_path = f"{path}.tmp"
+    count = 0
+    with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+        header = {"version": SNAPSHOT_VERSION, "created_at": datetime.utcnow().isoformat()}
+        if buckets:
+            header["buckets"] = sorted(set(buckets))
+        f.write(json.dumps(header) + "\n")
+        for entry in entries:
+            f.write(json.dumps(entry, ensure_ascii=False, separators=(",", ":")) + "\n")
+            count += 1
+    os.replace(tmp_path, path)
+    return count
+
+
+def read_snapshot_header(path: str) -> dict:
+    """
+    Lee el header de un snapshot.
+
+    Args:
+        path: Ruta del snapshot
+
+    Returns:
+        dict: Header (version, created_at y, si se conoce, buckets)
+
+    Raises:
+        ValueError: Si la versión no es soportada
+    """
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        return _check_header(f.readline())
+
+
+def _check_header(line: str) -> dict:
+    header = json.loads(line or "{}")
+    if header.get("version") != SNAPSHOT_VERSION:
+        raise ValueError(f"Versión de snapshot no soportada: {header.get('version')}")
+    return header
+
+
+def read_snapshot(path: str) -> Iterator[dict]:
+    """
+    Lee las entradas de un snapshot.
+
+    Args:
+        path: Ruta del snapshot
+
+    Yields:
+        dict: Entradas en el formato del módulo
+
+    Raises:
+        ValueError: Si la versión no es soportada
+    """
+    with gzip.open(path, "rt", encoding="utf-8") as f:
+        _check_header(f.readline())
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(line)
+
+
+def load_snapshot(cache: SimilarityFeedbackCache, path: str) -> int:
+    """
+    Carga un snapshot en la cache de similitud.
+
+    Con la grilla en el header, cada entrada cubre su bucket completo
+    (ver SimilarityFeedbackCache.set_bucket_grid); los snapshots sin
+    grilla se cargan como vecinos dentro de max_distance.
+
+    Args:
+        cache: Cache destino
+        path: Ruta del snapshot
+
+    Returns:
+        int: Número de entradas cargadas
+    """
+    buckets = read_snapshot_header(path).get("buckets")
+    if buckets:
+        cache.set_bucket_grid(buckets)
+
+    loaded = 0
+    for entry in read_snapshot(path):
+        key = (entry["exercise_id"], entry["passed"], entry["unlocked_next"], entry["weakest"])
+        vector = tuple(entry["scores"])
+        feedback = Feedback(**entry["feedback"])
+        if buckets:
+            cache.store_bucket(key, vector, feedback)
+            loaded += 1
+        elif cache.store_vector(key, vector, feedback):
+            loaded += 1
+    return loaded
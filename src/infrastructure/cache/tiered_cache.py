@@ -0,0 +1,317 @@
+"""
+Tiered Feedback Cache - L1 en proceso + L2 compartido
+
+- Read-through: L1 -> L2 -> generación; lo leído de L2 se sube a L1.
+- Write-behind: la escritura a L2 se encola y la hace una tarea de
+  fondo, sin agregar latencia al request.
+- Negative caching: si la generación falla, se guarda un marcador con
+  TTL corto para que el resto de los requests (de esta y otras
+  instancias) vayan directo al fallback.
+- Stampede protection: un solo request por clave consulta L2 y genera;
+  los concurrentes esperan el mismo resultado.
+"""
+
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Optional, Tuple
+
+from src.domain.models import Feedback, AnalysisContext
+from .backends import CacheBackend, CacheBackendError
+
+
+# Cambiar al modificar el prompt o el formato de Feedback
+CACHE_KEY_VERSION = "v1"
+
+
+class CachedFailureError(Exception):
+    """La clave tiene un fallo reciente cacheado (negative cache)"""
+
+
+_NEGATIVE = object()
+
+
+def feedback_cache_key(context: AnalysisContext) -> str:
+    """
+    Clave exacta del feedback para un contexto.
+
+    Incluye todo lo que llega al prompt del LLM (ver build_user_prompt);
+    los scores se redondean igual que en el prompt.
+    """
+    raw = "|".join(str(part) for part in (
+        CACHE_KEY_VERSION,
+        context.exercise_id,
+        context.exercise_type,
+        context.exercise_content,
+        context.reference_text,
+        f"{context.pronunciation_score:.0f}",
+        f"{context.fluency_score:.0f}",
+        f"{context.rhythm_score:.0f}",
+        f"{context.overall_score:.0f}",
+        context.passed,
+        context.unlocked_next,
+    ))
+    return hashlib.sha256(raw.encode()).hexdigest()[:32]
+
+
+class TieredFeedbackCache:
+    """
+    Cache de feedback de dos niveles.
+
+    No es thread-safe: se usa desde el event loop.
+    """
+
+    def __init__(
+        self,
+        l2: Optional[CacheBackend] = None,
+        l1_max_entries: int = 10000,
+        ttl_seconds: float = 86400,
+        negative_ttl_seconds: float = 30,
+        write_queue_size: int = 1000
+    ):
+        """
+        Args:
+            l2: Backend compartido (None = solo L1)
+            l1_max_entries: Máximo de entradas en memoria (LRU)
+            ttl_seconds: TTL de feedback generado
+            negative_ttl_seconds: TTL de fallos cacheados
+            write_queue_size: Máximo de escrituras pendientes a L2
+        """
+        self.l2 = l2
+        self.l1_max_entries = l1_max_entries
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+
+        self._l1: "OrderedDict[str, Tuple[float, object]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self._write_queue: asyncio.Queue = asyncio.Queue(maxsize=write_queue_size)
+        self._writer_task: Optional[asyncio.Task] = None
+
+        self.stats_counters = {
+            "l1_hits": 0,
+            "l2_hits": 0,
+            "misses": 0,
+            "negative_hits": 0,
+            "coalesced": 0,
+            "leader_cancelled": 0,
+            "computed": 0,
+            "failures_cached": 0,
+            "l2_errors": 0,
+            "l2_writes": 0,
+            "l2_writes_dropped": 0,
+        }
+
+    async def get_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[Feedback]]
+    ) -> Feedback:
+        """
+        Retorna el feedback cacheado o lo genera.
+
+        Los requests concurrentes con la misma clave esperan al primero;
+        si ese se cancela, cada uno vuelve a intentar por su cuenta.
+
+        Args:
+            key: Clave (ver feedback_cache_key)
+            compute: Corutina que genera el feedback si no está cacheado
+
+        Returns:
+            Feedback: Feedback cacheado o recién generado
+
+        Raises:
+            CachedFailureError: Si hay un fallo reciente cacheado
+            Exception: El error de `compute` (queda cacheado como fallo,
+                salvo que tenga el atributo `cache_failure = False`)
+        """
+        value = self._l1_get(key)
+        if value is _NEGATIVE:
+            self.stats_counters["negative_hits"] += 1
+            raise CachedFailureError(key)
+        if value is not None:
+            self.stats_counters["l1_hits"] += 1
+            return value
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.stats_counters["coalesced"] += 1
+            try:
+                return await asyncio.shield(inflight)
+            except asyncio.CancelledError:
+                if not inflight.cancelled() or asyncio.current_task().cancelling():
+                    raise
+                # Se canceló el líder (ej: su cliente se desconectó), no
+                # este request: generar por cuenta propia
+                self.stats_counters["leader_cancelled"] += 1
+                return await self.get_or_compute(key, compute)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await self._load(key, compute)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            if not future.done():
+                future.set_exception(e)
+                # Evita "exception was never retrieved" si nadie más esperaba
+                future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            self._inflight.pop(key, None)
+
+    async def _load(self, key: str, compute: Callable[[], Awaitable[Feedback]]) -> Feedback:
+        # Read-through desde L2
+        if self.l2 is not None:
+            try:
+                raw = await self.l2.get(key)
+            except CacheBackendError as e:
+                self.stats_counters["l2_errors"] += 1
+                print(f"⚠️ Cache L2 no disponible: {e}")
+                raw = None
+
+            if raw is not None:
+                value = _decode(raw)
+                if value is _NEGATIVE:
+                    self._l1_set(key, _NEGATIVE, self.negative_ttl_seconds)
+                    self.stats_counters["negative_hits"] += 1
+                    raise CachedFailureError(key)
+                if value is not None:
+                    self._l1_set(key, value, self.ttl_seconds)
+                    self.stats_counters["l2_hits"] += 1
+                    return value
+
+        self.stats_counters["misses"] += 1
+        try:
+            feedback = await compute()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            if not getattr(e, "cache_failure", True):
+                # Ej: carga local (LLMOverloadedError), no es un fallo de la clave
+                raise
+            self.stats_counters["failures_cached"] += 1
+            self._l1_set(key, _NEGATIVE, self.negative_ttl_seconds)
+            self._enqueue_write(key, _encode_negative(str(e)), self.negative_ttl_seconds)
+            raise
+
+        self.stats_counters["computed"] += 1
+        self._l1_set(key, feedback, self.ttl_seconds)
+        self._enqueue_write(key, _encode(feedback), self.ttl_seconds)
+        return feedback
+
+    # ------------------------------------------------------------------
+    # L1
+    # ------------------------------------------------------------------
+
+    def _l1_get(self, key: str):
+        entry = self._l1.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._l1[key]
+            return None
+        self._l1.move_to_end(key)
+        return value
+
+    def _l1_set(self, key: str, value, ttl_seconds: float) -> None:
+        self._l1[key] = (time.monotonic() + ttl_seconds, value)
+        self._l1.move_to_end(key)
+        while len(self._l1) > self.l1_max_entries:
+            self._l1.popitem(last=False)
+
+    # ------------------------------------------------------------------
+    # Write-behind a L2
+    # ------------------------------------------------------------------
+
+    def _enqueue_write(self, key: str, raw: bytes, ttl_seconds: float) -> None:
+        if self.l2 is None:
+            return
+        if self._writer_task is None or self._writer_task.done():
+            self._writer_task = asyncio.get_running_loop().create_task(self._write_loop())
+        try:
+            self._write_queue.put_nowait((key, raw, ttl_seconds))
+        except asyncio.QueueFull:
+            self.stats_counters["l2_writes_dropped"] += 1
+
+    async def _write_loop(self) -> None:
+        while True:
+            key, raw, ttl_seconds = await self._write_queue.get()
+            try:
+                await self.l2.set(key, raw, ttl_seconds)
+                self.stats_counters["l2_writes"] += 1
+            except CacheBackendError as e:
+                self.stats_counters["l2_errors"] += 1
+                print(f"⚠️ Error escribiendo en cache L2: {e}")
+            finally:
+                self._write_queue.task_done()
+
+    async def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Espera a que se escriban las entradas pendientes en L2.
+
+        Returns:
+            bool: False si venció el timeout
+        """
+        if self._writer_task is None:
+            return True
+        try:
+            await asyncio.wait_for(self._write_queue.join(), timeout=timeout)
+            return True
+        except asyncio.TimeoutError:
+            return False
+
+    async def close(self, timeout: float = 5.0) -> None:
+        """Escribe lo pendiente y cierra el backend L2"""
+        await self.flush(timeout)
+        if self._writer_task is not None:
+            self._writer_task.cancel()
+        if self.l2 is not None:
+            await self.l2.close()
+
+    def stats(self) -> dict:
+        """Métricas de la cache"""
+        lookups = (
+            self.stats_counters["l1_hits"]
+            + self.stats_counters["l2_hits"]
+            + self.stats_counters["misses"]
+            + self.stats_counters["negative_hits"]
+            + self.stats_counters["coalesced"]
+        )
+        hits = self.stats_counters["l1_hits"] + self.stats_counters["l2_hits"]
+        return {
+            **self.stats_counters,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+            "l1_entries": len(self._l1),
+            "l2_backend": self.l2.name if self.l2 is not None else None,
+            "l2_write_queue": self._write_queue.qsize(),
+        }
+
+
+def _encode(feedback: Feedback) -> bytes:
+    return json.dumps(feedback.to_dict(), ensure_ascii=False).encode()
+
+
+def _encode_negative(error: str) -> bytes:
+    return json.dumps({"__negative__": True, "error": error[:200]}).encode()
+
+
+def _decode(raw: bytes):
+    """Retorna Feedback, _NEGATIVE o None si la entrada está corrupta"""
+    try:
+        data = json.loads(raw)
+    except ValueError:
+        return None
+    if data.get("__negative__"):
+        return _NEGATIVE
+    try:
+        return Feedback(**data)
+    except TypeError:
+        return None
@@ -29,6 +29,100 @@ class Settings(BaseSettings):
     LLM_MAX_TOKENS: int = 1024
     LLM_TEMPERATURE: float = 0.7
     LLM_TIMEOUT_SECONDS: int = 10
+    LLM_FEEDBACK_ENABLED: bool = False  # False = solo feedback algorítmico
+    LLM_STRUCTURED_OUTPUT_ENABLED: bool = True  # JSON con response_schema
+    LLM_JSON_REPAIR_ENABLED: bool = True  # Reparar JSON truncado/mal formado sin reintentar
+    GEMINI_MODEL_CACHE_PATH: Optional[str] = ".cache/gemini_models.json"
+    GEMINI_MODEL_CACHE_TTL_SECONDS: int = 86400
+    
+    # Hedging (duplicar requests lentos a un modelo secundario)
+    LLM_HEDGING_ENABLED: bool = False
+    LLM_HEDGE_PERCENTILE: float = 95.0
+    LLM_HEDGE_MIN_DELAY_SECONDS: float = 1.0
+    LLM_HEDGE_MAX_RATIO: float = 0.05
+    
+    # Scheduler de llamadas al LLM (prioridad interactive/batch + fairness por usuario)
+    LLM_SCHEDULER_ENABLED: bool = True
+    LLM_MAX_CONCURRENCY: int = 8  # Llamadas al LLM en vuelo por worker
+    LLM_MAX_REQUESTS_PER_MINUTE: int = 0  # 0 = sin límite
+    LLM_INTERACTIVE_RESERVED_SHARE: float = 0.5  # Fracción que "batch" no puede usar
+    LLM_INTERACTIVE_WEIGHT: float = 4.0
+    LLM_BATCH_WEIGHT: float = 1.0
+    
+    # Guardrail local del feedback (términos técnicos, apertura positiva)
+    LLM_GUARDRAIL_ENABLED: bool = True
+    LLM_GUARDRAIL_TERMS_PATH: Optional[str] = None  # JSON: rewrite / banned / negative_openings
+    
+    # Límite adaptativo (AIMD) de llamadas al LLM: excedido -> fallback / 503
+    LLM_ADAPTIVE_LIMIT_ENABLED: bool = True
+    LLM_ADAPTIVE_INITIAL_LIMIT: int = 8
+    LLM_ADAPTIVE_MIN_LIMIT: int = 2
+    LLM_ADAPTIVE_MAX_LIMIT: int = 32
+    LLM_ADAPTIVE_BACKOFF_RATIO: float = 0.9  # Factor ante latencia alta o sobrecarga
+    LLM_ADAPTIVE_LATENCY_TOLERANCE: float = 2.0  # Lenta = > N × mediana
+    
+    # Shadow traffic (comparar un modelo/prompt candidato con tráfico real)
+    SHADOW_ENABLED: bool = False
+    SHADOW_SAMPLE_RATE: float = 0.05
+    SHADOW_CANDIDATE_MODEL: Optional[str] = None  # None = mismo modelo que el primario
+    SHADOW_CANDIDATE_PROMPT_PATH: Optional[str] = None  # System prompt candidato (archivo)
+    SHADOW_INCLUDE_BASELINE: bool = True  # Correr también el modelo/prompt actual
+    SHADOW_MAX_CONCURRENCY: int = 2  # Llamadas al LLM en vuelo
+    SHADOW_MAX_REQUESTS_PER_MINUTE: int = 10
+    SHADOW_TIMEOUT_SECONDS: float = 20.0
+    
+    # Prefetch especulativo (POST /feedback/prefetch al empezar a grabar)
+    PREFETCH_ENABLED: bool = False  # Requiere LLM_FEEDBACK_ENABLED
+    PREFETCH_MAX_BUCKETS: int = 2  # Resultados probables generados por intento
+    PREFETCH_TTL_SECONDS: float = 60.0
+    PREFETCH_MAX_ENTRIES: int = 5000
+    PREFETCH_MAX_WAIT_SECONDS: float = 3.0  # Espera por un prefetch en curso antes del camino normal
+    PREFETCH_MAX_CONCURRENCY: int = 4  # Llamadas al LLM en vuelo
+    PREFETCH_MAX_REQUESTS_PER_MINUTE: int = 30
+    
+    # Outbound delivery (feedback generado -> servicios downstream)
+    DELIVERY_ENABLED: bool = False
+    DELIVERY_URLS: str = ""  # Endpoints separados por coma
+    DELIVERY_AUTH_TOKEN: Optional[str] = None
+    DELIVERY_DIR: str = "data/delivery"  # Spill y dead-letter
+    DELIVERY_BATCH_SIZE: int = 50
+    DELIVERY_FLUSH_INTERVAL_SECONDS: float = 0.5
+    DELIVERY_MAX_PENDING: int = 5000  # Por destino; el excedente va a disco
+    DELIVERY_MAX_RETRIES: int = 6
+    DELIVERY_BACKOFF_MAX_SECONDS: float = 30.0
+    DELIVERY_TIMEOUT_SECONDS: float = 5.0
+    DELIVERY_SHUTDOWN_TIMEOUT_SECONDS: float = 5.0
+    
+    # Graceful shutdown (SIGTERM: readiness false -> drenar en vuelo -> flush)
+    DRAIN_READINESS_DELAY_SECONDS: float = 2.0  # Atendiendo con /ready en 503
+    DRAIN_TIMEOUT_SECONDS: float = 25.0  # Espera máxima por requests/sesiones en vuelo
+    DRAIN_RETRY_AFTER_SECONDS: int = 5
+    DRAIN_STEP_TIMEOUT_SECONDS: float = 6.0  # Por paso del cierre; cubre DELIVERY_SHUTDOWN_TIMEOUT_SECONDS
+    DRAIN_REPORT_PATH: Optional[str] = "data/drain_report.json"
+    
+    # Startup (python main.py --startup-profile)
+    STARTUP_BUDGET_SECONDS: float = 2.0
+    
+    # Similarity Cache (reutiliza feedback entre scores cercanos)
+    SIMILARITY_CACHE_ENABLED: bool = True
+    SIMILARITY_CACHE_MAX_DISTANCE: float = 3.0
+    SIMILARITY_CACHE_MAX_ENTRIES_PER_KEY: int = 500
+    FEEDBACK_SNAPSHOT_PATH: Optional[str] = None  # Generado por tools/pregenerate_feedback.py
+    
+    # Feedback Cache (L1 en memoria + L2 compartido entre instancias)
+    FEEDBACK_CACHE_ENABLED: bool = False
+    FEEDBACK_CACHE_BACKEND: str = "none"  # none | sqlite | redis
+    FEEDBACK_CACHE_REDIS_URL: str = "redis://localhost:6379/0"
+    FEEDBACK_CACHE_SQLITE_PATH: str = "data/feedback_cache.sqlite3"
+    FEEDBACK_CACHE_TTL_SECONDS: int = 86400
+    FEEDBACK_CACHE_NEGATIVE_TTL_SECONDS: int = 30
+    FEEDBACK_CACHE_L1_MAX_ENTRIES: int = 10000
+    
+    # WebSocket /feedback/ws (sesiones de práctica)
+    WS_MAX_IN_FLIGHT: int = 2  # Intentos en proceso por conexión
+    WS_IDLE_TIMEOUT_SECONDS: float = 120.0
+    WS_SEND_QUEUE_SIZE: int = 16
+    WS_MAX_MESSAGE_BYTES: int = 16384
     
     # CORS
     CORS_ORIGINS: str = "*"  # En producción usar dominios específicos
@@ -36,10 +130,43 @@ class Settings(BaseSettings):
     # Logging
     LOG_LEVEL: str = "INFO"
     
+    # Monitor del event loop (lag + stacks de bloqueos)
+    LOOP_MONITOR_ENABLED: bool = True
+    LOOP_MONITOR_INTERVAL_SECONDS: float = 0.05
+    LOOP_BLOCK_THRESHOLD_SECONDS: float = 0.25
+    
+    # Debug endpoints (/debug/profile, /debug/heap); sin token quedan deshabilitados
+    ADMIN_TOKEN: Optional[str] = None
+    DEBUG_PROFILE_MAX_SECONDS: float = 60.0
+    
+    # Tracing (X-Request-ID, Server-Timing, export OTLP JSON)
+    TRACING_ENABLED: bool = True
+    TRACING_SERVER_TIMING: bool = True
+    TRACING_EXPORT_PATH: Optional[str] = None  # ej: data/traces/spans.jsonl
+    TRACING_EXPORT_SAMPLE_RATE: float = 1.0
+    
+    # Attempt Log (registro columnar de intentos)
+    ATTEMPT_LOG_ENABLED: bool = False
+    ATTEMPT_LOG_DIR: str = "data/attempt_log"
+    ATTEMPT_LOG_SEGMENT_MAX_BYTES: int = 64 * 1024 * 1024
+    ATTEMPT_LOG_FLUSH_INTERVAL_SECONDS: float = 1.0
+    ATTEMPT_LOG_MAX_PENDING: int = 10000
+    
+    # Traffic Capture (corpus para tools/replay_traffic.py)
+    TRAFFIC_CAPTURE_ENABLED: bool = False
+    TRAFFIC_CAPTURE_PATH: str = "data/traffic/corpus.jsonl"
+    TRAFFIC_CAPTURE_SAMPLE_RATE: float = 0.01
+    TRAFFIC_CAPTURE_SALT: str = ""  # Obligatoria: sin sal la captura no se habilita
+    
     class Config:
         env_file = ".env"
         case_sensitive = True
     
+    @property
+    def delivery_urls_list(self) -> list:
+        """Convierte DELIVERY_URLS string a lista"""
+        return [url.strip() for url in self.DELIVERY_URLS.split(",") if url.strip()]
+    
     @property
     def cors_origins_list(self) -> list:
         """Convierte CORS_ORIGINS string a lista"""
@@ -0,0 +1,3 @@
+from .outbound import OutboundDelivery, feedback_record
+
+__all__ = ["OutboundDelivery", "feedback_record"]
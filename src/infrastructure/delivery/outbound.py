@@ -0,0 +1,515 @@
+"""
+Outbound Delivery - Envío del feedback generado a otros servicios
+
+Cada feedback generado se publica como un registro JSON a uno o más
+servicios downstream (ej: progreso, notificaciones) sin agregar
+latencia al request:
+
+- `publish()` solo agrega el registro a una cola en memoria por destino
+- Si la cola está llena, el registro se escribe a un segmento de
+  "spill" en disco (JSONL) y se reenvía cuando la cola se vacía; los
+  segmentos que queden de una ejecución anterior se reenvían al arrancar
+- Un hilo por destino agrupa hasta `batch_size` registros por POST
+  (`{"records": [...]}`) sobre un httpx.Client con pool de conexiones
+- Errores de red, 408, 425, 429 y 5xx se reintentan con backoff
+  exponencial + jitter (respetando Retry-After); agotados los
+  reintentos, o ante otro 4xx, el lote va al dead-letter del destino
+- Al cerrar se envía lo pendiente hasta `shutdown_timeout`; lo que no
+  llegue a salir queda en el spill para el próximo arranque
+
+La entrega es at-least-once: cada registro lleva un `event_id` para
+que el destino descarte duplicados. El orden es aproximado (el spill
+se reenvía después de la cola en memoria).
+
+Layout en disco, un directorio por destino:
+
+    <directory>/<destino>/
+        spill-000001.jsonl      # registros pendientes
+        dead-letter.jsonl       # lotes descartados, con el error
+"""
+
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from collections import deque
+from email.utils import parsedate_to_datetime
+from typing import Deque, List, Optional
+
+from src.domain.models import AnalysisContext, Feedback
+
+
+EVENT_FEEDBACK_GENERATED = "feedback.generated"
+
+RETRYABLE_STATUS = {408, 425, 429}
+
+SPILL_PREFIX = "spill-"
+DEAD_LETTER_FILE = "dead-letter.jsonl"
+
+
+def feedback_record(context: AnalysisContext, feedback: Feedback, source: str) -> dict:
+    """
+    Registro de delivery de un feedback generado.
+
+    Args:
+        context: Contexto del intento
+        feedback: Feedback entregado al usuario
+        source: Endpoint de origen (ej: "/feedback/generate")
+
+    Returns:
+        dict: Registro serializable a JSON
+    """
+    return {
+        "event_id": uuid.uuid4().hex,
+        "event_type": EVENT_FEEDBACK_GENERATED,
+        "emitted_at": time.time(),
+        "source": source,
+        "attempt_id": context.attempt_id,
+        "user_id": context.user_id,
+        "exercise_id": context.exercise_id,
+        "exercise_type": context.exercise_type,
+        "overall_score": context.overall_score,
+        "passed": context.passed,
+        "stars_earned": context.stars_earned,
+        "unlocked_next": context.unlocked_next,
+        "feedback": feedback.to_dict(),
+    }
+
+
+class _Channel:
+    """Cola, spill y hilo de envío de un destino"""
+
+    def __init__(self, delivery: "OutboundDelivery", url: str):
+        self.delivery = delivery
+        self.url = url
+        self.name = _target_name(url)
+        self.directory = os.path.join(delivery.directory, self.name)
+        os.makedirs(self.directory, exist_ok=True)
+
+        self._memory: Deque[dict] = deque()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closing = threading.Event()
+        self._deadline: Optional[float] = None
+        self._in_flight: Optional[List[dict]] = None
+        # close() ya escribió el lote en vuelo al spill: _send no debe repetirlo
+        self._in_flight_handed_off = False
+
+        # Spill: segmento abierto para escritura + segmentos cerrados a reenviar
+        self._sealed: Deque[str] = deque(_spill_segments(self.directory))
+        self._spill_file = None
+        self._spill_path: Optional[str] = None
+        self._spill_lines = 0
+        self._next_spill_number = _last_spill_number(self._sealed) + 1
+
+        self.published = 0
+        self.spilled = 0
+        self.delivered = 0
+        self.batches_sent = 0
+        self.retries = 0
+        self.dead_lettered = 0
+        self.dropped = 0
+        self.last_error: Optional[str] = None
+        self.recovered = sum(_count_lines(path) for path in self._sealed)
+
+        self._thread = threading.Thread(
+            target=self._run,
+            name=f"delivery-{self.name}",
+            daemon=True
+        )
+        self._thread.start()
+
+    # ------------------------------------------------------------------
+    # Request path
+    # ------------------------------------------------------------------
+
+    def publish(self, record: dict) -> None:
+        with self._lock:
+            self.published += 1
+            if len(self._memory) < self.delivery.max_pending and not self._closing.is_set():
+                self._memory.append(record)
+                if len(self._memory) >= self.delivery.batch_size:
+                    self._wake.set()
+                return
+            self._spill([record])
+
+    # ------------------------------------------------------------------
+    # Spill
+    # ------------------------------------------------------------------
+
+    def _spill(self, records: List[dict]) -> None:
+        """Escribe registros al segmento de spill abierto (llamar con _lock)"""
+        try:
+            if self._spill_file is None:
+                self._spill_path = os.path.join(
+                    self.directory, f"{SPILL_PREFIX}{self._next_spill_number:06d}.jsonl"
+                )
+                self._next_spill_number += 1
+                self._spill_file = open(self._spill_path, "a", encoding="utf-8")
+                self._spill_lines = 0
+            # Escritura con buffer: el flush lo hace el hilo de envío
+            for record in records:
+                self._spill_file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self._spill_lines += len(records)
+            self.spilled += len(records)
+            if self._spill_lines >= self.delivery.spill_segment_max_records:
+                self._seal_spill()
+        except Exception as e:
+            self.dropped += len(records)
+            self.last_error = f"spill: {e}"
+            print(f"⚠️ Error escribiendo spill de delivery ({self.name}): {e}")
+
+    def _seal_spill(self) -> None:
+        """Cierra el segmento abierto y lo deja para reenvío (llamar con _lock)"""
+        if self._spill_file is None:
+            return
+        self._spill_file.close()
+        self._sealed.append(self._spill_path)
+        self._spill_file = None
+        self._spill_path = None
+        self._spill_lines = 0
+
+    def _flush_spill(self) -> None:
+        with self._lock:
+            if self._spill_file is not None:
+                try:
+                    self._spill_file.flush()
+                except Exception as e:
+                    self.last_error = f"spill: {e}"
+
+    # ------------------------------------------------------------------
+    # Hilo de envío
+    # ------------------------------------------------------------------
+
+    def _take_batch(self) -> List[dict]:
+        with self._lock:
+            count = min(len(self._memory), self.delivery.batch_size)
+            return [self._memory.popleft() for _ in range(count)]
+
+    def _run(self) -> None:
+        while True:
+            if self._deadline is not None and time.monotonic() >= self._deadline:
+                return
+            batch = self._take_batch()
+            if batch:
+                self._send(batch)
+                continue
+
+            if self._closing.is_set():
+                return
+
+            # Cola en memoria vacía: reenviar el spill
+            if self._replay_spill():
+                continue
+
+            self._flush_spill()
+            self._wake.wait(self.delivery.flush_interval)
+            self._wake.clear()
+
+    def _replay_spill(self) -> bool:
+        """Reenvía el segmento de spill más antiguo; False si no hay"""
+        with self._lock:
+            if not self._sealed and self._spill_lines:
+                self._seal_spill()
+            if not self._sealed:
+                return False
+            path = self._sealed[0]
+
+        records = []
+        try:
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        records.append(json.loads(line))
+                    except ValueError:
+                        # Línea cortada por un cierre abrupto
+                        self.dropped += 1
+        except FileNotFoundError:
+            pass
+
+        size = self.delivery.batch_size
+        for start in range(0, len(records), size):
+            if self._closing.is_set() or self._send(records[start:start + size], spill_on_stop=False) is None:
+                # Cerrando: el resto del segmento queda en disco para el próximo arranque
+                _rewrite(path, records[start:])
+                return True
+
+        with self._lock:
+            self._sealed.popleft()
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        return True
+
+    def _send(self, batch: List[dict], spill_on_stop: bool = True) -> Optional[bool]:
+        """
+        Envía un lote con reintentos.
+
+        Args:
+            batch: Registros a enviar
+            spill_on_stop: Si al cerrar el lote no se pudo enviar, escribirlo
+                al spill (False si el lote ya viene del spill)
+
+        Returns:
+            bool: True si el destino lo aceptó, False si fue al dead-letter,
+                None si se interrumpió por el cierre
+        """
+        delivery = self.delivery
+        body = json.dumps({"records": batch}, ensure_ascii=False).encode("utf-8")
+        # Un lote del spill sigue en su segmento: close() no debe copiarlo
+        with self._lock:
+            self._in_flight = batch if spill_on_stop else None
+        attempt = 0
+        try:
+            while True:
+                retry_after = None
+                try:
+                    response = delivery.client.post(self.url, content=body, headers=delivery.headers)
+                    status = response.status_code
+                    if 200 <= status < 300:
+                        self.delivered += len(batch)
+                        self.batches_sent += 1
+                        return True
+                    error = f"HTTP {status}"
+                    if status not in RETRYABLE_STATUS and status < 500:
+                        self._dead_letter(batch, error)
+                        return False
+                    retry_after = _retry_after_seconds(response.headers.get("retry-after"))
+                except Exception as e:
+                    error = f"{type(e).__name__}: {e}"
+
+                self.last_error = error
+                attempt += 1
+                if self._closing.is_set():
+                    # Cerrando: no esperar backoff, queda para el próximo arranque
+                    break
+                if attempt > delivery.max_retries:
+                    self._dead_letter(batch, error)
+                    return False
+
+                self.retries += 1
+                delay = min(delivery.backoff_max, delivery.backoff_base * 2 ** (attempt - 1))
+                delay *= random.uniform(0.5, 1.0)
+                if retry_after is not None:
+                    delay = max(delay, min(retry_after, delivery.backoff_max))
+                if self._closing.wait(delay):
+                    break
+        finally:
+            with self._lock:
+                self._in_flight = None
+
+        with self._lock:
+            if spill_on_stop and not self._in_flight_handed_off:
+                self._spill(batch)
+        return None
+
+    def _dead_letter(self, batch: List[dict], error: str) -> None:
+        self.dead_lettered += len(batch)
+        self.last_error = error
+        entry = {"ts": time.time(), "url": self.url, "error": error, "records": batch}
+        try:
+            with open(os.path.join(self.directory, DEAD_LETTER_FILE), "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        except Exception as e:
+            print(f"⚠️ Error escribiendo dead-letter de delivery ({self.name}): {e}")
+        print(f"⚠️ Delivery a {self.url}: {len(batch)} registros al dead-letter ({error})")
+
+    # ------------------------------------------------------------------
+    # Cierre y métricas
+    # ------------------------------------------------------------------
+
+    def close(self, deadline: float) -> None:
+        self._deadline = deadline
+        self._closing.set()
+        self._wake.set()
+        # Un lote en vuelo sigue su POST (acotado por el timeout del cliente)
+        self._thread.join(timeout=max(0.0, deadline - time.monotonic()))
+
+        with self._lock:
+            pending = list(self._memory)
+            self._memory.clear()
+            if self._thread.is_alive() and self._in_flight:
+                # El POST no terminó a tiempo: puede llegar duplicado
+                pending = list(self._in_flight) + pending
+                self._in_flight_handed_off = True
+            if pending:
+                self._spill(pending)
+            self._seal_spill()
+
+    def stats(self) -> dict:
+        with self._lock:
+            in_memory = len(self._memory)
+            spill_segments = len(self._sealed) + (1 if self._spill_file is not None else 0)
+        # La URL puede llevar credenciales y /metrics es público: el
+        # destino se identifica por name (hash de la URL)
+        last_error = self.last_error
+        if last_error is not None:
+            last_error = last_error.replace(self.url, self.name)
+        return {
+            "published": self.published,
+            "delivered": self.delivered,
+            "batches_sent": self.batches_sent,
+            "retries": self.retries,
+            "dead_lettered": self.dead_lettered,
+            "spilled": self.spilled,
+            "recovered_from_disk": self.recovered,
+            "dropped": self.dropped,
+            "pending_in_memory": in_memory,
+            "spill_segments": spill_segments,
+            "last_error": last_error,
+        }
+
+
+class OutboundDelivery:
+    """
+    Publica registros a uno o más destinos HTTP.
+
+    `publish()` nunca hace I/O de red y nunca bloquea el request (con la
+    cola llena escribe a un archivo con buffer). Cada destino recibe
+    todos los registros, con su propia cola y reintentos.
+    """
+
+    def __init__(
+        self,
+        urls: List[str],
+        directory: str,
+        batch_size: int = 50,
+        flush_interval: float = 0.5,
+        max_pending: int = 5000,
+        max_retries: int = 6,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30.0,
+        timeout_seconds: float = 5.0,
+        shutdown_timeout: float = 5.0,
+        spill_segment_max_records: int = 10000,
+        auth_token: Optional[str] = None
+    ):
+        """
+        Inicializa el cliente HTTP y arranca un hilo por destino.
+
+        Args:
+            urls: Endpoints que reciben los POST
+            directory: Directorio base del spill y el dead-letter
+            batch_size: Máximo de registros por POST
+            flush_interval: Segundos máximos que un registro espera a completar lote
+            max_pending: Registros en memoria por destino antes de ir a disco
+            max_retries: Reintentos por lote antes del dead-letter
+            backoff_base: Espera del primer reintento (se duplica en cada uno)
+            backoff_max: Espera máxima entre reintentos
+            timeout_seconds: Timeout de cada POST
+            shutdown_timeout: Tiempo para enviar lo pendiente al cerrar
+            spill_segment_max_records: Registros por segmento de spill
+            auth_token: Token Bearer para los destinos (opcional)
+        """
+        # httpx solo se importa si el delivery está habilitado
+        import httpx
+
+        self.directory = directory
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.shutdown_timeout = shutdown_timeout
+        self.spill_segment_max_records = spill_segment_max_records
+
+        self.headers = {"Content-Type": "application/json"}
+        if auth_token:
+            self.headers["Authorization"] = f"Bearer {auth_token}"
+
+        self.client = httpx.Client(
+            timeout=timeout_seconds,
+            limits=httpx.Limits(max_connections=len(urls) * 2, max_keepalive_connections=len(urls) * 2)
+        )
+
+        os.makedirs(directory, exist_ok=True)
+        self.channels = [_Channel(self, url) for url in urls]
+
+    def publish(self, record: dict) -> None:
+        """
+        Encola un registro para todos los destinos.
+
+        Args:
+            record: Registro serializable a JSON (ver feedback_record)
+        """
+        for channel in self.channels:
+            channel.publish(record)
+
+    def close(self) -> None:
+        """Envía lo pendiente (hasta shutdown_timeout), deja el resto en disco y cierra"""
+        deadline = time.monotonic() + self.shutdown_timeout
+        for channel in self.channels:
+            channel._deadline = deadline
+            channel._closing.set()
+            channel._wake.set()
+        for channel in self.channels:
+            channel.close(deadline)
+        self.client.close()
+
+    def stats(self) -> dict:
+        """Métricas por destino"""
+        return {
+            "batch_size": self.batch_size,
+            "max_pending": self.max_pending,
+            "targets": {channel.name: channel.stats() for channel in self.channels},
+        }
+
+
+def _target_name(url: str) -> str:
+    """Nombre de directorio estable para un destino"""
+    return hashlib.sha1(url.encode()).hexdigest()[:12]
+
+
+def _spill_segments(directory: str) -> List[str]:
+    names = sorted(
+        name for name in os.listdir(directory)
+        if name.startswith(SPILL_PREFIX) and name.endswith(".jsonl")
+    )
+    return [os.path.join(directory, name) for name in names]
+
+
+def _last_spill_number(paths) -> int:
+    numbers = [0]
+    for path in paths:
+        stem = os.path.basename(path)[len(SPILL_PREFIX):-len(".jsonl")]
+        if stem.isdigit():
+            numbers.append(int(stem))
+    return max(numbers)
+
+
+def _count_lines(path: str) -> int:
+    try:
+        with open(path, "rb") as f:
+            return sum(1 for line in f if line.strip())
+    except OSError:
+        return 0
+
+
+def _rewrite(path: str, records: List[dict]) -> None:
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    os.replace(tmp, path)
+
+
+def _retry_after_seconds(value: Optional[str]) -> Optional[float]:
+    """Retry-After en segundos o como fecha HTTP"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
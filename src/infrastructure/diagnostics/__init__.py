@@ -0,0 +1,12 @@
+from .profiler import SamplingProfiler, ProfilerBusyError
+from .heap import top_allocations, HeapProfileBusyError
+from .loop_monitor import LoopMonitor, LagHistogram
+
+__all__ = [
+    "SamplingProfiler",
+    "ProfilerBusyError",
+    "top_allocations",
+    "HeapProfileBusyError",
+    "LoopMonitor",
+    "LagHistogram"
+]
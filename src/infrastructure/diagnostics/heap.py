@@ -0,0 +1,93 @@
+"""
+Heap - Principales puntos de asignación de memoria con tracemalloc
+
+tracemalloc solo se activa durante la ventana pedida (tiene un costo
+alto por asignación), salvo que el proceso ya lo tenga activo (ej:
+PYTHONTRACEMALLOC=1), en cuyo caso se usa tal cual y no se detiene.
+"""
+
+import asyncio
+import threading
+import tracemalloc
+from typing import List
+
+
+KEY_TYPES = ("lineno", "filename", "traceback")
+
+_heap_lock = threading.Lock()
+
+
+class HeapProfileBusyError(Exception):
+    """Ya hay un snapshot de heap en curso"""
+
+
+async def top_allocations(
+    seconds: float = 10.0,
+    limit: int = 25,
+    key_type: str = "lineno",
+    frames: int = 1
+) -> dict:
+    """
+    Traza asignaciones durante `seconds` y retorna las principales.
+
+    Si tracemalloc ya estaba activo, el snapshot se toma de inmediato
+    e incluye todo lo asignado desde que se activó.
+
+    Args:
+        seconds: Ventana de trazado (ignorado si ya estaba activo)
+        limit: Cantidad de entradas a retornar
+        key_type: "lineno" | "filename" | "traceback"
+        frames: Frames por traceback (solo si tracemalloc no estaba activo)
+
+    Returns:
+        dict: Totales y las entradas con size/count/traceback
+
+    Raises:
+        HeapProfileBusyError: Si otro snapshot está en curso
+    """
+    if key_type not in KEY_TYPES:
+        raise ValueError(f"key_type debe ser uno de: {KEY_TYPES}")
+    if not _heap_lock.acquire(blocking=False):
+        raise HeapProfileBusyError("Ya hay un snapshot de heap en curso")
+
+    started_here = False
+    loop = asyncio.get_running_loop()
+    try:
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+            started_here = True
+            await asyncio.sleep(seconds)
+
+        # Snapshot y agrupación pueden tardar con heaps grandes: fuera del loop
+        stats, current, peak = await loop.run_in_executor(None, _collect, key_type)
+    finally:
+        if started_here:
+            tracemalloc.stop()
+        _heap_lock.release()
+
+    return {
+        "window_seconds": seconds if started_here else None,
+        "already_tracing": not started_here,
+        "traced_current_bytes": current,
+        "traced_peak_bytes": peak,
+        "total_bytes": sum(stat.size for stat in stats),
+        "top": [_stat_to_dict(stat) for stat in stats[:limit]],
+    }
+
+
+def _collect(key_type: str):
+    snapshot = tracemalloc.take_snapshot().filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    ))
+    current, peak = tracemalloc.get_traced_memory()
+    return snapshot.statistics(key_type), current, peak
+
+
+def _stat_to_dict(stat) -> dict:
+    traceback: List[str] = [f"{frame.filename}:{frame.lineno}" for frame in stat.traceback]
+    return {
+        "size_bytes": stat.size,
+        "count": stat.count,
+        "traceback": traceback,
+    }
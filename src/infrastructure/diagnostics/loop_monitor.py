@@ -0,0 +1,196 @@
+"""
+Loop Monitor - Lag del event loop y detección de bloqueos
+
+Dos piezas:
+
+- Una tarea en el loop duerme `interval` segundos y mide cuánto tarde
+  despierta. Ese retraso (lag de scheduling) va a un histograma.
+- Un thread watchdog revisa el heartbeat de esa tarea. Si el loop no
+  lo actualiza en `block_threshold` segundos, el loop está bloqueado:
+  se captura el stack del thread del loop (lo que lo está bloqueando)
+  y se loguea.
+"""
+
+import asyncio
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Deque, List, Optional
+
+
+# Límites superiores de los buckets en segundos (estilo Prometheus)
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class LagHistogram:
+    """Histograma de lag con buckets fijos"""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # último = +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimación del cuantil: límite superior del bucket que lo contiene"""
+        if not self.count:
+            return None
+        target = q * self.count
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            if cumulative >= target:
+                return bound
+        return self.max
+
+    def to_dict(self) -> dict:
+        cumulative = 0
+        buckets = {}
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            buckets[f"le_{bound:g}"] = cumulative
+        buckets["le_inf"] = self.count
+        return {
+            "count": self.count,
+            "sum_seconds": round(self.sum, 6),
+            "max_seconds": round(self.max, 6),
+            "p50_seconds": self.quantile(0.5),
+            "p99_seconds": self.quantile(0.99),
+            "buckets": buckets,
+        }
+
+
+class LoopMonitor:
+    """
+    Monitor de lag y bloqueos del event loop.
+
+    start() debe llamarse desde el loop a monitorear (ej: en el
+    evento de startup).
+    """
+
+    def __init__(
+        self,
+        interval: float = 0.05,
+        block_threshold: float = 0.25,
+        max_stalls: int = 20
+    ):
+        """
+        Args:
+            interval: Período de la tarea de medición (segundos)
+            block_threshold: Bloqueo mínimo para capturar el stack (segundos)
+            max_stalls: Bloqueos recientes que se conservan (stacks en /debug/stalls)
+        """
+        self.interval = interval
+        self.block_threshold = block_threshold
+        self.histogram = LagHistogram()
+        self.stalls: Deque[dict] = deque(maxlen=max_stalls)
+        self.stall_count = 0
+
+        self._heartbeat = time.monotonic()
+        self._loop_thread_id: Optional[int] = None
+        self._task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._open_stall: Optional[dict] = None
+
+    def start(self) -> None:
+        """Arranca la tarea de medición y el watchdog"""
+        if self._task is not None:
+            return
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._task = asyncio.get_running_loop().create_task(self._measure())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._watchdog.start()
+
+    async def stop(self) -> None:
+        """Detiene la medición y el watchdog"""
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._watchdog is not None:
+            self._watchdog.join(timeout=1)
+            self._watchdog = None
+
+    def stats(self) -> dict:
+        """Histograma de lag y bloqueos recientes, sin stacks (/metrics es público)"""
+        return {
+            "lag": self.histogram.to_dict(),
+            "block_threshold_seconds": self.block_threshold,
+            "stalls": self.stall_count,
+            "recent_stalls": [
+                {key: value for key, value in stall.items() if key != "stack"}
+                for stall in self.stalls
+            ],
+        }
+
+    def recent_stalls(self) -> List[dict]:
+        """Bloqueos recientes con el stack del loop (solo para /debug)"""
+        return [dict(stall) for stall in self.stalls]
+
+    async def _measure(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            scheduled = loop.time()
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - scheduled - self.interval)
+            self._heartbeat = time.monotonic()
+            self.histogram.observe(lag)
+
+            stall = self._open_stall
+            if stall is not None:
+                # El watchdog vio este bloqueo; ahora se conoce su duración total
+                stall["duration_seconds"] = round(lag, 3)
+                self._open_stall = None
+                print(f"⚠️ Event loop bloqueado {lag * 1000:.0f}ms (ver stack arriba)")
+
+    def _watch(self) -> None:
+        check_every = self.block_threshold / 2
+        reported_heartbeat = None
+        while not self._stop.wait(check_every):
+            heartbeat = self._heartbeat
+            blocked_for = time.monotonic() - heartbeat - self.interval
+            if blocked_for < self.block_threshold or heartbeat == reported_heartbeat:
+                continue
+
+            # Un reporte por bloqueo: hasta que el heartbeat avance
+            reported_heartbeat = heartbeat
+            frame = sys._current_frames().get(self._loop_thread_id)
+            stack = _format_stack(frame)
+            stall = {
+                "detected_at": time.time(),
+                "blocked_for_seconds": round(blocked_for, 3),
+                "duration_seconds": None,
+                "stack": stack[-12:],
+            }
+            self.stall_count += 1
+            self.stalls.append(stall)
+            self._open_stall = stall
+
+            print(f"🐢 Event loop bloqueado hace {blocked_for * 1000:.0f}ms, stack:\n"
+                  + "\n".join(stack))
+
+
+def _format_stack(frame) -> List[str]:
+    if frame is None:
+        return []
+    return [line.rstrip() for line in traceback.format_stack(frame)]
@@ -0,0 +1,138 @@
+"""
+Sampling Profiler - Muestreo de stacks de todos los threads
+
+Un thread dedicado lee sys._current_frames() a frecuencia fija durante
+la ventana pedida, así que se ven tanto el event loop como los threads
+del executor (ej: los que ejecutan GeminiClient._sync_generate).
+
+La salida es el formato "collapsed stacks" de flamegraph.pl /
+speedscope / inferno: una línea por stack con frames separados por
+';' (de la raíz a la hoja) y la cantidad de muestras al final.
+
+No hay costo cuando no se está perfilando: no se instala ningún hook.
+"""
+
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Dict, Optional
+
+
+class ProfilerBusyError(Exception):
+    """Ya hay un perfil en curso en este proceso"""
+
+
+class SamplingProfiler:
+    """
+    Perfilador por muestreo de un solo uso.
+
+    Uso:
+        profiler = SamplingProfiler(hz=100)
+        profiler.start()
+        ...
+        profiler.stop()
+        text = profiler.collapsed()
+    """
+
+    # Un solo perfil a la vez por proceso
+    _active_lock = threading.Lock()
+
+    def __init__(self, hz: int = 100, idle: bool = False):
+        """
+        Args:
+            hz: Muestras por segundo
+            idle: Incluir threads ociosos (esperando en locks / select)
+        """
+        self.interval = 1.0 / hz
+        self.idle = idle
+        self.samples = 0
+        self.stacks: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._root = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(
+            os.path.abspath(__file__)
+        ))))
+
+    def start(self) -> None:
+        """
+        Arranca el thread de muestreo.
+
+        Raises:
+            ProfilerBusyError: Si otro perfil está en curso
+        """
+        if not SamplingProfiler._active_lock.acquire(blocking=False):
+            raise ProfilerBusyError("Ya hay un perfil en curso")
+        self._thread = threading.Thread(target=self._run, name="sampling-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Detiene el muestreo y libera el perfilador"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+            SamplingProfiler._active_lock.release()
+
+    def collapsed(self) -> str:
+        """Stacks en formato collapsed, de más a menos muestras"""
+        return "\n".join(f"{stack} {count}" for stack, count in self.stacks.most_common())
+
+    def _run(self) -> None:
+        own_ident = threading.get_ident()
+        next_sample = time.perf_counter()
+        while not self._stop.is_set():
+            names = self._thread_names()
+            for ident, frame in sys._current_frames().items():
+                if ident == own_ident:
+                    continue
+                stack = self._collapse(frame)
+                if stack is None:
+                    continue
+                self.stacks[f"{names.get(ident, ident)};{stack}"] += 1
+            self.samples += 1
+
+            next_sample += self.interval
+            delay = next_sample - time.perf_counter()
+            if delay > 0:
+                self._stop.wait(delay)
+            else:
+                # El muestreo va atrasado: no acumular ráfagas
+                next_sample = time.perf_counter()
+
+    def _collapse(self, frame) -> Optional[str]:
+        if not self.idle and _is_idle(frame):
+            return None
+        frames = []
+        while frame is not None:
+            code = frame.f_code
+            frames.append(f"{code.co_name} ({self._short_path(code.co_filename)}:{frame.f_lineno})")
+            frame = frame.f_back
+        frames.reverse()
+        return ";".join(frames)
+
+    def _short_path(self, filename: str) -> str:
+        if filename.startswith(self._root):
+            return os.path.relpath(filename, self._root)
+        # site-packages/<paquete>/... o stdlib: basta con las últimas partes
+        parts = filename.replace("\\", "/").split("/")
+        return "/".join(parts[-2:])
+
+    @staticmethod
+    def _thread_names() -> Dict[int, str]:
+        return {thread.ident: thread.name for thread in threading.enumerate()}
+
+
+# Hojas (función, archivo) de un thread que no está trabajando
+_IDLE_LEAVES = {
+    ("wait", "threading.py"),
+    ("select", "selectors.py"),
+    ("_worker", "thread.py"),
+    ("get", "queue.py"),
+}
+
+
+def _is_idle(frame) -> bool:
+    code = frame.f_code
+    return (code.co_name, os.path.basename(code.co_filename)) in _IDLE_LEAVES
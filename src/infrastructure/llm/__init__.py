@@ -1,5 +1,31 @@
 
 from .gemini_client import GeminiClient
-from .prompt_templates import SYSTEM_PROMPT, build_user_prompt
+from .prompt_templates import SYSTEM_PROMPT, STRUCTURED_SYSTEM_PROMPT, build_user_prompt
+from .response_schema import schema_from_model
+from .json_repair import repair_json, JsonRepairError, JsonRepairStats
+from .output_guardrail import OutputGuardrail
+from .concurrency_limit import AdaptiveConcurrencyLimit, LLMOverloadedError
+from .scheduler import (
+    PriorityScheduler,
+    priority_scope,
+    PRIORITY_INTERACTIVE,
+    PRIORITY_BATCH
+)
 
-__all__ = ["GeminiClient", "SYSTEM_PROMPT", "build_user_prompt"]
\ No newline at end of file
+__all__ = [
+    "GeminiClient",
+    "SYSTEM_PROMPT",
+    "STRUCTURED_SYSTEM_PROMPT",
+    "build_user_prompt",
+    "schema_from_model",
+    "repair_json",
+    "JsonRepairError",
+    "JsonRepairStats",
+    "OutputGuardrail",
+    "AdaptiveConcurrencyLimit",
+    "LLMOverloadedError",
+    "PriorityScheduler",
+    "priority_scope",
+    "PRIORITY_INTERACTIVE",
+    "PRIORITY_BATCH"
+]
\ No newline at end of file
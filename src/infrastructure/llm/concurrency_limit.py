@@ -0,0 +1,181 @@
+"""
+Adaptive Concurrency Limit - Límite de llamadas al LLM guiado por latencia
+
+Un límite fijo desperdicia capacidad cuando Gemini responde rápido y,
+cuando se pone lento, deja que los requests se acumulen en el executor
+hasta que todos vencen por timeout. El límite se ajusta con AIMD:
+
+- Aumento aditivo: cada llamada exitosa y rápida con el límite en uso
+  suma 1/limit (≈ +1 por "ronda" de llamadas)
+- Disminución multiplicativa: una llamada lenta (latencia mayor que
+  `latency_tolerance` × la mediana de referencia) o fallida por
+  sobrecarga (timeout, 429, 5xx) multiplica el límite por `backoff_ratio`
+  (como mucho una vez por ventana de latencia, para no colapsar por una
+  ráfaga de respuestas que ya estaban en vuelo)
+
+La latencia se mide por intento al upstream (observe), sin la espera
+en el scheduler ni el backoff entre reintentos: esos tiempos son
+locales y no dicen nada de Gemini. La mediana de referencia sale de
+una ventana larga de latencias de intentos exitosos, así sigue los
+cambios de régimen lentamente.
+
+Con el límite alcanzado la llamada no se encola: levanta
+LLMOverloadedError de inmediato y el caller decide (el use case usa el
+feedback algorítmico; un endpoint solo-LLM responde 503 + Retry-After).
+"""
+
+import math
+import time
+from typing import Optional
+
+from .hedging import LatencyTracker
+from .retry_policy import ErrorClass, classify_error, DeadlineExceededError
+
+
+class LLMOverloadedError(Exception):
+    """Llamada al LLM rechazada por el límite de concurrencia"""
+
+    # Es carga local de esta instancia, no un fallo de la clave: la
+    # cache de feedback no lo guarda como fallo (ver TieredFeedbackCache)
+    cache_failure = False
+
+    def __init__(self, limit: int, retry_after: float):
+        super().__init__(f"LLM saturado (límite de concurrencia {limit})")
+        self.limit = limit
+        self.retry_after = retry_after
+
+
+class AdaptiveConcurrencyLimit:
+    """
+    Límite AIMD de llamadas al LLM en vuelo.
+
+    Se usa desde el event loop (no es thread-safe).
+    """
+
+    def __init__(
+        self,
+        initial_limit: int = 8,
+        min_limit: int = 1,
+        max_limit: int = 64,
+        backoff_ratio: float = 0.9,
+        latency_tolerance: float = 2.0,
+        min_samples: int = 20,
+        window: int = 500
+    ):
+        """
+        Args:
+            initial_limit: Límite inicial
+            min_limit: Límite mínimo (siempre se deja pasar al menos esto)
+            max_limit: Límite máximo
+            backoff_ratio: Factor de disminución ante latencia alta o sobrecarga
+            latency_tolerance: Múltiplo de la mediana a partir del cual una
+                llamada cuenta como lenta
+            min_samples: Latencias necesarias antes de juzgar por latencia
+            window: Tamaño de la ventana de latencias de referencia
+        """
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff_ratio = backoff_ratio
+        self.latency_tolerance = latency_tolerance
+        self.min_samples = min_samples
+
+        self._limit = float(max(min_limit, min(initial_limit, max_limit)))
+        self.in_flight = 0
+        self.latencies = LatencyTracker(window=window)
+        self._last_decrease = 0.0
+
+        self.accepted = 0
+        self.shed = 0
+        self.increases = 0
+        self.decreases = 0
+
+    @property
+    def limit(self) -> int:
+        return max(self.min_limit, int(self._limit))
+
+    def acquire(self) -> None:
+        """
+        Toma un lugar sin esperar (liberar con release()).
+
+        Raises:
+            LLMOverloadedError: Si el límite está alcanzado
+        """
+        if self.in_flight >= self.limit:
+            self.shed += 1
+            raise LLMOverloadedError(self.limit, self.retry_after())
+        self.in_flight += 1
+        self.accepted += 1
+
+    def release(self) -> None:
+        """Libera el lugar tomado con acquire()"""
+        self.in_flight -= 1
+
+    def observe(self, latency: float, error: Optional[BaseException] = None) -> None:
+        """
+        Ajusta el límite con el resultado de un intento al upstream.
+
+        Se llama con el lugar todavía tomado (entre acquire y release).
+
+        Args:
+            latency: Segundos del intento, sin esperas locales
+            error: Excepción del intento, o None si fue exitoso
+        """
+        in_flight = self.in_flight
+        now = time.monotonic()
+
+        if error is not None:
+            if _is_overload(error):
+                self._decrease(now)
+            return
+
+        baseline = self.latencies.percentile(50) if len(self.latencies) >= self.min_samples else None
+        self.latencies.record(latency)
+
+        if baseline is not None and latency > baseline * self.latency_tolerance:
+            self._decrease(now)
+        elif in_flight >= self.limit / 2:
+            # Solo crecer si el límite se está usando
+            before = self.limit
+            self._limit = min(float(self.max_limit), self._limit + 1.0 / self._limit)
+            if self.limit > before:
+                self.increases += 1
+
+    def retry_after(self) -> float:
+        """Segundos sugeridos al cliente: la mediana de latencia (mínimo 1)"""
+        baseline = self.latencies.percentile(50)
+        return float(max(1, math.ceil(baseline))) if baseline is not None else 1.0
+
+    def stats(self) -> dict:
+        baseline = self.latencies.percentile(50)
+        return {
+            "limit": self.limit,
+            "min_limit": self.min_limit,
+            "max_limit": self.max_limit,
+            "in_flight": self.in_flight,
+            "accepted": self.accepted,
+            "shed": self.shed,
+            "shed_ratio": (
+                round(self.shed / (self.accepted + self.shed), 4)
+                if self.accepted + self.shed else None
+            ),
+            "increases": self.increases,
+            "decreases": self.decreases,
+            "baseline_latency_seconds": round(baseline, 4) if baseline is not None else None,
+        }
+
+    def _decrease(self, now: float) -> None:
+        # Una disminución por "ronda": las llamadas que ya estaban en vuelo
+        # cuando empezó la lentitud no vuelven a recortar el límite
+        baseline = self.latencies.percentile(50) or 0.0
+        if now - self._last_decrease < baseline:
+            return
+        self._last_decrease = now
+        self._limit = max(float(self.min_limit), self._limit * self.backoff_ratio)
+        self.decreases += 1
+
+
+def _is_overload(error: BaseException) -> bool:
+    """Timeouts, cuota y 5xx indican sobrecarga; el resto no mueve el límite"""
+    if isinstance(error, DeadlineExceededError):
+        return True
+    return classify_error(error) in (ErrorClass.QUOTA, ErrorClass.TRANSIENT)
@@ -3,9 +3,52 @@ Google Gemini API Client
 """
 
 import os
+import time
 import asyncio
-from typing import Optional
-import google.generativeai as genai
+import threading
+from typing import List, Optional
+
+from .retry_policy import RetryPolicy, RetryState, ErrorClass, BlockedResponseError, DeadlineExceededError
+from .hedging import HedgePolicy
+from .model_discovery import cache_key, load_cached_model, save_cached_model, discover_model
+from .scheduler import PriorityScheduler, current_priority, current_user
+from .concurrency_limit import AdaptiveConcurrencyLimit
+from src.infrastructure.tracing import run_in_executor_traced, span
+
+
+# Configuración de safety para ser menos restrictivo
+SAFETY_SETTINGS = [
+    {
+        "category": "HARM_CATEGORY_HARASSMENT",
+        "threshold": "BLOCK_NONE"
+    },
+    {
+        "category": "HARM_CATEGORY_HATE_SPEECH",
+        "threshold": "BLOCK_NONE"
+    },
+    {
+        "category": "HARM_CATEGORY_SEXUALLY_EXPLICIT",
+        "threshold": "BLOCK_NONE"
+    },
+    {
+        "category": "HARM_CATEGORY_DANGEROUS_CONTENT",
+        "threshold": "BLOCK_NONE"
+    },
+]
+
+# Modelos en orden de preferencia
+MODEL_NAMES_TO_TRY = [
+    "models/gemini-2.5-pro",             # Pro - mejor cuota
+    "models/gemini-pro-latest",          # Pro latest
+    "models/gemini-2.5-flash-lite",      # Flash lite
+    "models/gemini-flash-lite-latest",   # Flash lite latest
+    "models/gemini-2.0-flash",           # Flash 2.0
+]
+
+# Valores de Candidate.FinishReason
+FINISH_REASON_MAX_TOKENS = 2
+FINISH_REASON_RECITATION = 4
+FINISH_REASONS_SAFETY = {3, 7, 8, 9}  # SAFETY, BLOCKLIST, PROHIBITED_CONTENT, SPII
 
 
 class GeminiClient:
@@ -16,14 +59,48 @@ class GeminiClient:
     feedback personalizado.
     """
     
-    def __init__(self, api_key: Optional[str] = None):
+    # Gemini puede forzar salida JSON con response_schema
+    supports_response_schema = True
+    
+    def __init__(
+        self,
+        api_key: Optional[str] = None,
+        timeout_seconds: Optional[float] = None,
+        retry_policy: Optional[RetryPolicy] = None,
+        hedge_policy: Optional[HedgePolicy] = None,
+        model_cache_path: Optional[str] = None,
+        model_cache_ttl_seconds: float = 86400,
+        model_names: Optional[List[str]] = None,
+        executor=None,
+        scheduler: Optional[PriorityScheduler] = None,
+        concurrency_limit: Optional[AdaptiveConcurrencyLimit] = None
+    ):
         """
         Inicializa el cliente.
         
+        No importa el SDK ni crea el modelo: eso ocurre en el primer
+        uso (o en warm_up), para que el arranque del proceso sea rápido.
+        
         Args:
             api_key: API key de Google (opcional, usa env var si no se provee)
+            timeout_seconds: Tiempo total por completion, incluyendo reintentos
+            retry_policy: Política de reintentos (usa la default si no se provee)
+            hedge_policy: Política de hedging (None = sin hedging)
+            model_cache_path: Archivo donde cachear el modelo descubierto
+            model_cache_ttl_seconds: Validez del modelo cacheado
+            model_names: Modelos en orden de preferencia (default: MODEL_NAMES_TO_TRY)
+            executor: Thread pool para las llamadas al SDK (None = el default del loop)
+            scheduler: Scheduler de prioridades compartido (None = sin límite)
+            concurrency_limit: Límite adaptativo; con el límite alcanzado
+                generate_completion levanta LLMOverloadedError sin llamar al LLM
         """
         self.api_key = api_key or os.getenv("GOOGLE_API_KEY")
+        self.timeout_seconds = timeout_seconds
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.hedge_policy = hedge_policy
+        self.executor = executor
+        self.scheduler = scheduler
+        self.concurrency_limit = concurrency_limit
         
         if not self.api_key:
             raise ValueError(
@@ -31,36 +108,23 @@ class GeminiClient:
                 "Configúrala en .env o pásala al constructor."
             )
         
-        # Configurar Gemini
-        genai.configure(api_key=self.api_key)
-        
         # Probar modelos en orden de preferencia
         # Usar modelos estables con mejores límites de cuota
-        model_names_to_try = [
-            "models/gemini-2.5-pro",             # Pro - mejor cuota
-            "models/gemini-pro-latest",          # Pro latest
-            "models/gemini-2.5-flash-lite",      # Flash lite
-            "models/gemini-flash-lite-latest",   # Flash lite latest
-            "models/gemini-2.0-flash",           # Flash 2.0
-        ]
-        
-        self.model = None
-        self.model_name = None
-        
-        for model_name in model_names_to_try:
-            try:
-                self.model = genai.GenerativeModel(model_name)
-                self.model_name = model_name
-                print(f"✅ Usando modelo Gemini: {model_name}")
-                break
-            except Exception as e:
-                continue
+        self.model_names_to_try = list(model_names or MODEL_NAMES_TO_TRY)
         
-        if not self.model:
-            raise ValueError(
-                "No se pudo inicializar ningún modelo de Gemini. "
-                "Ejecuta 'python list_gemini_models.py' para ver modelos disponibles."
-            )
+        self.model_cache_path = model_cache_path
+        self.model_cache_ttl_seconds = model_cache_ttl_seconds
+        self._model_cache_key = cache_key(self.api_key, self.model_names_to_try)
+        
+        self._model = None
+        self._secondary_model = None
+        self._model_lock = threading.Lock()
+        
+        # Si hay un modelo cacheado, se conoce el nombre sin tocar el SDK
+        self.model_name = (
+            load_cached_model(model_cache_path, self._model_cache_key, model_cache_ttl_seconds)
+            or self.model_names_to_try[0]
+        )
         
         # Configuración de generación
         self.generation_config = {
@@ -70,12 +134,67 @@ class GeminiClient:
             "max_output_tokens": 1024,
         }
     
+    @property
+    def model(self):
+        """Modelo Gemini (se crea en el primer acceso)"""
+        if self._model is None:
+            with self._model_lock:
+                if self._model is None:
+                    self._model = self._create_model()
+        return self._model
+    
+    def warm_up(self) -> None:
+        """
+        Importa el SDK y crea el modelo por adelantado.
+        
+        Es bloqueante: llamarlo desde un thread pool.
+        """
+        _ = self.model
+    
+    def _create_model(self):
+        # Import diferido: google.generativeai arrastra gRPC y protobuf
+        import google.generativeai as genai
+        
+        genai.configure(api_key=self.api_key)
+        
+        cached = load_cached_model(
+            self.model_cache_path,
+            self._model_cache_key,
+            self.model_cache_ttl_seconds
+        )
+        if cached:
+            candidates = [cached]
+        else:
+            discovered = discover_model(genai, self.model_names_to_try)
+            if discovered:
+                save_cached_model(self.model_cache_path, self._model_cache_key, discovered)
+                candidates = [discovered]
+            else:
+                candidates = self.model_names_to_try
+        
+        for model_name in candidates:
+            try:
+                model = genai.GenerativeModel(model_name)
+                self.model_name = model_name
+                print(f"✅ Usando modelo Gemini: {model_name}")
+                return model
+            except Exception as e:
+                continue
+        
+        raise ValueError(
+            "No se pudo inicializar ningún modelo de Gemini. "
+            "Ejecuta 'python list_gemini_models.py' para ver modelos disponibles."
+        )
+    
     async def generate_completion(
         self,
         system_prompt: str,
         user_prompt: str,
         temperature: float = 0.7,
-        max_tokens: Optional[int] = None
+        max_tokens: Optional[int] = None,
+        deadline: Optional[float] = None,
+        response_schema: Optional[dict] = None,
+        usage: Optional[dict] = None
     ) -> str:
         """
         Genera una completion usando Gemini.
@@ -85,13 +204,23 @@ class GeminiClient:
             user_prompt: User prompt con el contexto específico
             temperature: Nivel de creatividad (0-1)
             max_tokens: Máximo de tokens (usa default si no se especifica)
+            deadline: Instante límite en time.monotonic() del caller
+                (usa timeout_seconds desde ahora si no se especifica)
+            response_schema: Schema de la respuesta; si se indica, Gemini
+                responde JSON que cumple el schema
+            usage: Dict donde se escriben los tokens y el finish_reason
+                de la respuesta (opcional)
         
         Returns:
             str: Respuesta generada por Gemini
         
         Raises:
+            LLMOverloadedError: Si el límite de concurrencia está alcanzado
             Exception: Si hay error en la API
         """
+        limit = self.concurrency_limit
+        if limit is not None:
+            limit.acquire()
         try:
             # Combinar system y user prompt (Gemini no tiene system prompt separado)
             full_prompt = f"{system_prompt}\n\n{user_prompt}"
@@ -101,124 +230,294 @@ class GeminiClient:
             config["temperature"] = temperature
             if max_tokens:
                 config["max_output_tokens"] = max_tokens
+            if response_schema is not None:
+                config["response_mime_type"] = "application/json"
+                config["response_schema"] = response_schema
             
-            # Ejecutar en thread pool para no bloquear
-            loop = asyncio.get_event_loop()
-            response = await loop.run_in_executor(
-                None,
-                lambda: self._sync_generate(full_prompt, config)
-            )
-            return response
+            if deadline is None and self.timeout_seconds:
+                deadline = time.monotonic() + self.timeout_seconds
+            
+            loop = asyncio.get_running_loop()
+            
+            async def attempt(state: RetryState) -> str:
+                current_prompt = full_prompt
+                if state.last_error_class == ErrorClass.RECITATION:
+                    # Variar el prompt solo si el bloqueo fue por recitation
+                    current_prompt = f"Generate original feedback:\n\n{full_prompt}"
+                
+                if self.scheduler is None:
+                    return await call(current_prompt, state)
+                
+                # Slot por intento: el backoff entre reintentos no ocupa lugar
+                priority = current_priority()
+                with span("llm.schedule_wait", priority=priority):
+                    await self.scheduler.acquire(priority, current_user(), deadline)
+                try:
+                    return await call(current_prompt, state)
+                finally:
+                    self.scheduler.release(priority)
+            
+            async def call(current_prompt: str, state: RetryState) -> str:
+                # El límite adaptativo mide solo el intento al upstream
+                call_started = time.monotonic()
+                try:
+                    result = await upstream(current_prompt, state)
+                except asyncio.CancelledError:
+                    # Cancelado por el deadline: cuenta como timeout del intento
+                    if limit is not None and deadline is not None and time.monotonic() >= deadline:
+                        limit.observe(
+                            time.monotonic() - call_started,
+                            DeadlineExceededError("Deadline vencido durante el intento")
+                        )
+                    raise
+                except Exception as e:
+                    if limit is not None:
+                        limit.observe(time.monotonic() - call_started, e)
+                    raise
+                if limit is not None:
+                    limit.observe(time.monotonic() - call_started)
+                return result
+            
+            async def upstream(current_prompt: str, state: RetryState) -> str:
+                if self.hedge_policy is not None:
+                    return await self._hedged_generate(loop, current_prompt, config, state.attempt, usage)
+                
+                # Ejecutar en thread pool para no bloquear
+                return await run_in_executor_traced(
+                    loop,
+                    lambda: self._sync_generate(current_prompt, config, usage=usage),
+                    "gemini.generate",
+                    executor=self.executor,
+                    model=self.model_name,
+                    attempt=state.attempt
+                )
+            
+            return await self.retry_policy.run(attempt, deadline=deadline)
             
         except Exception as e:
             print(f"❌ Error en Gemini API: {e}")
             raise
+        finally:
+            if limit is not None:
+                limit.release()
     
-    def _sync_generate(self, prompt: str, config: dict) -> str:
+    async def _hedged_generate(
+        self,
+        loop,
+        prompt: str,
+        config: dict,
+        attempt: int = 0,
+        usage: Optional[dict] = None
+    ) -> str:
+        """
+        Un intento con hedging: si el primario tarda más que el percentil
+        reciente, se envía el mismo prompt al modelo secundario y gana la
+        primera respuesta válida.
+        
+        Los threads del executor no se pueden interrumpir: al cancelar
+        el perdedor se descarta su resultado, pero la llamada termina
+        en background.
         """
-        Genera completion de forma síncrona con retry limitado.
+        policy = self.hedge_policy
+        request = policy.start_request()
+        
+        def primary_call() -> str:
+            started = time.monotonic()
+            try:
+                return self._sync_generate(prompt, config, usage=usage)
+            finally:
+                # Se registra aunque el resultado se descarte
+                policy.latencies.record(time.monotonic() - started)
+        
+        primary = asyncio.ensure_future(run_in_executor_traced(
+            loop,
+            primary_call,
+            "gemini.generate",
+            executor=self.executor,
+            model=self.model_name,
+            attempt=attempt
+        ))
+        pending = {primary}
+        hedged = False
+        
+        try:
+            done, _ = await asyncio.wait(pending, timeout=policy.hedge_delay())
+            
+            if not done and self.secondary_model_name and policy.try_hedge(request):
+                print(f"🔀 Hedge a {self.secondary_model_name}")
+                secondary = asyncio.ensure_future(run_in_executor_traced(
+                    loop,
+                    lambda: self._sync_generate(prompt, config, secondary=True, usage=usage),
+                    "gemini.generate_hedge",
+                    executor=self.executor,
+                    model=self.secondary_model_name,
+                    attempt=attempt
+                ))
+                pending.add(secondary)
+                hedged = True
+            
+            first_error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None and task.result():
+                        if task is primary:
+                            policy.primary_wins += 1
+                        else:
+                            policy.hedge_wins += 1
+                        return task.result()
+                    first_error = first_error or task.exception()
+            
+            if hedged:
+                policy.both_failed += 1
+            if first_error is not None:
+                raise first_error
+            raise BlockedResponseError("Gemini no retornó contenido", ErrorClass.FATAL)
+        finally:
+            for task in pending:
+                task.cancel()
+    
+    @property
+    def secondary_model_name(self) -> Optional[str]:
+        """Siguiente modelo de model_names_to_try después del primario"""
+        names = self.model_names_to_try
+        if self.model_name in names:
+            index = names.index(self.model_name)
+            following = names[index + 1:] + names[:index]
+        else:
+            following = names
+        for name in following:
+            if name != self.model_name:
+                return name
+        return None
+    
+    @property
+    def secondary_model(self):
+        """Modelo secundario para hedging (se crea en el primer acceso)"""
+        if self._secondary_model is None:
+            _ = self.model  # configura el SDK
+            with self._model_lock:
+                if self._secondary_model is None:
+                    import google.generativeai as genai
+                    
+                    self._secondary_model = genai.GenerativeModel(self.secondary_model_name)
+        return self._secondary_model
+    
+    def _sync_generate(
+        self,
+        prompt: str,
+        config: dict,
+        secondary: bool = False,
+        usage: Optional[dict] = None
+    ) -> str:
+        """
+        Genera completion de forma síncrona (un solo intento).
+        
+        Los reintentos los maneja RetryPolicy en generate_completion.
         
         Args:
             prompt: Prompt completo
             config: Configuración de generación
+            secondary: Usar el modelo secundario (hedging)
+            usage: Dict donde escribir tokens y finish_reason (opcional)
         
         Returns:
             str: Texto de la respuesta
+        
+        Raises:
+            BlockedResponseError: Si la respuesta vino sin contenido
         """
-        import time
-        
-        # Configuración de safety para ser menos restrictivo
-        safety_settings = [
-            {
-                "category": "HARM_CATEGORY_HARASSMENT",
-                "threshold": "BLOCK_NONE"
-            },
-            {
-                "category": "HARM_CATEGORY_HATE_SPEECH",
-                "threshold": "BLOCK_NONE"
-            },
-            {
-                "category": "HARM_CATEGORY_SEXUALLY_EXPLICIT",
-                "threshold": "BLOCK_NONE"
-            },
-            {
-                "category": "HARM_CATEGORY_DANGEROUS_CONTENT",
-                "threshold": "BLOCK_NONE"
-            },
-        ]
-        
-        # Solo 2 intentos para respetar rate limit (2 req/min)
-        max_attempts = 2
-        
-        for attempt in range(max_attempts):
-            try:
-                # Variar el prompt en el segundo intento
-                current_prompt = prompt
-                if attempt > 0:
-                    # Esperar 2 segundos antes del reintento
-                    time.sleep(2)
-                    # Agregar variación simple
-                    current_prompt = f"Generate original feedback:\n\n{prompt}"
-                
-                response = self.model.generate_content(
-                    current_prompt,
-                    generation_config=config,
-                    safety_settings=safety_settings
+        model = self.secondary_model if secondary else self.model
+        response = model.generate_content(
+            prompt,
+            generation_config=config,
+            safety_settings=SAFETY_SETTINGS
+        )
+        if usage is not None:
+            _record_usage(response, usage)
+        
+        # Intentar obtener el texto
+        try:
+            if response.text:
+                return response.text
+        except ValueError:
+            pass
+        
+        # Verificar por qué no hay texto
+        prompt_feedback = getattr(response, 'prompt_feedback', None)
+        if prompt_feedback is not None and getattr(prompt_feedback, 'block_reason', 0):
+            print(f"⚠️ Prompt bloqueado: {prompt_feedback}")
+            raise BlockedResponseError(
+                f"Prompt bloqueado: {prompt_feedback.block_reason}",
+                ErrorClass.SAFETY
+            )
+        
+        finish_reason = None
+        if hasattr(response, 'candidates') and response.candidates:
+            candidate = response.candidates[0]
+            finish_reason = candidate.finish_reason
+            
+            if finish_reason == FINISH_REASON_RECITATION:
+                print(f"⚠️ Recitation detectado")
+                raise BlockedResponseError(
+                    "Respuesta bloqueada por recitation",
+                    ErrorClass.RECITATION,
+                    finish_reason
                 )
-                
-                # Intentar obtener el texto
-                try:
-                    if response.text:
-                        return response.text
-                except ValueError as e:
-                    # Si falla, verificar por qué
-                    if hasattr(response, 'candidates') and response.candidates:
-                        candidate = response.candidates[0]
-                        finish_reason = candidate.finish_reason
-                        
-                        # Si es finish_reason 2 (RECITATION) y es el primer intento
-                        if finish_reason == 2 and attempt == 0:
-                            print(f"⚠️ Recitation detectado, reintentando con variación...")
-                            continue
-                        
-                        # Registrar el error
-                        if hasattr(response, 'prompt_feedback'):
-                            print(f"⚠️ Prompt bloqueado: {response.prompt_feedback}")
-                        
-                        print(f"⚠️ Finish reason: {finish_reason}")
-                        print(f"⚠️ Safety ratings: {candidate.safety_ratings}")
-                        
-                        # Intentar obtener contenido parcial
-                        if hasattr(candidate, 'content') and candidate.content.parts:
-                            partial_text = ''.join(part.text for part in candidate.content.parts if hasattr(part, 'text'))
-                            if partial_text:
-                                return partial_text
-                    
-                    # Si es el segundo intento, lanzar error
-                    if attempt == 1:
-                        raise ValueError(f"Gemini no retornó contenido. Finish reason: {finish_reason}")
-                    
-            except Exception as e:
-                if attempt == 0:
-                    print(f"⚠️ Primer intento falló: {e}, reintentando...")
-                    continue
-                raise
+            
+            print(f"⚠️ Finish reason: {finish_reason}")
+            print(f"⚠️ Safety ratings: {candidate.safety_ratings}")
+            
+            if finish_reason in FINISH_REASONS_SAFETY:
+                raise BlockedResponseError(
+                    "Respuesta bloqueada por safety",
+                    ErrorClass.SAFETY,
+                    finish_reason
+                )
+            
+            # Intentar obtener contenido parcial
+            if hasattr(candidate, 'content') and candidate.content.parts:
+                partial_text = ''.join(part.text for part in candidate.content.parts if hasattr(part, 'text'))
+                if partial_text:
+                    return partial_text
         
-        raise ValueError("No se pudo generar respuesta")
+        raise BlockedResponseError(
+            f"Gemini no retornó contenido. Finish reason: {finish_reason}",
+            ErrorClass.FATAL,
+            finish_reason
+        )
     
-    def test_connection(self) -> bool:
+    def test_connection(self, timeout: Optional[float] = None) -> bool:
         """
         Prueba la conexión con la API.
         
+        Args:
+            timeout: Timeout del request en segundos, sin los reintentos
+                del SDK (None = timeout y reintentos por defecto del SDK)
+        
         Returns:
             bool: True si la conexión funciona
         """
         try:
+            kwargs = {"request_options": {"timeout": timeout, "retry": None}} if timeout else {}
             response = self.model.generate_content(
                 "Hello, respond with 'OK'",
-                generation_config={"max_output_tokens": 10}
+                generation_config={"max_output_tokens": 10},
+                **kwargs
             )
             return bool(response.text)
         except Exception as e:
             print(f"❌ Test de conexión falló: {e}")
-            return False
\ No newline at end of file
+            return False
+
+
+def _record_usage(response, usage: dict) -> None:
+    """Copia usage_metadata y el finish_reason de la respuesta a `usage`"""
+    metadata = getattr(response, "usage_metadata", None)
+    if metadata is not None:
+        usage["prompt_tokens"] = getattr(metadata, "prompt_token_count", None)
+        usage["output_tokens"] = getattr(metadata, "candidates_token_count", None)
+        usage["total_tokens"] = getattr(metadata, "total_token_count", None)
+    candidates = getattr(response, "candidates", None)
+    if candidates:
+        usage["finish_reason"] = int(candidates[0].finish_reason)
@@ -0,0 +1,153 @@
+"""
+Hedging - Requests duplicados para recortar la latencia de cola
+
+Si el modelo primario no respondió cuando se alcanza un percentil de
+la latencia reciente, se envía el mismo prompt a un modelo secundario
+y se usa la primera respuesta válida. La proporción de hedges está
+acotada para que el costo de cuota no crezca sin límite.
+"""
+
+import bisect
+import threading
+from collections import deque
+from typing import Deque, Optional
+
+
+class LatencyTracker:
+    """Ventana deslizante de latencias (thread-safe)"""
+
+    def __init__(self, window: int = 200):
+        self._samples: Deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float) -> None:
+        with self._lock:
+            self._samples.append(seconds)
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def mean(self) -> Optional[float]:
+        with self._lock:
+            samples = list(self._samples)
+        return sum(samples) / len(samples) if samples else None
+
+    def percentile(self, q: float) -> Optional[float]:
+        """
+        Percentil de las latencias recientes.
+
+        Args:
+            q: Percentil (0-100)
+
+        Returns:
+            float: Segundos, o None si no hay muestras
+        """
+        with self._lock:
+            ordered = sorted(self._samples)
+        if not ordered:
+            return None
+        index = min(len(ordered) - 1, int(round((len(ordered) - 1) * q / 100)))
+        return ordered[index]
+
+
+class HedgePolicy:
+    """
+    Decide cuándo y si se envía un hedge.
+
+    No es thread-safe: se usa desde el event loop (el tracker sí lo es,
+    porque registra la latencia desde los threads del executor).
+    """
+
+    def __init__(
+        self,
+        percentile: float = 95.0,
+        min_delay: float = 1.0,
+        initial_delay: float = 5.0,
+        max_hedge_ratio: float = 0.05,
+        window: int = 200,
+        min_samples: int = 20
+    ):
+        """
+        Args:
+            percentile: Percentil de latencia a partir del cual se hace hedge
+            min_delay: Espera mínima antes de un hedge (segundos)
+            initial_delay: Espera usada hasta tener min_samples muestras
+            max_hedge_ratio: Máximo de hedges / requests en la ventana
+            window: Tamaño de las ventanas de latencia y de ratio
+            min_samples: Muestras necesarias para usar el percentil
+        """
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.initial_delay = initial_delay
+        self.max_hedge_ratio = max_hedge_ratio
+        self.min_samples = min_samples
+        self.window = window
+
+        self.latencies = LatencyTracker(window)
+        # Nº de request (ver start_request) de los hedges en la ventana
+        self._hedged: Deque[int] = deque()
+
+        self.requests = 0
+        self.hedges_sent = 0
+        self.hedges_denied = 0
+        self.primary_wins = 0
+        self.hedge_wins = 0
+        self.both_failed = 0
+
+    def hedge_delay(self) -> float:
+        """Segundos a esperar al primario antes de enviar el hedge"""
+        if len(self.latencies) < self.min_samples:
+            return max(self.min_delay, self.initial_delay)
+        value = self.latencies.percentile(self.percentile)
+        return max(self.min_delay, value if value is not None else self.initial_delay)
+
+    def start_request(self) -> int:
+        """
+        Registra un request.
+
+        Returns:
+            int: Nº del request, para try_hedge()
+        """
+        self.requests += 1
+        return self.requests
+
+    def try_hedge(self, request: int) -> bool:
+        """
+        Reserva un hedge si el ratio en los últimos `window` requests lo permite.
+
+        Los hedges se cuentan por su propio nº de request: con requests
+        concurrentes, cada uno cuenta su hedge aunque ya hayan empezado otros.
+
+        Args:
+            request: Nº retornado por start_request()
+
+        Returns:
+            bool: True si se puede enviar el hedge
+        """
+        oldest = self.requests - self.window
+        while self._hedged and self._hedged[0] <= oldest:
+            self._hedged.popleft()
+
+        in_window = min(self.requests, self.window)
+        if (len(self._hedged) + 1) / in_window > self.max_hedge_ratio:
+            self.hedges_denied += 1
+            return False
+        # Los hedges no se conceden en orden de request: mantener ordenado
+        bisect.insort(self._hedged, request)
+        self.hedges_sent += 1
+        return True
+
+    def stats(self) -> dict:
+        """Métricas de hedging"""
+        p = self.latencies.percentile(self.percentile)
+        return {
+            "requests": self.requests,
+            "hedges_sent": self.hedges_sent,
+            "hedges_denied": self.hedges_denied,
+            "hedge_ratio": round(self.hedges_sent / self.requests, 4) if self.requests else 0.0,
+            "primary_wins": self.primary_wins,
+            "hedge_wins": self.hedge_wins,
+            "both_failed": self.both_failed,
+            "current_delay_seconds": round(self.hedge_delay(), 3),
+            f"p{self.percentile:g}_seconds": round(p, 3) if p is not None else None,
+        }
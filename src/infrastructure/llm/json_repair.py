@@ -0,0 +1,308 @@
+"""
+JSON Repair - Reparación local de respuestas JSON del LLM
+
+Cuando Gemini corta en max_output_tokens o devuelve JSON casi válido,
+reparar localmente es más barato que otra llamada. La reparación es
+determinista y solo cubre errores comunes:
+
+- Texto o bloques ``` alrededor del objeto
+- Strings con comillas simples
+- Comas finales antes de } o ]
+- True / False / None de Python y claves sin comillas
+- Saltos de línea crudos dentro de strings
+- Estructuras truncadas: se descarta la clave o el valor incompleto del
+  final (un string o número cortado) y se cierran los { [ abiertos
+
+No inventa contenido: los campos que falten quedan fuera del dict y
+el caller decide si completarlos (ver GenerateFeedbackUseCase).
+"""
+
+import json
+import threading
+from typing import Dict, List, Optional, Tuple
+
+
+_LITERALS = {"True": "true", "False": "false", "None": "null"}
+_CLOSERS = {"{": "}", "[": "]"}
+
+
+class JsonRepairError(ValueError):
+    """La respuesta no se pudo reparar a un objeto JSON"""
+
+
+def repair_json(text: str) -> Tuple[dict, List[str]]:
+    """
+    Repara y decodifica un objeto JSON.
+
+    Args:
+        text: Respuesta raw del LLM
+
+    Returns:
+        tuple: (objeto decodificado, reparaciones aplicadas)
+
+    Raises:
+        JsonRepairError: Si no hay un objeto JSON recuperable
+    """
+    start = text.find("{")
+    if start < 0:
+        raise JsonRepairError("La respuesta no contiene un objeto JSON")
+
+    repairs: List[str] = []
+    if text[:start].strip():
+        repairs.append("leading_text")
+
+    body = text[start:]
+    fence = body.rfind("```")
+    if fence > body.rfind("}"):
+        # Cierre de un bloque markdown; un ``` antes del último } está
+        # dentro de un string
+        body = body[:fence]
+        repairs.append("code_fence")
+
+    scanner = _Scanner(body)
+    scanner.run()
+
+    # 1. Cerrar en el punto de corte (si el último valor está completo)
+    candidates = [scanner.closed_at_end()]
+    # 2. Volver al último punto seguro (después de un valor completo)
+    candidates.extend(scanner.closed_at_safe_points())
+    repairs.extend(scanner.repairs)
+
+    for index, candidate in enumerate(candidates):
+        if candidate is None:
+            continue
+        try:
+            data = json.loads(candidate)
+        except ValueError:
+            continue
+        if not isinstance(data, dict):
+            break
+        if index > 0:
+            repairs.append("dropped_incomplete_tail")
+        return data, repairs
+
+    raise JsonRepairError("No se pudo reparar el JSON de la respuesta")
+
+
+class _Scanner:
+    """
+    Recorre el texto una vez emitiendo JSON normalizado.
+
+    Guarda el stack de estructuras abiertas y los "puntos seguros":
+    posiciones de la salida donde termina un valor completo.
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+        self.out: List[str] = []
+        self.stack: List[str] = []
+        self.repairs: List[str] = []
+        self.safe_points: List[Tuple[int, Tuple[str, ...]]] = []
+        self.in_string = False
+        self.truncated_string = False
+        self.truncated_number = False
+        self.finished = False
+
+    def _repair(self, name: str) -> None:
+        if name not in self.repairs:
+            self.repairs.append(name)
+
+    def _mark_safe(self) -> None:
+        self.safe_points.append((len(self.out), tuple(self.stack)))
+
+    def run(self) -> None:
+        text = self.text
+        i, n = 0, len(text)
+        while i < n:
+            char = text[i]
+
+            if char in "\"'":
+                if char == "'":
+                    self._repair("single_quotes")
+                i = self._read_string(i, char)
+                if not self.in_string and self.stack and self.stack[-1] == "[":
+                    self._mark_safe()
+                continue
+
+            if char in "{[":
+                self.stack.append(char)
+                self.out.append(char)
+                self._mark_safe()
+            elif char in "}]":
+                if not self.stack or _CLOSERS[self.stack[-1]] != char:
+                    # Cierre sobrante o cruzado: se ignora
+                    self._repair("unbalanced_brackets")
+                    i += 1
+                    continue
+                self._drop_trailing_comma()
+                self.stack.pop()
+                self.out.append(char)
+                if not self.stack:
+                    self.finished = True
+                    if text[i + 1:].strip():
+                        self._repair("trailing_text")
+                    return
+                self._mark_safe()
+            elif char == ",":
+                self._mark_safe()
+                self.out.append(char)
+            elif char.isalpha():
+                j = i
+                while j < n and (text[j].isalnum() or text[j] == "_"):
+                    j += 1
+                word = text[i:j]
+                if self._is_object_key(j):
+                    self._repair("unquoted_keys")
+                    word = f'"{word}"'
+                elif word in _LITERALS:
+                    self._repair("python_literals")
+                    word = _LITERALS[word]
+                self.out.append(word)
+                i = j
+                if j < n:
+                    self._mark_safe_after_scalar()
+                continue
+            elif char in "-0123456789":
+                j = i
+                while j < n and text[j] in "+-0123456789.eE":
+                    j += 1
+                self.out.append(text[i:j])
+                i = j
+                if j < n:
+                    self._mark_safe_after_scalar()
+                else:
+                    # Un número al final del texto puede estar cortado (8 de 85)
+                    self.truncated_number = True
+                continue
+            elif char in ":" or char.isspace():
+                self.out.append(char)
+            else:
+                self._repair("stray_characters")
+            i += 1
+
+    def _read_string(self, i: int, quote: str) -> int:
+        """Emite el string que empieza en text[i] con comillas dobles"""
+        text, n = self.text, len(self.text)
+        self.in_string = True
+        parts = ['"']
+        i += 1
+        while i < n:
+            char = text[i]
+            if char == "\\" and i + 1 < n:
+                escaped = text[i + 1]
+                # \' no es un escape válido en JSON
+                parts.append("'" if escaped == "'" else char + escaped)
+                i += 2
+                continue
+            if char == quote:
+                self.in_string = False
+                parts.append('"')
+                i += 1
+                break
+            if char == '"':
+                parts.append('\\"')
+            elif char == "\n":
+                self._repair("raw_newlines")
+                parts.append("\\n")
+            elif char == "\r":
+                pass
+            elif char == "\t":
+                parts.append("\\t")
+            else:
+                parts.append(char)
+            i += 1
+        if self.in_string:
+            self.truncated_string = True
+        self.out.append("".join(parts))
+        return i
+
+    def _is_object_key(self, end: int) -> bool:
+        """True si la palabra que termina en `end` va seguida de ':' dentro de un objeto"""
+        if not self.stack or self.stack[-1] != "{":
+            return False
+        rest = self.text[end:end + 32].lstrip()
+        return rest.startswith(":")
+
+    def _mark_safe_after_scalar(self) -> None:
+        if self.stack and self.stack[-1] == "[":
+            self._mark_safe()
+
+    def _drop_trailing_comma(self) -> None:
+        k = len(self.out) - 1
+        while k >= 0 and self.out[k].isspace():
+            k -= 1
+        if k >= 0 and self.out[k] == ",":
+            del self.out[k]
+            self._repair("trailing_commas")
+
+    def closed_at_end(self) -> Optional[str]:
+        """
+        Salida cerrada en el punto de corte.
+
+        None si el texto termina dentro de un string o número: un valor
+        cortado no se conserva (ej: "Necesitas practicar m"); se vuelve
+        al último punto seguro.
+        """
+        if self.finished:
+            return "".join(self.out)
+        self._repair("truncated")
+        if self.truncated_string or self.truncated_number:
+            return None
+        body = "".join(self.out).rstrip()
+        if body.endswith(","):
+            body = body[:-1]
+        return body + "".join(_CLOSERS[c] for c in reversed(self.stack))
+
+    def closed_at_safe_points(self) -> List[str]:
+        """Salidas cortadas en los puntos seguros, del último al primero"""
+        if self.finished:
+            return []
+        closed = []
+        for length, stack in reversed(self.safe_points[-8:]):
+            body = "".join(self.out[:length]).rstrip()
+            if body.endswith(","):
+                body = body[:-1]
+            closed.append(body + "".join(_CLOSERS[c] for c in reversed(stack)))
+        return closed
+
+
+class JsonRepairStats:
+    """Contadores de reparación (thread-safe)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.attempts = 0
+        self.repaired = 0
+        self.failed = 0
+        self.repairs: Dict[str, int] = {}
+        self.filled_fields: Dict[str, int] = {}
+
+    def record(self, repairs: Optional[List[str]], filled: Optional[List[str]] = None) -> None:
+        """
+        Registra una reparación.
+
+        Args:
+            repairs: Reparaciones aplicadas, o None si falló
+            filled: Campos completados con el feedback algorítmico
+        """
+        with self._lock:
+            self.attempts += 1
+            if repairs is None:
+                self.failed += 1
+                return
+            self.repaired += 1
+            for name in repairs:
+                self.repairs[name] = self.repairs.get(name, 0) + 1
+            for name in filled or ():
+                self.filled_fields[name] = self.filled_fields.get(name, 0) + 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "attempts": self.attempts,
+                "repaired": self.repaired,
+                "failed": self.failed,
+                "success_rate": round(self.repaired / self.attempts, 4) if self.attempts else None,
+                "repairs": dict(self.repairs),
+                "filled_fields": dict(self.filled_fields),
+            }
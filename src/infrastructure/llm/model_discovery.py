@@ -0,0 +1,93 @@
+"""
+Model Discovery - Selección del modelo Gemini con cache en disco
+
+Listar los modelos disponibles requiere una llamada a la API; el
+resultado se guarda en un archivo local para que los reinicios del
+servicio no repitan la consulta.
+"""
+
+import hashlib
+import json
+import os
+import time
+from typing import List, Optional
+
+
+def cache_key(api_key: str, candidates: List[str]) -> str:
+    """Clave del cache: depende de la API key y de la lista de candidatos"""
+    raw = api_key + "|" + ",".join(candidates)
+    return hashlib.sha256(raw.encode()).hexdigest()[:16]
+
+
+def load_cached_model(path: Optional[str], key: str, ttl_seconds: float) -> Optional[str]:
+    """
+    Lee el modelo elegido previamente.
+
+    Args:
+        path: Archivo de cache (None = sin cache)
+        key: Clave de cache_key()
+        ttl_seconds: Antigüedad máxima de la entrada
+
+    Returns:
+        str: Nombre del modelo, o None si no hay entrada válida
+    """
+    if not path or not os.path.exists(path):
+        return None
+    try:
+        with open(path, encoding="utf-8") as f:
+            entry = json.load(f).get(key)
+    except (OSError, ValueError):
+        return None
+    if not entry or time.time() - entry.get("discovered_at", 0) > ttl_seconds:
+        return None
+    return entry.get("model_name")
+
+
+def save_cached_model(path: Optional[str], key: str, model_name: str) -> None:
+    """Guarda el modelo elegido (errores de escritura se ignoran)"""
+    if not path:
+        return
+    try:
+        data = {}
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        data[key] = {"model_name": model_name, "discovered_at": time.time()}
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+    except (OSError, ValueError) as e:
+        print(f"⚠️ No se pudo guardar el cache de modelos: {e}")
+
+
+def discover_model(genai, candidates: List[str], timeout: float = 5.0) -> Optional[str]:
+    """
+    Elige el primer candidato disponible para generateContent.
+
+    Args:
+        genai: Módulo google.generativeai ya configurado
+        candidates: Modelos en orden de preferencia
+        timeout: Timeout de la consulta en segundos
+
+    Returns:
+        str: Nombre del modelo, o None si la API no respondió
+    """
+    try:
+        available = {
+            model.name
+            for model in genai.list_models(request_options={"timeout": timeout, "retry": None})
+            if "generateContent" in getattr(model, "supported_generation_methods", [])
+        }
+    except Exception as e:
+        print(f"⚠️ No se pudo listar modelos de Gemini: {e}")
+        return None
+
+    for name in candidates:
+        if name in available:
+            return name
+    return None
@@ -0,0 +1,292 @@
+"""
+Output Guardrail - Política del system prompt aplicada localmente
+
+SYSTEM_PROMPT pide lenguaje no técnico y empezar con algo positivo,
+pero el modelo no siempre cumple, y pedirle que corrija es otra
+llamada. El guardrail revisa cada string del feedback parseado con
+una regex compilada una sola vez para todos los términos: la
+alternación se factoriza por prefijos (trie) y se filtra por la
+primera letra, así cada campo se recorre en una pasada lineal sin
+probar cada término en cada posición:
+
+- rewrite: términos con equivalente simple (ej: "fonema" -> "sonido");
+  se reemplazan en el lugar, respetando la mayúscula inicial
+- banned: términos o frases sin equivalente directo; el campo completo
+  se reemplaza por el mismo campo del feedback algorítmico
+- negative_openings: aperturas negativas de main_message
+  (ej: "Lamentablemente..."); se reemplaza main_message
+
+La lista se puede configurar con un archivo JSON con cualquiera de las
+claves "rewrite" (objeto término -> reemplazo), "banned" y
+"negative_openings" (listas); cada clave presente reemplaza a la lista
+por defecto.
+"""
+
+import json
+import re
+import threading
+from typing import Callable, Dict, Iterable, List, Optional, Pattern, Tuple
+
+
+# Campos de texto del feedback (celebration puede ser null)
+TEXT_FIELDS = ("main_message", "specific_tip", "celebration", "encouragement")
+LIST_FIELDS = ("strengths", "areas_to_improve")
+
+DEFAULT_REWRITES: Dict[str, str] = {
+    "fonema": "sonido",
+    "fonemas": "sonidos",
+    "fonética": "pronunciación",
+    "fonético": "de pronunciación",
+    "articulación": "forma de pronunciar",
+    "articulatorio": "de pronunciación",
+    "prosodia": "entonación",
+    "prosódico": "de entonación",
+    "cadencia": "ritmo",
+    "sílaba tónica": "parte más fuerte de la palabra",
+    "score": "puntaje",
+}
+
+DEFAULT_BANNED: Tuple[str, ...] = (
+    "alveolar",
+    "bilabial",
+    "fricativa",
+    "fricativo",
+    "oclusiva",
+    "oclusivo",
+    "vibrante simple",
+    "vibrante múltiple",
+    "aproximante",
+    "punto de articulación",
+    "modo de articulación",
+    "alófono",
+    "rotacismo",
+    "dislalia",
+    "ceceo",
+    "seseo",
+)
+
+DEFAULT_NEGATIVE_OPENINGS: Tuple[str, ...] = (
+    "mal",
+    "lamentablemente",
+    "desafortunadamente",
+    "por desgracia",
+    "incorrecto",
+    "fallaste",
+    "no lo lograste",
+    "no pasaste",
+    "no está bien",
+    "no estuvo bien",
+)
+
+
+def _trie_pattern(terms: Iterable[str]) -> str:
+    """
+    Alternación de los términos factorizada por prefijos.
+
+    ("fonema", "fonemas", "fonética") -> fon(?:e(?:ma(?:s)?)|ética)
+    Los sufijos opcionales son greedy: gana el término más largo.
+    """
+    trie: dict = {}
+    for term in terms:
+        node = trie
+        for char in term:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: dict) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        pattern = branches[0] if len(branches) == 1 else f"(?:{'|'.join(branches)})"
+        return f"(?:{pattern})?" if "" in node else pattern
+
+    return build(trie)
+
+
+def _compile_terms(terms: Iterable[str], anchored: bool = False) -> Optional[Pattern]:
+    terms = sorted({term.lower() for term in terms if term})
+    if not terms:
+        return None
+    # Lookahead de primera letra: descarta rápido las posiciones que no pueden empezar un término
+    first = re.escape("".join(sorted({term[0] for term in terms})))
+    start = r"^[\W_]*" if anchored else r"(?<!\w)"
+    return re.compile(rf"{start}(?=[{first}])(?:{_trie_pattern(terms)})(?!\w)", re.IGNORECASE)
+
+
+class OutputGuardrail:
+    """
+    Revisión local del feedback del LLM.
+
+    Las regex son inmutables y los contadores tienen lock: se puede usar
+    desde varios threads.
+    """
+
+    def __init__(
+        self,
+        rewrites: Optional[Dict[str, str]] = None,
+        banned: Optional[Iterable[str]] = None,
+        negative_openings: Optional[Iterable[str]] = None
+    ):
+        """
+        Args:
+            rewrites: Término -> reemplazo simple (None = DEFAULT_REWRITES)
+            banned: Términos que invalidan el campo (None = DEFAULT_BANNED)
+            negative_openings: Aperturas no permitidas en main_message
+                (None = DEFAULT_NEGATIVE_OPENINGS)
+        """
+        rewrites = DEFAULT_REWRITES if rewrites is None else rewrites
+        banned = DEFAULT_BANNED if banned is None else banned
+        negative_openings = DEFAULT_NEGATIVE_OPENINGS if negative_openings is None else negative_openings
+
+        self.rewrites = {term.lower(): replacement for term, replacement in rewrites.items()}
+        self.banned = frozenset(term.lower() for term in banned)
+
+        # Una sola regex para reescritos y prohibidos: una pasada por campo
+        self._terms = _compile_terms(list(self.rewrites) + list(self.banned))
+        self._opening = _compile_terms(negative_openings, anchored=True)
+
+        self._lock = threading.Lock()
+        self.checked = 0
+        self.clean = 0
+        self.rewritten = 0
+        self.replaced_fields: Dict[str, int] = {}
+        self.term_hits: Dict[str, int] = {}
+
+    @classmethod
+    def from_file(cls, path: str) -> "OutputGuardrail":
+        """
+        Crea el guardrail desde un archivo JSON de términos.
+
+        Args:
+            path: Archivo con "rewrite", "banned" y/o "negative_openings"
+
+        Returns:
+            OutputGuardrail: Guardrail con las listas del archivo (el resto por defecto)
+
+        Raises:
+            ValueError: Si el archivo no tiene el formato esperado
+        """
+        with open(path, encoding="utf-8") as f:
+            config = json.load(f)
+        if not isinstance(config, dict):
+            raise ValueError(f"{path}: se esperaba un objeto JSON")
+        return cls(
+            rewrites=config.get("rewrite"),
+            banned=config.get("banned"),
+            negative_openings=config.get("negative_openings")
+        )
+
+    def apply(self, data: dict, fallback: Callable[[], object]) -> Tuple[dict, List[str]]:
+        """
+        Aplica la política a los datos parseados del feedback.
+
+        Args:
+            data: Datos del feedback (ver parse_llm_output); no se modifica
+            fallback: Retorna el feedback algorítmico; solo se llama si
+                hay que reemplazar algún campo
+
+        Returns:
+            Tuple[dict, List[str]]: (datos corregidos, acciones aplicadas
+                como "rewrite:fonema" o "replace:main_message")
+        """
+        result = dict(data)
+        actions: List[str] = []
+        replace: List[str] = []
+
+        for key in TEXT_FIELDS:
+            value = result.get(key)
+            if not isinstance(value, str):
+                continue
+            text, ok = self._check(value, actions)
+            if key == "main_message" and ok and self._opening is not None:
+                match = self._opening.match(text)
+                if match:
+                    actions.append(f"opening:{match.group(0).strip(' ¡!¿?.,;:').lower()}")
+                    ok = False
+            if ok:
+                result[key] = text
+            else:
+                replace.append(key)
+
+        for key in LIST_FIELDS:
+            items = result.get(key)
+            if not isinstance(items, list):
+                continue
+            checked = []
+            ok = True
+            for item in items:
+                if not isinstance(item, str):
+                    checked.append(item)
+                    continue
+                text, item_ok = self._check(item, actions)
+                ok = ok and item_ok
+                checked.append(text)
+            if ok:
+                result[key] = checked
+            else:
+                replace.append(key)
+
+        if replace:
+            source = fallback()
+            for key in replace:
+                result[key] = getattr(source, key)
+                actions.append(f"replace:{key}")
+
+        self._record(actions, replace)
+        return result, actions
+
+    def stats(self) -> dict:
+        """Contadores del guardrail"""
+        with self._lock:
+            return {
+                "checked": self.checked,
+                "clean": self.clean,
+                "clean_rate": round(self.clean / self.checked, 4) if self.checked else None,
+                "rewritten": self.rewritten,
+                "replaced_fields": dict(self.replaced_fields),
+                "term_hits": dict(self.term_hits),
+                "terms": len(self.rewrites) + len(self.banned),
+            }
+
+    def _check(self, text: str, actions: List[str]) -> Tuple[str, bool]:
+        """
+        Una pasada sobre el texto: reescribe y detecta términos prohibidos.
+
+        Returns:
+            Tuple[str, bool]: (texto reescrito, False si tiene un término prohibido)
+        """
+        if self._terms is None:
+            return text, True
+
+        banned_found = False
+
+        def substitute(match) -> str:
+            nonlocal banned_found
+            found = match.group(0)
+            term = found.lower()
+            replacement = self.rewrites.get(term)
+            if replacement is None:
+                banned_found = True
+                actions.append(f"banned:{term}")
+                return found
+            actions.append(f"rewrite:{term}")
+            if found[:1].isupper():
+                return replacement[:1].upper() + replacement[1:]
+            return replacement
+
+        return self._terms.sub(substitute, text), not banned_found
+
+    def _record(self, actions: List[str], replaced: List[str]) -> None:
+        with self._lock:
+            self.checked += 1
+            if not actions:
+                self.clean += 1
+                return
+            if any(action.startswith("rewrite:") for action in actions):
+                self.rewritten += 1
+            for key in replaced:
+                self.replaced_fields[key] = self.replaced_fields.get(key, 0) + 1
+            for action in actions:
+                if action.startswith("replace:"):
+                    continue
+                self.term_hits[action] = self.term_hits.get(action, 0) + 1
@@ -3,13 +3,16 @@ Prompt Templates para Feedback Generation
 """
 
 from src.domain.models.analysis_context import AnalysisContext
+from src.domain.rules import describe_aspect_tiers
 
 
-# System Prompt - Instrucciones para GPT-4
-SYSTEM_PROMPT = """Eres un asistente de terapia de habla para personas de 19 a 55 años.
-Genera feedback motivador y específico sobre ejercicios de pronunciación.
+# Partes del system prompt
+_PROMPT_INTRO = """Eres un asistente de terapia de habla para personas de 19 a 55 años.
+Genera feedback motivador y específico sobre ejercicios de pronunciación."""
 
-Responde SOLO con un objeto JSON válido en este formato:
+# Instrucciones de formato: solo hacen falta cuando el proveedor no
+# soporta response_schema (modo prosa)
+_PROMPT_JSON_FORMAT = """Responde SOLO con un objeto JSON válido en este formato:
 {
   "main_message": "mensaje motivacional breve",
   "strengths": ["fortaleza 1", "fortaleza 2"],
@@ -17,9 +20,9 @@ Responde SOLO con un objeto JSON válido en este formato:
   "specific_tip": "tip práctico y fácil de seguir",
   "celebration": "mensaje si pasó el ejercicio, o null si no pasó",
   "encouragement": "mensaje final de ánimo"
-}
+}"""
 
-Reglas:
+_PROMPT_RULES = """Reglas:
 - Empieza siempre con algo positivo
 - Sé específico (menciona pronunciación, fluidez o ritmo)
 - Usa lenguaje simple y no técnico.
@@ -28,6 +31,16 @@ Reglas:
 - NO uses términos técnicos"""
 
 
+# System Prompt - Instrucciones para GPT-4
+SYSTEM_PROMPT = f"{_PROMPT_INTRO}\n\n{_PROMPT_JSON_FORMAT}\n\n{_PROMPT_RULES}"
+
+# System Prompt para salida estructurada (el formato lo impone response_schema)
+STRUCTURED_SYSTEM_PROMPT = f"""{_PROMPT_INTRO}
+
+{_PROMPT_RULES}
+- celebration: solo si pasó el ejercicio, si no null"""
+
+
 def build_user_prompt(context: AnalysisContext) -> str:
     """
     Construye el user prompt con el contexto del análisis.
@@ -68,42 +81,7 @@ def _analyze_scores(context: AnalysisContext) -> str:
         str: Análisis de scores
     """
     lines = ["ANÁLISIS DE SCORES:"]
-    
-    # Pronunciación
-    if context.pronunciation_score >= 85:
-        lines.append("- ✅ Pronunciación EXCELENTE - Muy claro y preciso")
-    elif context.pronunciation_score >= 75:
-        lines.append("- ✅ Pronunciación BUENA - Claro con algunos detalles a pulir")
-    elif context.pronunciation_score >= 65:
-        lines.append("- ⚠️ Pronunciación REGULAR - Necesita practicar claridad")
-    elif context.pronunciation_score >= 50:
-        lines.append("- ⚠️ Pronunciación BAJA - Requiere más práctica en sonidos específicos")
-    else:
-        lines.append("- ❌ Pronunciación MUY BAJA - Enfócate en pronunciar cada sonido despacio")
-    
-    # Fluidez
-    if context.fluency_score >= 85:
-        lines.append("- ✅ Fluidez EXCELENTE - Habla muy natural y continua")
-    elif context.fluency_score >= 75:
-        lines.append("- ✅ Fluidez BUENA - Habla bastante seguido con pocas pausas")
-    elif context.fluency_score >= 65:
-        lines.append("- ⚠️ Fluidez REGULAR - Hay algunas pausas o cortes")
-    elif context.fluency_score >= 50:
-        lines.append("- ⚠️ Fluidez BAJA - Muchas pausas, necesita practicar continuidad")
-    else:
-        lines.append("- ❌ Fluidez MUY BAJA - Habla muy cortado, practica decirlo de corrido")
-    
-    # Ritmo
-    if context.rhythm_score >= 85:
-        lines.append("- ✅ Ritmo EXCELENTE - Muy natural y con buena cadencia")
-    elif context.rhythm_score >= 75:
-        lines.append("- ✅ Ritmo BUENO - Natural con algunos detalles menores")
-    elif context.rhythm_score >= 65:
-        lines.append("- ⚠️ Ritmo REGULAR - Necesita trabajar la velocidad o musicalidad")
-    elif context.rhythm_score >= 50:
-        lines.append("- ⚠️ Ritmo BAJO - Muy lento o muy rápido, busca el punto medio")
-    else:
-        lines.append("- ❌ Ritmo MUY BAJO - Practica la velocidad y el tono")
+    lines.extend(describe_aspect_tiers(context))
     
     return "\n".join(lines)
 
@@ -0,0 +1,73 @@
+"""
+Response Schema - Conversión de modelos pydantic a response_schema de Gemini
+
+Gemini acepta un subconjunto de OpenAPI 3 (type, properties, required,
+items, nullable, enum, description). Este módulo traduce el JSON schema
+de un modelo pydantic a ese subconjunto.
+"""
+
+from typing import Iterable, Optional
+
+from pydantic import BaseModel
+
+
+def schema_from_model(model_cls: type, exclude: Iterable[str] = ()) -> dict:
+    """
+    Construye el response_schema a partir de un modelo pydantic.
+
+    Args:
+        model_cls: Clase pydantic (ej: FeedbackResponse)
+        exclude: Campos a omitir (ej: los que se calculan localmente)
+
+    Returns:
+        dict: Schema en el formato de Gemini
+    """
+    if not (isinstance(model_cls, type) and issubclass(model_cls, BaseModel)):
+        raise TypeError("model_cls debe ser un modelo pydantic")
+
+    json_schema = model_cls.model_json_schema()
+    excluded = set(exclude)
+
+    properties = {}
+    for name, prop in json_schema.get("properties", {}).items():
+        if name in excluded:
+            continue
+        properties[name] = _convert(prop)
+
+    required = [name for name in json_schema.get("required", []) if name not in excluded]
+
+    schema = {"type": "object", "properties": properties}
+    if required:
+        schema["required"] = required
+    return schema
+
+
+def _convert(prop: dict) -> dict:
+    nullable = False
+    variants = prop.get("anyOf")
+    if variants:
+        non_null = [v for v in variants if v.get("type") != "null"]
+        nullable = len(non_null) != len(variants)
+        if len(non_null) != 1:
+            raise ValueError(f"Unión no soportada en response_schema: {variants}")
+        base = dict(non_null[0])
+        for key in ("description", "title"):
+            if key in prop:
+                base[key] = prop[key]
+        prop = base
+
+    converted = {"type": prop["type"]}
+    description: Optional[str] = prop.get("description")
+    if description:
+        converted["description"] = description
+    if "enum" in prop:
+        converted["enum"] = list(prop["enum"])
+    if prop["type"] == "array":
+        converted["items"] = _convert(prop.get("items", {"type": "string"}))
+    if prop["type"] == "object":
+        converted["properties"] = {
+            name: _convert(value) for name, value in prop.get("properties", {}).items()
+        }
+    if nullable:
+        converted["nullable"] = True
+    return converted
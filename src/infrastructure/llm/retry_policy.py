@@ -0,0 +1,265 @@
+"""
+Retry Policy - Reintentos async con backoff exponencial, jitter y deadline
+
+Clasifica los errores del LLM y aplica una regla de reintento distinta
+por clase: una cuota agotada (429) no se trata igual que un 5xx o que
+una respuesta bloqueada por RECITATION.
+"""
+
+import asyncio
+import random
+import re
+import time
+from dataclasses import dataclass
+from enum import Enum
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+
+
+T = TypeVar("T")
+
+
+class ErrorClass(str, Enum):
+    """Clases de error del LLM"""
+
+    QUOTA = "quota"            # 429 / ResourceExhausted
+    TRANSIENT = "transient"    # 5xx, timeouts, errores de conexión
+    SAFETY = "safety"          # Bloqueado por filtros de seguridad
+    RECITATION = "recitation"  # Bloqueado por recitar contenido existente
+    FATAL = "fatal"            # Cualquier otro error (no se reintenta)
+
+
+class BlockedResponseError(ValueError):
+    """El LLM respondió pero sin contenido utilizable"""
+
+    def __init__(self, message: str, error_class: ErrorClass, finish_reason=None):
+        super().__init__(message)
+        self.error_class = error_class
+        self.finish_reason = finish_reason
+
+
+class DeadlineExceededError(TimeoutError):
+    """No queda tiempo del deadline del caller para otro intento"""
+
+
+@dataclass(frozen=True)
+class RetryRule:
+    """Regla de reintento para una clase de error"""
+
+    max_retries: int
+    base_delay: float = 0.0
+    max_delay: float = 0.0
+    multiplier: float = 2.0
+
+
+DEFAULT_RULES: Dict[ErrorClass, RetryRule] = {
+    ErrorClass.QUOTA: RetryRule(max_retries=2, base_delay=2.0, max_delay=30.0),
+    ErrorClass.TRANSIENT: RetryRule(max_retries=2, base_delay=0.5, max_delay=8.0),
+    # Se reintenta de inmediato con una variación del prompt
+    ErrorClass.RECITATION: RetryRule(max_retries=1),
+    ErrorClass.SAFETY: RetryRule(max_retries=0),
+    ErrorClass.FATAL: RetryRule(max_retries=0),
+}
+
+_TRANSIENT_EXCEPTIONS = (asyncio.TimeoutError, TimeoutError, ConnectionError)
+_RETRY_IN_PATTERN = re.compile(r"retry in ([0-9]+(?:\.[0-9]+)?)\s*s", re.IGNORECASE)
+
+
+def classify_error(error: BaseException) -> ErrorClass:
+    """
+    Clasifica un error del LLM.
+
+    Usa el código HTTP de las excepciones de google.api_core (atributo
+    `code`) para no depender de importar el SDK.
+
+    Args:
+        error: Excepción levantada por el cliente
+
+    Returns:
+        ErrorClass: Clase del error
+    """
+    if isinstance(error, BlockedResponseError):
+        return error.error_class
+    if isinstance(error, DeadlineExceededError):
+        return ErrorClass.FATAL
+    if isinstance(error, _TRANSIENT_EXCEPTIONS):
+        return ErrorClass.TRANSIENT
+
+    code = getattr(error, "code", None)
+    if isinstance(code, int):
+        if code == 429:
+            return ErrorClass.QUOTA
+        if code == 408 or 500 <= code <= 599:
+            return ErrorClass.TRANSIENT
+
+    name = type(error).__name__
+    if name in ("ResourceExhausted", "TooManyRequests"):
+        return ErrorClass.QUOTA
+    if name in ("ServiceUnavailable", "InternalServerError", "DeadlineExceeded",
+                "GatewayTimeout", "BadGateway"):
+        return ErrorClass.TRANSIENT
+
+    return ErrorClass.FATAL
+
+
+def retry_after_seconds(error: BaseException) -> Optional[float]:
+    """
+    Extrae el tiempo de espera sugerido por el servidor.
+
+    Busca, en orden: header Retry-After de la respuesta HTTP,
+    RetryInfo en los details de gRPC y "retry in Ns" en el mensaje.
+
+    Returns:
+        float: Segundos a esperar, o None si el servidor no lo indicó
+    """
+    response = getattr(error, "response", None)
+    headers = getattr(response, "headers", None)
+    if headers is not None:
+        value = headers.get("Retry-After") if hasattr(headers, "get") else None
+        if value is not None:
+            try:
+                return max(0.0, float(value))
+            except (TypeError, ValueError):
+                pass
+
+    for detail in getattr(error, "details", None) or []:
+        delay = getattr(detail, "retry_delay", None)
+        if delay is not None:
+            return getattr(delay, "seconds", 0) + getattr(delay, "nanos", 0) / 1e9
+
+    match = _RETRY_IN_PATTERN.search(str(error))
+    if match:
+        return float(match.group(1))
+
+    return None
+
+
+@dataclass
+class RetryState:
+    """Estado del intento actual, pasado a la operación"""
+
+    attempt: int = 0
+    last_error_class: Optional[ErrorClass] = None
+
+    def remaining(self, deadline: Optional[float]) -> Optional[float]:
+        if deadline is None:
+            return None
+        return deadline - time.monotonic()
+
+
+class RetryPolicy:
+    """
+    Política de reintentos async.
+
+    Nunca duerme más allá del deadline del caller: si el backoff
+    calculado no entra en el tiempo restante, se levanta el último error.
+    """
+
+    def __init__(
+        self,
+        rules: Optional[Dict[ErrorClass, RetryRule]] = None,
+        sleep: Callable[[float], Awaitable[None]] = asyncio.sleep,
+        rng: Callable[[], float] = random.random
+    ):
+        """
+        Args:
+            rules: Reglas por clase (se completan con DEFAULT_RULES)
+            sleep: Función de espera (inyectable para pruebas)
+            rng: Generador uniforme [0, 1) para el jitter
+        """
+        self.rules = dict(DEFAULT_RULES)
+        if rules:
+            self.rules.update(rules)
+        self._sleep = sleep
+        self._rng = rng
+
+        self.retries: Dict[str, int] = {c.value: 0 for c in ErrorClass}
+        self.exhausted: Dict[str, int] = {c.value: 0 for c in ErrorClass}
+        self.deadline_exceeded = 0
+
+    def backoff(self, error_class: ErrorClass, retry_number: int, retry_after: Optional[float] = None) -> float:
+        """
+        Calcula la espera antes del reintento (full jitter).
+
+        Args:
+            error_class: Clase del error
+            retry_number: Número de reintento (0 = primero)
+            retry_after: Espera mínima indicada por el servidor
+
+        Returns:
+            float: Segundos a esperar
+        """
+        rule = self.rules[error_class]
+        cap = min(rule.max_delay, rule.base_delay * (rule.multiplier ** retry_number))
+        delay = self._rng() * cap
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+
+    async def run(
+        self,
+        operation: Callable[[RetryState], Awaitable[T]],
+        deadline: Optional[float] = None
+    ) -> T:
+        """
+        Ejecuta la operación con reintentos.
+
+        Args:
+            operation: Corutina que recibe el RetryState y hace un intento
+            deadline: Instante límite en time.monotonic() (None = sin límite)
+
+        Returns:
+            T: Resultado de la operación
+
+        Raises:
+            Exception: El último error si no se puede reintentar
+            DeadlineExceededError: Si el deadline venció antes de intentar
+        """
+        state = RetryState()
+        retries_by_class: Dict[ErrorClass, int] = {}
+
+        while True:
+            remaining = state.remaining(deadline)
+            if remaining is not None and remaining <= 0:
+                self.deadline_exceeded += 1
+                raise DeadlineExceededError("Deadline vencido antes del intento")
+
+            try:
+                if remaining is None:
+                    return await operation(state)
+                return await asyncio.wait_for(operation(state), timeout=remaining)
+            except asyncio.CancelledError:
+                raise
+            except Exception as error:
+                error_class = classify_error(error)
+                rule = self.rules[error_class]
+                done = retries_by_class.get(error_class, 0)
+
+                if done >= rule.max_retries:
+                    if rule.max_retries > 0:
+                        self.exhausted[error_class.value] += 1
+                    raise
+
+                delay = self.backoff(error_class, done, retry_after_seconds(error))
+                remaining = state.remaining(deadline)
+                if remaining is not None and delay >= remaining:
+                    self.deadline_exceeded += 1
+                    raise
+
+                retries_by_class[error_class] = done + 1
+                self.retries[error_class.value] += 1
+                print(f"⚠️ Error LLM ({error_class.value}): {error}. "
+                      f"Reintentando en {delay:.2f}s")
+
+                if delay > 0:
+                    await self._sleep(delay)
+
+                state.attempt += 1
+                state.last_error_class = error_class
+
+    def stats(self) -> dict:
+        """Contadores de reintentos por clase"""
+        return {
+            "retries": dict(self.retries),
+            "exhausted": dict(self.exhausted),
+            "deadline_exceeded": self.deadline_exceeded,
+        }
@@ -0,0 +1,287 @@
+"""
+LLM Scheduler - Clases de prioridad y reparto justo de la cuota
+
+Cada intento de llamada al LLM pide un slot al scheduler. Los slots
+están limitados por concurrencia y, opcionalmente, por requests por
+minuto (la cuota de Gemini).
+
+- Clases de prioridad: "interactive" (usuarios en vivo, default) y
+  "batch" (backfill, pre-generación, shadow). Se asignan por endpoint
+  o con el header X-Priority y viajan en un contextvar.
+- Entre clases: weighted fair queuing (stride scheduling) con pesos
+  configurables. Además "batch" nunca usa la fracción reservada de la
+  concurrencia y de la cuota, así una ráfaga de backfill no puede
+  dejar sin lugar a los usuarios en vivo.
+- Dentro de cada clase: round-robin por usuario, así un caller
+  ruidoso no acapara los slots de su clase.
+"""
+
+import asyncio
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Deque, Dict, Iterator, Optional
+
+from .retry_policy import DeadlineExceededError
+
+
+PRIORITY_INTERACTIVE = "interactive"
+PRIORITY_BATCH = "batch"
+PRIORITIES = (PRIORITY_INTERACTIVE, PRIORITY_BATCH)
+
+ANONYMOUS_USER = "-"
+
+_priority: ContextVar[Optional[str]] = ContextVar("llm_priority", default=None)
+_user: ContextVar[Optional[str]] = ContextVar("llm_user", default=None)
+
+
+def parse_priority(value: Optional[str]) -> Optional[str]:
+    """Normaliza un valor de X-Priority; None si no es una clase conocida"""
+    if not value:
+        return None
+    value = value.strip().lower()
+    return value if value in PRIORITIES else None
+
+
+@contextmanager
+def priority_scope(priority: Optional[str] = None, user: Optional[str] = None) -> Iterator[None]:
+    """
+    Asigna la clase de prioridad y/o el usuario de las llamadas al LLM
+    hechas dentro del bloque (None = no cambia el valor actual).
+
+    Uso:
+        with priority_scope(PRIORITY_BATCH):
+            await use_case.execute(context)
+    """
+    tokens = []
+    if priority is not None:
+        tokens.append((_priority, _priority.set(priority)))
+    if user is not None:
+        tokens.append((_user, _user.set(user)))
+    try:
+        yield
+    finally:
+        for var, token in reversed(tokens):
+            var.reset(token)
+
+
+def current_priority() -> str:
+    return _priority.get() or PRIORITY_INTERACTIVE
+
+
+def current_user() -> str:
+    return _user.get() or ANONYMOUS_USER
+
+
+class _ClassQueue:
+    """Cola de una clase: una deque de waiters por usuario, en round-robin"""
+
+    def __init__(self, weight: float):
+        self.weight = weight
+        self.users: "OrderedDict[str, Deque[asyncio.Future]]" = OrderedDict()
+        self.waiting = 0
+        self.in_flight = 0
+        self.granted = 0
+        self.pass_value = 0.0
+        self.wait_seconds = 0.0
+
+    def push(self, user: str, waiter: asyncio.Future) -> None:
+        self.users.setdefault(user, deque()).append(waiter)
+        self.waiting += 1
+
+    def pop(self) -> Optional[asyncio.Future]:
+        """Siguiente waiter vivo del próximo usuario en el turno"""
+        while self.users:
+            user, waiters = next(iter(self.users.items()))
+            waiter = waiters.popleft()
+            self.waiting -= 1
+            if waiters:
+                self.users.move_to_end(user)
+            else:
+                del self.users[user]
+            if not waiter.done():
+                return waiter
+        return None
+
+
+class PriorityScheduler:
+    """
+    Limita y reparte los slots de llamada al LLM entre clases y usuarios.
+
+    Se usa desde el event loop (no es thread-safe).
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 8,
+        max_per_minute: int = 0,
+        interactive_reserved_share: float = 0.5,
+        weights: Optional[Dict[str, float]] = None,
+        window_seconds: float = 60.0
+    ):
+        """
+        Args:
+            max_concurrency: Llamadas al LLM en vuelo
+            max_per_minute: Llamadas por ventana (0 = sin límite de cuota)
+            interactive_reserved_share: Fracción de concurrencia y cuota que
+                "batch" no puede usar
+            weights: Peso por clase para el reparto cuando ambas esperan
+            window_seconds: Ventana de la cuota
+        """
+        weights = weights or {PRIORITY_INTERACTIVE: 4, PRIORITY_BATCH: 1}
+        self.max_concurrency = max_concurrency
+        self.max_per_minute = max_per_minute
+        self.window_seconds = window_seconds
+        self.reserved_share = interactive_reserved_share
+
+        batch_share = 1.0 - interactive_reserved_share
+        self.limits = {
+            PRIORITY_INTERACTIVE: (max_concurrency, max_per_minute),
+            PRIORITY_BATCH: (
+                max(1, int(max_concurrency * batch_share)),
+                max(1, int(max_per_minute * batch_share)) if max_per_minute else 0
+            ),
+        }
+        self.classes = {name: _ClassQueue(weights.get(name, 1)) for name in PRIORITIES}
+        self.in_flight = 0
+        self.timeouts = 0
+
+        self._grants: Dict[str, Deque[float]] = {name: deque() for name in PRIORITIES}
+        self._timer: Optional[asyncio.TimerHandle] = None
+
+    async def acquire(self, priority: str, user: str, deadline: Optional[float] = None) -> None:
+        """
+        Espera un slot. Llamar a release(priority) al terminar la llamada.
+
+        Args:
+            priority: Clase de prioridad
+            user: Usuario (para el round-robin dentro de la clase)
+            deadline: Instante límite en time.monotonic() para conseguir el slot
+
+        Raises:
+            DeadlineExceededError: Si el deadline vence esperando
+        """
+        queue = self.classes[priority]
+        waiter = asyncio.get_running_loop().create_future()
+        enqueued = time.monotonic()
+
+        if not queue.waiting and not queue.users:
+            # Una clase que vuelve de estar ociosa no acumula crédito
+            active = [c.pass_value for c in self.classes.values() if c.waiting]
+            if active:
+                queue.pass_value = max(queue.pass_value, min(active))
+
+        queue.push(user, waiter)
+        self._dispatch()
+
+        timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+        try:
+            await asyncio.wait_for(waiter, timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise DeadlineExceededError(f"Sin slot de LLM ({priority}) antes del deadline")
+        except BaseException:
+            # Cancelado justo después de recibir el slot: devolverlo
+            if waiter.done() and not waiter.cancelled():
+                self.release(priority)
+            raise
+        queue.wait_seconds += time.monotonic() - enqueued
+
+    def release(self, priority: str) -> None:
+        self.in_flight -= 1
+        self.classes[priority].in_flight -= 1
+        self._dispatch()
+
+    def stats(self) -> dict:
+        """Estado y contadores por clase"""
+        now = time.monotonic()
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_per_minute": self.max_per_minute,
+            "interactive_reserved_share": self.reserved_share,
+            "in_flight": self.in_flight,
+            "timeouts": self.timeouts,
+            "classes": {
+                name: {
+                    "weight": queue.weight,
+                    "max_concurrency": self.limits[name][0],
+                    "max_per_minute": self.limits[name][1],
+                    "in_flight": queue.in_flight,
+                    "waiting": queue.waiting,
+                    "waiting_users": len(queue.users),
+                    "granted": queue.granted,
+                    "granted_last_window": self._window_count(name, now),
+                    "avg_wait_seconds": (
+                        round(queue.wait_seconds / queue.granted, 4) if queue.granted else None
+                    ),
+                }
+                for name, queue in self.classes.items()
+            },
+        }
+
+    def _window_count(self, priority: str, now: float) -> int:
+        grants = self._grants[priority]
+        while grants and now - grants[0] >= self.window_seconds:
+            grants.popleft()
+        return len(grants)
+
+    def _eligible(self, priority: str, now: float) -> bool:
+        """True si la clase puede recibir un slot ahora (concurrencia y cuota)"""
+        if self.in_flight >= self.max_concurrency:
+            return False
+        max_concurrency, max_per_minute = self.limits[priority]
+        if self.classes[priority].in_flight >= max_concurrency:
+            return False
+        if not self.max_per_minute:
+            return True
+        total = sum(self._window_count(name, now) for name in PRIORITIES)
+        if total >= self.max_per_minute:
+            return False
+        return self._window_count(priority, now) < max_per_minute
+
+    def _dispatch(self) -> None:
+        now = time.monotonic()
+        while True:
+            eligible = [
+                (queue.pass_value, name)
+                for name, queue in self.classes.items()
+                if queue.waiting and self._eligible(name, now)
+            ]
+            if not eligible:
+                break
+
+            _, name = min(eligible)
+            queue = self.classes[name]
+            waiter = queue.pop()
+            if waiter is None:
+                continue
+
+            waiter.set_result(None)
+            queue.pass_value += 1.0 / queue.weight
+            queue.in_flight += 1
+            queue.granted += 1
+            self.in_flight += 1
+            self._grants[name].append(now)
+
+        self._schedule_quota_retry(now)
+
+    def _schedule_quota_retry(self, now: float) -> None:
+        """Si hay waiters frenados solo por la cuota, re-despachar cuando se libere"""
+        if not self.max_per_minute or self._timer is not None:
+            return
+        if not any(queue.waiting for queue in self.classes.values()):
+            return
+        if self.in_flight >= self.max_concurrency:
+            return  # el próximo release despacha
+
+        oldest = [grants[0] for grants in self._grants.values() if grants]
+        if not oldest:
+            return
+        delay = max(0.0, min(oldest) + self.window_seconds - now)
+
+        def fire() -> None:
+            self._timer = None
+            self._dispatch()
+
+        self._timer = asyncio.get_running_loop().call_later(delay + 0.001, fire)
@@ -0,0 +1,4 @@
+from .attempt_log import AttemptLog, AttemptLogReader, SegmentView
+from .jsonl_writer import JsonlWriter
+
+__all__ = ["AttemptLog", "AttemptLogReader", "SegmentView", "JsonlWriter"]
@@ -0,0 +1,465 @@
+"""
+Attempt Log - Registro columnar append-only de intentos
+
+Cada segmento es un directorio con un archivo binario por columna
+(ancho fijo, little-endian) y diccionarios para los campos de texto
+de baja cardinalidad (exercise_id, exercise_type). Los archivos de
+columna se pueden abrir con numpy.memmap para escanear sin copias.
+
+Layout de un segmento:
+
+    segment-000001/
+        meta.json               # versión y dtypes de cada columna
+        timestamp.bin           # float64
+        pronunciation_score.bin # float32
+        ...
+        exercise_id.dict        # un valor por línea, código = nº de línea
+        exercise_type.dict
+"""
+
+import json
+import math
+import os
+import sys
+import threading
+import time
+from array import array
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from src.domain.models import AnalysisContext
+
+
+FORMAT_VERSION = 1
+
+# (nombre, typecode de array, dtype numpy)
+COLUMNS: List[Tuple[str, str, str]] = [
+    ("timestamp", "d", "<f8"),
+    ("pronunciation_score", "f", "<f4"),
+    ("fluency_score", "f", "<f4"),
+    ("rhythm_score", "f", "<f4"),
+    ("overall_score", "f", "<f4"),
+    ("previous_best_score", "f", "<f4"),  # NaN si no hay
+    ("latency_ms", "f", "<f4"),
+    ("difficulty_level", "B", "<u1"),
+    ("stars_earned", "B", "<u1"),
+    ("user_age", "b", "<i1"),  # -1 si no hay
+    ("flags", "B", "<u1"),  # bit 0: passed, bit 1: unlocked_next
+    ("attempt_number", "H", "<u2"),
+    ("exercise_id", "I", "<u4"),  # código de diccionario
+    ("exercise_type", "H", "<u2"),  # código de diccionario
+]
+
+DICTIONARY_COLUMNS = ("exercise_id", "exercise_type")
+
+_DTYPES = {name: dtype for name, _, dtype in COLUMNS}
+
+FLAG_PASSED = 1
+FLAG_UNLOCKED_NEXT = 2
+
+ROW_WIDTH = sum(array(typecode).itemsize for _, typecode, _ in COLUMNS)
+
+_NEEDS_BYTESWAP = sys.byteorder != "little"
+
+
+class _Segment:
+    """Segmento abierto para escritura"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.rows = 0
+        self.dictionaries: Dict[str, Dict[str, int]] = {
+            name: {} for name in DICTIONARY_COLUMNS
+        }
+
+        os.makedirs(path, exist_ok=True)
+        with open(os.path.join(path, "meta.json"), "w") as f:
+            json.dump({
+                "version": FORMAT_VERSION,
+                "columns": {name: dtype for name, _, dtype in COLUMNS},
+                "dictionaries": list(DICTIONARY_COLUMNS),
+            }, f)
+
+        self._column_files = {
+            name: open(os.path.join(path, f"{name}.bin"), "ab")
+            for name, _, _ in COLUMNS
+        }
+        self._dict_files = {
+            # newline="": "\r" y demás separadores se escriben tal cual
+            name: open(os.path.join(path, f"{name}.dict"), "a", encoding="utf-8", newline="")
+            for name in DICTIONARY_COLUMNS
+        }
+
+    @property
+    def size_bytes(self) -> int:
+        return self.rows * ROW_WIDTH
+
+    def encode(self, column: str, value: str) -> int:
+        """Retorna el código de diccionario, registrando el valor si es nuevo"""
+        codes = self.dictionaries[column]
+        code = codes.get(value)
+        if code is None:
+            code = len(codes)
+            codes[value] = code
+            # Una entrada por línea: "\n" es el único separador (ver SegmentView)
+            self._dict_files[column].write(value.replace("\n", " ") + "\n")
+        return code
+
+    def write(self, columns: Dict[str, array], rows: int) -> None:
+        """Escribe un bloque de filas ya codificado por columnas"""
+        # Diccionarios primero: una columna nunca referencia un código
+        # que no esté persistido
+        for f in self._dict_files.values():
+            f.flush()
+
+        for name, _, _ in COLUMNS:
+            data = columns[name]
+            if _NEEDS_BYTESWAP:
+                data.byteswap()
+            self._column_files[name].write(data.tobytes())
+
+        for f in self._column_files.values():
+            f.flush()
+
+        self.rows += rows
+
+    def close(self) -> None:
+        for f in list(self._column_files.values()) + list(self._dict_files.values()):
+            try:
+                f.close()
+            except Exception:
+                pass
+
+
+class AttemptLog:
+    """
+    Writer del registro columnar de intentos.
+
+    `append()` solo encola la fila en memoria; un hilo de fondo
+    la escribe en disco cada `flush_interval` segundos. Si el buffer
+    está lleno, la fila se descarta (nunca bloquea el request).
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        segment_max_bytes: int = 64 * 1024 * 1024,
+        flush_interval: float = 1.0,
+        max_pending: int = 10000
+    ):
+        """
+        Inicializa el writer y arranca el hilo de flush.
+
+        Args:
+            directory: Directorio base de los segmentos
+            segment_max_bytes: Tamaño a partir del cual se rota el segmento
+            flush_interval: Segundos entre flushes del buffer
+            max_pending: Máximo de filas en memoria antes de descartar
+        """
+        self.directory = directory
+        self.segment_max_bytes = segment_max_bytes
+        self.flush_interval = flush_interval
+        self.max_pending = max_pending
+
+        os.makedirs(directory, exist_ok=True)
+
+        self._pending: List[tuple] = []
+        self._lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._stop = threading.Event()
+
+        self._segment: Optional[_Segment] = None
+        self._next_segment_number = _last_segment_number(directory) + 1
+
+        self.rows_written = 0
+        self.rows_dropped = 0
+        self.segments_created = 0
+        self.flush_errors = 0
+
+        self._thread = threading.Thread(
+            target=self._run,
+            name="attempt-log-flusher",
+            daemon=True
+        )
+        self._thread.start()
+
+    def append(self, context: AnalysisContext, latency_ms: float) -> bool:
+        """
+        Encola un intento para escritura.
+
+        Args:
+            context: Contexto del intento procesado
+            latency_ms: Latencia de generación de feedback
+
+        Returns:
+            bool: False si la fila se descartó por buffer lleno
+        """
+        row = (
+            time.time(),
+            context.pronunciation_score,
+            context.fluency_score,
+            context.rhythm_score,
+            context.overall_score,
+            context.previous_best_score,
+            latency_ms,
+            context.difficulty_level,
+            context.stars_earned,
+            context.user_age,
+            context.passed,
+            context.unlocked_next,
+            context.attempt_number,
+            context.exercise_id,
+            context.exercise_type,
+        )
+        with self._lock:
+            if len(self._pending) >= self.max_pending:
+                self.rows_dropped += 1
+                return False
+            self._pending.append(row)
+        return True
+
+    def flush(self) -> int:
+        """
+        Escribe a disco las filas pendientes.
+
+        Returns:
+            int: Número de filas escritas
+        """
+        with self._lock:
+            rows, self._pending = self._pending, []
+
+        if not rows:
+            return 0
+
+        with self._write_lock:
+            try:
+                segment = self._current_segment()
+                segment.write(self._encode(segment, rows), len(rows))
+                self.rows_written += len(rows)
+                if segment.size_bytes >= self.segment_max_bytes:
+                    segment.close()
+                    self._segment = None
+            except Exception as e:
+                self.flush_errors += 1
+                self.rows_dropped += len(rows)
+                print(f"⚠️ Error escribiendo attempt log: {e}")
+                # Una escritura parcial desalinea las columnas: el próximo
+                # flush empieza un segmento nuevo (el lector recorta este
+                # a las filas completas)
+                if self._segment is not None:
+                    self._segment.close()
+                    self._segment = None
+                return 0
+
+        return len(rows)
+
+    def close(self) -> None:
+        """Detiene el hilo de flush y escribe lo pendiente"""
+        self._stop.set()
+        self._thread.join(timeout=max(self.flush_interval * 2, 1.0))
+        self.flush()
+        with self._write_lock:
+            if self._segment is not None:
+                self._segment.close()
+                self._segment = None
+
+    def stats(self) -> dict:
+        """Métricas del writer"""
+        with self._lock:
+            pending = len(self._pending)
+        return {
+            "rows_written": self.rows_written,
+            "rows_dropped": self.rows_dropped,
+            "rows_pending": pending,
+            "segments_created": self.segments_created,
+            "flush_errors": self.flush_errors,
+        }
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+    def _current_segment(self) -> _Segment:
+        if self._segment is None:
+            name = f"segment-{self._next_segment_number:06d}"
+            self._next_segment_number += 1
+            self._segment = _Segment(os.path.join(self.directory, name))
+            self.segments_created += 1
+        return self._segment
+
+    @staticmethod
+    def _encode(segment: _Segment, rows: List[tuple]) -> Dict[str, array]:
+        columns = {name: array(typecode) for name, typecode, _ in COLUMNS}
+        nan = math.nan
+
+        for (ts, pron, flu, rhy, overall, prev_best, latency, difficulty,
+             stars, age, passed, unlocked, attempt_number, exercise_id,
+             exercise_type) in rows:
+            columns["timestamp"].append(ts)
+            columns["pronunciation_score"].append(pron)
+            columns["fluency_score"].append(flu)
+            columns["rhythm_score"].append(rhy)
+            columns["overall_score"].append(overall)
+            columns["previous_best_score"].append(nan if prev_best is None else prev_best)
+            columns["latency_ms"].append(latency)
+            columns["difficulty_level"].append(difficulty)
+            columns["stars_earned"].append(stars)
+            columns["user_age"].append(-1 if age is None else min(age, 127))
+            columns["flags"].append(
+                (FLAG_PASSED if passed else 0) | (FLAG_UNLOCKED_NEXT if unlocked else 0)
+            )
+            columns["attempt_number"].append(min(attempt_number, 0xFFFF))
+            columns["exercise_id"].append(segment.encode("exercise_id", exercise_id))
+            columns["exercise_type"].append(segment.encode("exercise_type", exercise_type))
+
+        return columns
+
+
+# ============================================================================
+# READER
+# ============================================================================
+
+class SegmentView:
+    """
+    Vista de solo lectura de un segmento.
+
+    Las columnas son numpy.memmap sobre los archivos del segmento,
+    recortadas al número de filas completas.
+    """
+
+    def __init__(self, path: str):
+        import numpy as np
+
+        self.path = path
+
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+        if meta.get("version") != FORMAT_VERSION:
+            raise ValueError(f"Versión de segmento no soportada: {meta.get('version')}")
+
+        dtypes = {name: np.dtype(dtype) for name, dtype in meta["columns"].items()}
+
+        # Un flush interrumpido puede dejar columnas de distinto largo
+        lengths = []
+        for name, dtype in dtypes.items():
+            size = os.path.getsize(os.path.join(path, f"{name}.bin"))
+            lengths.append(size // dtype.itemsize)
+        self.rows = min(lengths) if lengths else 0
+
+        self.columns = {}
+        for name, dtype in dtypes.items():
+            if self.rows == 0:
+                self.columns[name] = np.empty(0, dtype=dtype)
+            else:
+                self.columns[name] = np.memmap(
+                    os.path.join(path, f"{name}.bin"),
+                    dtype=dtype,
+                    mode="r",
+                    shape=(self.rows,)
+                )
+
+        self.dictionaries: Dict[str, List[str]] = {}
+        for name in meta.get("dictionaries", []):
+            # Solo "\n" separa entradas: splitlines() también corta en "\r",
+            # "\x85", "\u2028"... que pueden aparecer dentro de un id
+            with open(os.path.join(path, f"{name}.dict"), encoding="utf-8", newline="") as f:
+                self.dictionaries[name] = f.read().split("\n")[:-1]
+
+    def __len__(self) -> int:
+        return self.rows
+
+    def __getitem__(self, column: str):
+        return self.columns[column]
+
+    def decode(self, column: str):
+        """
+        Decodifica una columna de diccionario a un array de strings.
+
+        Args:
+            column: "exercise_id" | "exercise_type"
+
+        Returns:
+            numpy.ndarray: Valores de texto (copia)
+        """
+        import numpy as np
+
+        values = np.array(self.dictionaries[column], dtype=object)
+        return values[np.asarray(self.columns[column])]
+
+    def code_of(self, column: str, value: str) -> Optional[int]:
+        """Código de diccionario de un valor, o None si no aparece en el segmento"""
+        try:
+            return self.dictionaries[column].index(value)
+        except ValueError:
+            return None
+
+
+class AttemptLogReader:
+    """Lector del registro columnar de intentos"""
+
+    def __init__(self, directory: str):
+        """
+        Args:
+            directory: Directorio base de los segmentos
+        """
+        self.directory = directory
+
+    def segment_paths(self) -> List[str]:
+        """Rutas de los segmentos ordenadas por número"""
+        if not os.path.isdir(self.directory):
+            return []
+        return [
+            os.path.join(self.directory, name)
+            for name in sorted(os.listdir(self.directory))
+            if name.startswith("segment-")
+        ]
+
+    def segments(self) -> Iterator[SegmentView]:
+        """Itera los segmentos (zero-copy)"""
+        for path in self.segment_paths():
+            yield SegmentView(path)
+
+    def read_columns(self, columns: Optional[List[str]] = None) -> dict:
+        """
+        Concatena columnas de todos los segmentos.
+
+        Las columnas de diccionario se devuelven decodificadas.
+        A diferencia de `segments()`, esto copia los datos.
+
+        Args:
+            columns: Columnas a leer (todas si es None)
+
+        Returns:
+            dict: nombre de columna -> numpy.ndarray
+        """
+        import numpy as np
+
+        names = columns or [name for name, _, _ in COLUMNS]
+        parts: Dict[str, list] = {name: [] for name in names}
+
+        for segment in self.segments():
+            for name in names:
+                if name in segment.dictionaries:
+                    parts[name].append(segment.decode(name))
+                else:
+                    parts[name].append(np.asarray(segment[name]))
+
+        result = {}
+        for name in names:
+            if parts[name]:
+                result[name] = np.concatenate(parts[name])
+            elif name in DICTIONARY_COLUMNS:
+                result[name] = np.empty(0, dtype=object)
+            else:
+                result[name] = np.empty(0, dtype=_DTYPES[name])
+        return result
+
+
+def _last_segment_number(directory: str) -> int:
+    last = 0
+    for name in os.listdir(directory):
+        if name.startswith("segment-"):
+            try:
+                last = max(last, int(name[len("segment-"):]))
+            except ValueError:
+                continue
+    return last
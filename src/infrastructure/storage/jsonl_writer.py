@@ -0,0 +1,123 @@
+"""
+JSONL Writer - Escritura de líneas JSON en un hilo de fondo
+
+Base de la captura de tráfico y del exporter OTLP: el request solo
+encola y un hilo daemon serializa y escribe, agrupando en una sola
+escritura lo que ya esté en cola.
+"""
+
+import os
+import queue
+import threading
+from typing import Any, Callable, List
+
+
+class JsonlWriter:
+    """
+    Escribe items serializados como líneas en un archivo (modo append).
+
+    `put()` no bloquea: si la cola está llena, el item se descarta.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        serialize: Callable[[Any], str],
+        label: str,
+        thread_name: str,
+        max_pending: int = 1000
+    ):
+        """
+        Crea el directorio del archivo y arranca el hilo escritor.
+
+        Args:
+            path: Archivo JSONL de salida
+            serialize: Convierte un item en una línea (sin salto de línea);
+                corre en el hilo escritor
+            label: Nombre para los logs (ej: "Traffic capture")
+            thread_name: Nombre del hilo escritor
+            max_pending: Máximo de items en cola antes de descartar
+        """
+        self.path = path
+        self.label = label
+        self._serialize = serialize
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max_pending)
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.written = 0
+        self.dropped = 0
+
+        self._thread = threading.Thread(target=self._run, name=thread_name, daemon=True)
+        self._thread.start()
+
+    @property
+    def pending(self) -> int:
+        """Items en cola sin escribir"""
+        return self._queue.qsize()
+
+    def put(self, item: Any) -> bool:
+        """
+        Encola un item para escribir.
+
+        Returns:
+            bool: True si se encoló, False si la cola estaba llena
+        """
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            self.dropped += 1
+            return False
+        return True
+
+    def close(self) -> None:
+        """Escribe lo pendiente y detiene el hilo"""
+        # Si el hilo murió (ej: no pudo abrir el archivo) nadie vacía la
+        # cola: un put bloqueante colgaría el shutdown
+        if not self._thread.is_alive():
+            return
+        try:
+            self._queue.put(None, timeout=5)
+        except queue.Full:
+            print(f"⚠️ {self.label}: cola llena al cerrar, se descartan {self.pending} pendientes")
+            return
+        self._thread.join(timeout=5)
+
+    def _run(self) -> None:
+        with open(self.path, "a", encoding="utf-8") as f:
+            while True:
+                item = self._queue.get()
+                if item is None:
+                    return
+                items = [item]
+                # Agrupar lo que ya esté en cola en una sola escritura
+                while True:
+                    try:
+                        extra = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if extra is None:
+                        self._write(f, items)
+                        return
+                    items.append(extra)
+                self._write(f, items)
+
+    def _write(self, f, items: List[Any]) -> None:
+        lines = []
+        for item in items:
+            try:
+                lines.append(self._serialize(item))
+            except Exception as e:
+                self.dropped += 1
+                print(f"⚠️ {self.label}: error serializando: {e}")
+        if not lines:
+            return
+        try:
+            f.write("\n".join(lines) + "\n")
+            f.flush()
+            self.written += len(lines)
+        except Exception as e:
+            self.dropped += len(lines)
+            print(f"⚠️ {self.label}: error escribiendo {self.path}: {e}")
@@ -0,0 +1,25 @@
+from .tracer import (
+    Span,
+    Trace,
+    start_trace,
+    end_trace,
+    current_trace,
+    checkpoint,
+    span,
+    run_in_executor_traced,
+    sanitize_request_id
+)
+from .otlp_exporter import OtlpFileExporter
+
+__all__ = [
+    "Span",
+    "Trace",
+    "start_trace",
+    "end_trace",
+    "current_trace",
+    "checkpoint",
+    "span",
+    "run_in_executor_traced",
+    "sanitize_request_id",
+    "OtlpFileExporter"
+]
@@ -0,0 +1,140 @@
+"""
+OTLP Exporter - Spans a un archivo en formato OTLP/JSON
+
+Cada línea del archivo es un ExportTraceServiceRequest en la
+codificación JSON de OTLP, de modo que puede reenviarse tal cual a
+un collector (`/v1/traces`) o cargarse con herramientas que lean OTLP.
+"""
+
+import json
+import random
+
+from src.infrastructure.storage import JsonlWriter
+from .tracer import Trace
+
+
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+STATUS_CODE_ERROR = 2
+
+
+class OtlpFileExporter:
+    """
+    Exporta traces a un archivo JSONL.
+
+    `export()` solo encola; un JsonlWriter serializa y escribe en
+    segundo plano. Si la cola está llena, el trace se descarta.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        service_name: str,
+        service_version: str = "",
+        sample_rate: float = 1.0,
+        max_pending: int = 1000
+    ):
+        """
+        Inicializa el exporter y arranca el hilo escritor.
+
+        Args:
+            path: Archivo JSONL de salida (se abre en modo append)
+            service_name: Atributo service.name del recurso
+            service_version: Atributo service.version del recurso
+            sample_rate: Fracción de traces a exportar (0-1)
+            max_pending: Máximo de traces en cola antes de descartar
+        """
+        self.path = path
+        self.sample_rate = sample_rate
+        self._resource = {
+            "attributes": [
+                _attribute("service.name", service_name),
+                _attribute("service.version", service_version),
+            ]
+        }
+        self._writer = JsonlWriter(
+            path,
+            serialize=lambda trace: json.dumps(self.to_otlp(trace), ensure_ascii=False),
+            label="OTLP exporter",
+            thread_name="otlp-exporter",
+            max_pending=max_pending
+        )
+
+    def export(self, trace: Trace) -> bool:
+        """
+        Encola el trace con probabilidad `sample_rate`.
+
+        Returns:
+            bool: True si se encoló
+        """
+        if random.random() >= self.sample_rate:
+            return False
+        return self._writer.put(trace)
+
+    def close(self) -> None:
+        """Escribe lo pendiente y detiene el hilo"""
+        self._writer.close()
+
+    def stats(self) -> dict:
+        """Métricas del exporter"""
+        return {
+            "exported": self._writer.written,
+            "dropped": self._writer.dropped,
+            "pending": self._writer.pending,
+            "sample_rate": self.sample_rate,
+        }
+
+    def to_otlp(self, trace: Trace) -> dict:
+        """Convierte un trace a ExportTraceServiceRequest (OTLP/JSON)"""
+        end_ns = trace.end_ns if trace.end_ns is not None else trace.start_ns
+        root = {
+            "traceId": trace.trace_id,
+            "spanId": trace.root_span_id,
+            "name": trace.name,
+            "kind": SPAN_KIND_SERVER,
+            "startTimeUnixNano": str(trace.unix_ns(trace.start_ns)),
+            "endTimeUnixNano": str(trace.unix_ns(end_ns)),
+            "attributes": [
+                _attribute("http.request_id", trace.request_id),
+                *(_attribute(k, v) for k, v in trace.attributes.items()),
+            ],
+        }
+        if int(trace.attributes.get("http.status_code", 0)) >= 500:
+            root["status"] = {"code": STATUS_CODE_ERROR}
+
+        spans = [root]
+        for span in list(trace.spans):
+            otlp_span = {
+                "traceId": trace.trace_id,
+                "spanId": span.span_id,
+                "parentSpanId": span.parent_id,
+                "name": span.name,
+                "kind": SPAN_KIND_INTERNAL,
+                "startTimeUnixNano": str(trace.unix_ns(span.start_ns)),
+                "endTimeUnixNano": str(trace.unix_ns(span.end_ns)),
+                "attributes": [_attribute(k, v) for k, v in span.attributes.items()],
+            }
+            if "error" in span.attributes:
+                otlp_span["status"] = {"code": STATUS_CODE_ERROR}
+            spans.append(otlp_span)
+
+        return {
+            "resourceSpans": [{
+                "resource": self._resource,
+                "scopeSpans": [{
+                    "scope": {"name": "llm-feedback-service"},
+                    "spans": spans,
+                }],
+            }]
+        }
+
+
+def _attribute(key: str, value) -> dict:
+    """KeyValue de OTLP/JSON (los enteros se codifican como string)"""
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
@@ -0,0 +1,247 @@
+"""
+Tracer - Spans livianos por request
+
+Cada request HTTP tiene un Trace (guardado en un contextvar) con la
+lista de spans medidos. No hay dependencias externas: el trace se
+resume en el header Server-Timing y, opcionalmente, se exporta como
+OTLP JSON (ver otlp_exporter.py).
+
+Si no hay trace activo (ej: tools/ o scripts), todas las funciones
+de este módulo son no-ops.
+"""
+
+import hashlib
+import os
+import re
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterator, List, Optional, TypeVar
+
+
+T = TypeVar("T")
+
+# Request IDs aceptados desde el cliente / nginx
+_REQUEST_ID_RE = re.compile(r"^[A-Za-z0-9._:\-]{1,128}$")
+
+_current_trace: ContextVar[Optional["Trace"]] = ContextVar("current_trace", default=None)
+_current_span_id: ContextVar[Optional[str]] = ContextVar("current_span_id", default=None)
+
+
+@dataclass
+class Span:
+    """Span medido con perf_counter_ns (relativo al inicio del trace)"""
+
+    name: str
+    span_id: str
+    parent_id: Optional[str]
+    start_ns: int
+    end_ns: int
+    attributes: Dict[str, object] = field(default_factory=dict)
+
+    @property
+    def duration_ms(self) -> float:
+        return (self.end_ns - self.start_ns) / 1e6
+
+
+class Trace:
+    """
+    Trace de un request.
+
+    `add_span` puede llamarse desde threads del executor (append a
+    una lista es atómico en CPython).
+    """
+
+    def __init__(self, request_id: str, name: str):
+        """
+        Args:
+            request_id: X-Request-ID del request
+            name: Nombre del span raíz (ej: "POST /feedback/generate")
+        """
+        self.request_id = request_id
+        self.trace_id = trace_id_for(request_id)
+        self.name = name
+        self.root_span_id = new_span_id()
+        self.attributes: Dict[str, object] = {}
+        self.spans: List[Span] = []
+
+        # Anclas para convertir perf_counter_ns a tiempo unix
+        self.start_unix_ns = time.time_ns()
+        self.start_ns = time.perf_counter_ns()
+        self.end_ns: Optional[int] = None
+        self._last_checkpoint_ns = self.start_ns
+
+    def add_span(
+        self,
+        name: str,
+        start_ns: int,
+        end_ns: int,
+        parent_id: Optional[str] = None,
+        attributes: Optional[Dict[str, object]] = None,
+        span_id: Optional[str] = None
+    ) -> Span:
+        span = Span(
+            name=name,
+            span_id=span_id or new_span_id(),
+            parent_id=parent_id or self.root_span_id,
+            start_ns=start_ns,
+            end_ns=end_ns,
+            attributes=attributes or {}
+        )
+        self.spans.append(span)
+        return span
+
+    def checkpoint(self, name: str) -> Span:
+        """Registra un span desde el checkpoint anterior (o el inicio) hasta ahora"""
+        now = time.perf_counter_ns()
+        span = self.add_span(name, self._last_checkpoint_ns, now)
+        self._last_checkpoint_ns = now
+        return span
+
+    @property
+    def has_checkpoints(self) -> bool:
+        return self._last_checkpoint_ns != self.start_ns
+
+    def finish(self) -> None:
+        if self.end_ns is None:
+            self.end_ns = time.perf_counter_ns()
+
+    @property
+    def duration_ms(self) -> float:
+        end = self.end_ns if self.end_ns is not None else time.perf_counter_ns()
+        return (end - self.start_ns) / 1e6
+
+    def unix_ns(self, perf_ns: int) -> int:
+        return self.start_unix_ns + (perf_ns - self.start_ns)
+
+    def server_timing(self) -> str:
+        """
+        Valor del header Server-Timing.
+
+        Los spans con el mismo nombre (ej: reintentos) se suman.
+        """
+        totals: Dict[str, float] = {}
+        for span in list(self.spans):
+            totals[span.name] = totals.get(span.name, 0.0) + span.duration_ms
+        parts = [f"{name};dur={ms:.1f}" for name, ms in totals.items()]
+        parts.append(f"total;dur={self.duration_ms:.1f}")
+        return ", ".join(parts)
+
+
+def new_span_id() -> str:
+    """Span ID de 8 bytes en hex (formato OTLP)"""
+    return os.urandom(8).hex()
+
+
+def trace_id_for(request_id: str) -> str:
+    """
+    Trace ID de 16 bytes en hex derivado del request ID.
+
+    Si el request ID ya es un ID de 32 hex (nginx $request_id) se usa
+    tal cual, así los logs de nginx y los spans se correlacionan.
+    """
+    if len(request_id) == 32 and all(c in "0123456789abcdef" for c in request_id):
+        return request_id
+    return hashlib.sha256(request_id.encode()).hexdigest()[:32]
+
+
+def sanitize_request_id(value: Optional[str]) -> str:
+    """Retorna el request ID recibido si es válido, o uno nuevo"""
+    if value and _REQUEST_ID_RE.match(value):
+        return value
+    return uuid.uuid4().hex
+
+
+def start_trace(request_id: str, name: str):
+    """
+    Activa un trace en el contexto actual.
+
+    Returns:
+        tuple: (trace, token) - pasar el token a end_trace()
+    """
+    trace = Trace(request_id, name)
+    return trace, _current_trace.set(trace)
+
+
+def end_trace(token) -> None:
+    _current_trace.reset(token)
+
+
+def current_trace() -> Optional[Trace]:
+    """Trace activo, o None si el código corre fuera de un request"""
+    return _current_trace.get()
+
+
+def checkpoint(name: str) -> None:
+    """Trace.checkpoint sobre el trace activo (no-op si no hay)"""
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.checkpoint(name)
+
+
+@contextmanager
+def span(name: str, **attributes) -> Iterator[Optional[Span]]:
+    """
+    Mide un bloque como span hijo del span activo.
+
+    Uso:
+        with span("llm.parse", structured=True):
+            ...
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        yield None
+        return
+
+    span_id = new_span_id()
+    parent_id = _current_span_id.get()
+    token = _current_span_id.set(span_id)
+    start = time.perf_counter_ns()
+    recorded = Span(name, span_id, parent_id or trace.root_span_id, start, start, attributes)
+    try:
+        yield recorded
+    except BaseException as e:
+        recorded.attributes["error"] = type(e).__name__
+        raise
+    finally:
+        _current_span_id.reset(token)
+        recorded.end_ns = time.perf_counter_ns()
+        trace.spans.append(recorded)
+
+
+async def run_in_executor_traced(
+    loop,
+    fn: Callable[[], T],
+    name: str,
+    executor=None,
+    **attributes
+) -> T:
+    """
+    loop.run_in_executor(executor, fn) midiendo la espera en la cola del
+    thread pool ("executor.queue_wait") y la ejecución (`name`).
+
+    El contextvar no se propaga a los threads del executor, por eso
+    el trace se captura aquí y se pasa explícitamente.
+    """
+    trace = _current_trace.get()
+    if trace is None:
+        return await loop.run_in_executor(executor, fn)
+
+    parent_id = _current_span_id.get()
+    submitted = time.perf_counter_ns()
+
+    def traced():
+        started = time.perf_counter_ns()
+        trace.add_span("executor.queue_wait", submitted, started, parent_id)
+        span_attributes = dict(attributes)
+        try:
+            return fn()
+        except BaseException as e:
+            span_attributes["error"] = type(e).__name__
+            raise
+        finally:
+            trace.add_span(name, started, time.perf_counter_ns(), parent_id, span_attributes)
+
+    return await loop.run_in_executor(executor, traced)
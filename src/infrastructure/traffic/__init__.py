@@ -0,0 +1,3 @@
+from .capture import TrafficCapture
+
+__all__ = ["TrafficCapture"]
@@ -0,0 +1,103 @@
+"""
+Traffic Capture - Muestreo de payloads reales a un corpus JSONL
+
+El corpus se usa con `tools/replay_traffic.py` para reproducir carga
+con forma de producción contra otra build. Los identificadores de
+usuario se reemplazan por un hash con sal antes de escribirse.
+"""
+
+import hashlib
+import hmac
+import json
+import random
+import time
+
+from src.infrastructure.storage import JsonlWriter
+
+
+# Campos que identifican a una persona o intento real
+PII_FIELDS = ("user_id", "attempt_id")
+
+
+class TrafficCapture:
+    """
+    Captura una muestra de requests a un archivo JSONL.
+
+    `record()` solo encola; un JsonlWriter escribe las líneas en
+    segundo plano. Si la cola está llena, la muestra se descarta.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        sample_rate: float = 0.01,
+        salt: str = "",
+        max_pending: int = 1000
+    ):
+        """
+        Inicializa la captura y arranca el hilo escritor.
+
+        Args:
+            path: Archivo JSONL de salida (se abre en modo append)
+            sample_rate: Fracción de requests a capturar (0-1)
+            salt: Sal para el hash de identificadores (obligatoria)
+            max_pending: Máximo de líneas en cola antes de descartar
+        
+        Raises:
+            ValueError: Si la sal está vacía (el hash sería reversible
+                probando ids conocidos)
+        """
+        if not salt:
+            raise ValueError("TrafficCapture requiere una sal no vacía")
+        self.path = path
+        self.sample_rate = sample_rate
+        self._salt = salt.encode()
+        self._writer = JsonlWriter(
+            path,
+            serialize=lambda line: line,
+            label="Traffic capture",
+            thread_name="traffic-capture-writer",
+            max_pending=max_pending
+        )
+
+    def record(self, route: str, payload: dict) -> bool:
+        """
+        Captura el payload con probabilidad `sample_rate`.
+
+        Args:
+            route: Path del endpoint (ej: "/feedback/generate")
+            payload: Body del request ya validado
+
+        Returns:
+            bool: True si se encoló para escritura
+        """
+        if random.random() >= self.sample_rate:
+            return False
+
+        sanitized = dict(payload)
+        for key in PII_FIELDS:
+            if sanitized.get(key) is not None:
+                sanitized[key] = self.hash_identifier(str(sanitized[key]))
+
+        line = json.dumps(
+            {"ts": time.time(), "route": route, "payload": sanitized},
+            ensure_ascii=False
+        )
+        return self._writer.put(line)
+
+    def hash_identifier(self, value: str) -> str:
+        """Hash estable con sal (mismo usuario -> mismo hash)"""
+        return hmac.new(self._salt, value.encode(), hashlib.sha256).hexdigest()[:32]
+
+    def close(self) -> None:
+        """Escribe lo pendiente y detiene el hilo"""
+        self._writer.close()
+
+    def stats(self) -> dict:
+        """Métricas de la captura"""
+        return {
+            "captured": self._writer.written,
+            "dropped": self._writer.dropped,
+            "pending": self._writer.pending,
+            "sample_rate": self.sample_rate,
+        }
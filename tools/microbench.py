@@ -0,0 +1,386 @@
+"""
+Microbenchmarks del camino caliente de CPU
+
+Mide por llamada las funciones que corren en cada request, más el
+request completo en proceso (TestClient, feedback algorítmico):
+
+    request_validation      GenerateFeedbackRequest(**payload)
+    context_post_init       AnalysisContext(...) (validaciones de __post_init__)
+    build_user_prompt       prompt del LLM para un contexto
+    fallback_feedback       GenerateFeedbackUseCase._generate_fallback_feedback
+    weakest_aspect          AnalysisContext.get_weakest_aspect
+    parse_llm_structured    parse_llm_output de una respuesta con response_schema
+    parse_llm_prose         parse_llm_output de una respuesta en bloque ```json
+    output_guardrail        OutputGuardrail.apply sobre feedback parseado (1 de 4 con términos técnicos)
+    response_serialization  FeedbackResponse.from_feedback(...).model_dump_json()
+    rule_engine_10k         evaluate() de rule_engine sobre 10.000 intentos
+    request_e2e             POST /feedback/generate a través de la app ASGI
+
+Cada benchmark se calibra para que una repetición dure al menos
+--min-time segundos y se repite --repeat veces; se reporta la mediana
+(y el mínimo) en nanosegundos por llamada. Las entradas son contextos
+aleatorios con semilla fija, recorridos en ciclo.
+
+`compare` falla (exit 1) si algún benchmark empeora más del umbral
+respecto del baseline. Los baselines dependen de la máquina: generarlos
+y compararlos en el mismo host.
+
+Uso:
+    python -m tools.microbench run --output data/bench/baseline.json
+    python -m tools.microbench run --output data/bench/current.json --only parse
+    python -m tools.microbench compare data/bench/baseline.json data/bench/current.json --threshold 10
+    python -m tools.microbench run --compare data/bench/baseline.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import time
+from typing import Callable, Dict, List, Optional
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+FORMAT_VERSION = 1
+INPUTS = 256
+
+# Umbral propio de los benchmarks más ruidosos (% sobre el baseline)
+NOISY_THRESHOLDS = {"request_e2e": 25.0}
+
+
+# ============================================================================
+# BENCHMARKS
+# ============================================================================
+
+def _setup_environment() -> None:
+    """Servicio sin LLM ni componentes con I/O: solo el camino de CPU"""
+    os.environ.setdefault("GOOGLE_API_KEY", "microbench")
+    os.environ["LLM_FEEDBACK_ENABLED"] = "false"
+    for flag in (
+        "FEEDBACK_CACHE_ENABLED", "SIMILARITY_CACHE_ENABLED", "ATTEMPT_LOG_ENABLED",
+        "TRAFFIC_CAPTURE_ENABLED", "SHADOW_ENABLED", "DELIVERY_ENABLED",
+        "LOOP_MONITOR_ENABLED", "TRACING_ENABLED",
+    ):
+        os.environ[flag] = "false"
+
+
+def build_benchmarks(seed: int) -> Dict[str, Callable[[int], None]]:
+    """
+    Arma los benchmarks con sus entradas.
+
+    Returns:
+        dict: nombre -> función que recibe el nº de iteración
+    """
+    from tools.msgpack_conformance import random_payload
+    from src.domain.models import AnalysisContext
+    from src.domain.rules import ScoreBatch, evaluate
+    from src.application.use_cases import GenerateFeedbackUseCase
+    from src.infrastructure.llm import build_user_prompt, OutputGuardrail
+    from src.api.routes.feedback_routes import GenerateFeedbackRequest, FeedbackResponse
+
+    rng = random.Random(seed)
+    payloads = [random_payload(rng) for _ in range(INPUTS)]
+    requests = [GenerateFeedbackRequest(**payload) for payload in payloads]
+    contexts = [request.to_context() for request in requests]
+    context_fields = [vars(context).copy() for context in contexts]
+
+    use_case = GenerateFeedbackUseCase(llm_client=None, use_llm=False)
+    feedbacks = [use_case._generate_fallback_feedback(context) for context in contexts]
+    structured = [
+        json.dumps(FeedbackResponse.from_feedback(feedback).model_dump(), ensure_ascii=False)
+        for feedback in feedbacks
+    ]
+    prose = [f"Aquí está el feedback:\n```json\n{text}\n```" for text in structured]
+
+    guardrail = OutputGuardrail()
+    parsed = [json.loads(text) for text in structured]
+    for data in parsed[::4]:
+        data["specific_tip"] = f"Practica el fonema con la punta de la lengua. {data['specific_tip']}"
+        data["areas_to_improve"] = data["areas_to_improve"] + ["La vibrante múltiple"]
+
+    scores = ScoreBatch.from_contexts(
+        [contexts[i % INPUTS] for i in range(10000)]
+    )
+
+    mask = INPUTS - 1
+
+    def request_validation(i: int) -> None:
+        GenerateFeedbackRequest(**payloads[i & mask])
+
+    def context_post_init(i: int) -> None:
+        AnalysisContext(**context_fields[i & mask])
+
+    def user_prompt(i: int) -> None:
+        build_user_prompt(contexts[i & mask])
+
+    def fallback_feedback(i: int) -> None:
+        use_case._generate_fallback_feedback(contexts[i & mask])
+
+    def weakest_aspect(i: int) -> None:
+        contexts[i & mask].get_weakest_aspect()
+
+    def parse_llm_structured(i: int) -> None:
+        use_case.parse_llm_output(structured[i & mask], structured=True, repair=False)
+
+    def parse_llm_prose(i: int) -> None:
+        use_case.parse_llm_output(prose[i & mask], structured=False, repair=False)
+
+    def output_guardrail(i: int) -> None:
+        guardrail.apply(parsed[i & mask], lambda: feedbacks[i & mask])
+
+    def response_serialization(i: int) -> None:
+        FeedbackResponse.from_feedback(feedbacks[i & mask]).model_dump_json()
+
+    def rule_engine(i: int) -> None:
+        evaluate(scores)
+
+    benchmarks = {
+        "request_validation": request_validation,
+        "context_post_init": context_post_init,
+        "build_user_prompt": user_prompt,
+        "fallback_feedback": fallback_feedback,
+        "weakest_aspect": weakest_aspect,
+        "parse_llm_structured": parse_llm_structured,
+        "parse_llm_prose": parse_llm_prose,
+        "output_guardrail": output_guardrail,
+        "response_serialization": response_serialization,
+        "rule_engine_10k": rule_engine,
+    }
+
+    try:
+        from fastapi.testclient import TestClient
+        import main
+    except ImportError as e:
+        print(f"⚠️ request_e2e omitido: {e}")
+        return benchmarks
+
+    client = TestClient(main.app)
+
+    def request_e2e(i: int) -> None:
+        response = client.post("/feedback/generate", json=payloads[i & mask])
+        if response.status_code != 200:
+            raise RuntimeError(f"/feedback/generate respondió {response.status_code}")
+
+    benchmarks["request_e2e"] = request_e2e
+    return benchmarks
+
+
+# ============================================================================
+# MEDICIÓN
+# ============================================================================
+
+def measure(fn: Callable[[int], None], min_time: float, repeat: int) -> dict:
+    """
+    Mide una función en ns por llamada.
+
+    Args:
+        fn: Función que recibe el nº de iteración
+        min_time: Duración mínima de cada repetición (segundos)
+        repeat: Repeticiones
+
+    Returns:
+        dict: median_ns, min_ns, stdev_ns, loops, repeat
+    """
+    # Calibración: estimar las iteraciones que llegan a min_time
+    loops = 1
+    while loops < 1 << 24:
+        elapsed = _time_loops(fn, loops)
+        if elapsed >= min_time:
+            break
+        loops = max(loops * 2, int(loops * min_time * 1.1 / max(elapsed, 1e-9)))
+
+    samples = [_time_loops(fn, loops) / loops * 1e9 for _ in range(repeat)]
+    return {
+        "median_ns": round(statistics.median(samples), 1),
+        "min_ns": round(min(samples), 1),
+        "stdev_ns": round(statistics.stdev(samples), 1) if len(samples) > 1 else 0.0,
+        "loops": loops,
+        "repeat": repeat,
+    }
+
+
+def _time_loops(fn: Callable[[int], None], loops: int) -> float:
+    perf_counter = time.perf_counter
+    started = perf_counter()
+    for i in range(loops):
+        fn(i)
+    return perf_counter() - started
+
+
+def run(
+    only: Optional[List[str]],
+    min_time: float,
+    repeat: int,
+    seed: int
+) -> dict:
+    """Corre los benchmarks y retorna el reporte"""
+    _setup_environment()
+    # Los prints del servicio (arranque, feedback generado) no van a la salida
+    with contextlib.redirect_stdout(io.StringIO()):
+        benchmarks = build_benchmarks(seed)
+
+    selected = [
+        name for name in benchmarks
+        if not only or any(pattern in name for pattern in only)
+    ]
+
+    results = {}
+    for name in selected:
+        with contextlib.redirect_stdout(io.StringIO()):
+            result = measure(benchmarks[name], min_time, repeat)
+        results[name] = result
+        print(f"   {name:<24} {_format_ns(result['median_ns']):>10}/llamada"
+              f"  (min {_format_ns(result['min_ns'])}, ±{_format_ns(result['stdev_ns'])})")
+
+    return {
+        "version": FORMAT_VERSION,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "environment": _environment(),
+        "settings": {"min_time": min_time, "repeat": repeat, "seed": seed},
+        "results": results,
+    }
+
+
+# ============================================================================
+# COMPARACIÓN
+# ============================================================================
+
+def compare(baseline: dict, current: dict, threshold: float) -> List[dict]:
+    """
+    Compara medianas contra el baseline.
+
+    Args:
+        baseline: Reporte de referencia
+        current: Reporte a evaluar
+        threshold: Empeoramiento máximo aceptado (%)
+
+    Returns:
+        list: Una fila por benchmark presente en ambos reportes
+    """
+    rows = []
+    for name, result in current["results"].items():
+        reference = baseline["results"].get(name)
+        if reference is None:
+            continue
+        limit = max(threshold, NOISY_THRESHOLDS.get(name, 0.0))
+        change = (result["median_ns"] - reference["median_ns"]) / reference["median_ns"] * 100
+        rows.append({
+            "name": name,
+            "baseline_ns": reference["median_ns"],
+            "current_ns": result["median_ns"],
+            "change_pct": round(change, 1),
+            "threshold_pct": limit,
+            "regressed": change > limit,
+        })
+    return rows
+
+
+def print_comparison(rows: List[dict], baseline: dict, current: dict) -> None:
+    if baseline.get("environment", {}).get("machine") != current.get("environment", {}).get("machine"):
+        print("⚠️ Baseline y medición de máquinas distintas: la comparación no es confiable")
+    print(f"   {'benchmark':<24} {'baseline':>10} {'actual':>10} {'cambio':>8}")
+    for row in rows:
+        mark = "❌" if row["regressed"] else "✅"
+        print(f"{mark} {row['name']:<24} {_format_ns(row['baseline_ns']):>10} "
+              f"{_format_ns(row['current_ns']):>10} {row['change_pct']:>+7.1f}%")
+
+
+def _load(path: str) -> dict:
+    with open(path, encoding="utf-8") as f:
+        report = json.load(f)
+    if report.get("version") != FORMAT_VERSION:
+        raise ValueError(f"Versión de reporte no soportada en {path}: {report.get('version')}")
+    return report
+
+
+def _save(report: dict, path: str) -> None:
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+        f.write("\n")
+
+
+def _environment() -> dict:
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT, capture_output=True, text=True, timeout=5
+        ).stdout.strip() or None
+    except Exception:
+        commit = None
+    return {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "machine": f"{platform.node()}/{platform.machine()}",
+        "processor": platform.processor(),
+        "git_commit": commit,
+    }
+
+
+def _format_ns(value: float) -> str:
+    if value >= 1e6:
+        return f"{value / 1e6:.2f}ms"
+    if value >= 1e3:
+        return f"{value / 1e3:.2f}µs"
+    return f"{value:.0f}ns"
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Microbenchmarks del camino caliente")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="Correr los benchmarks")
+    run_parser.add_argument("--output", help="Archivo JSON donde guardar el reporte")
+    run_parser.add_argument("--only", nargs="*", help="Solo los benchmarks que contengan estos textos")
+    run_parser.add_argument("--min-time", type=float, default=0.2,
+                            help="Duración mínima de cada repetición (segundos)")
+    run_parser.add_argument("--repeat", type=int, default=5)
+    run_parser.add_argument("--seed", type=int, default=7)
+    run_parser.add_argument("--compare", metavar="BASELINE", help="Comparar contra un baseline al terminar")
+    run_parser.add_argument("--threshold", type=float, default=10.0,
+                            help="Empeoramiento máximo aceptado (%%)")
+
+    compare_parser = commands.add_parser("compare", help="Comparar un reporte contra un baseline")
+    compare_parser.add_argument("baseline")
+    compare_parser.add_argument("current")
+    compare_parser.add_argument("--threshold", type=float, default=10.0,
+                                help="Empeoramiento máximo aceptado (%%)")
+
+    args = parser.parse_args(argv)
+
+    if sys.path[0] != ROOT:
+        sys.path.insert(0, ROOT)
+
+    if args.command == "run":
+        print("⏱️ Microbenchmarks")
+        current = run(args.only, args.min_time, args.repeat, args.seed)
+        if args.output:
+            _save(current, args.output)
+            print(f"💾 Reporte: {args.output}")
+        if not args.compare:
+            return 0
+        baseline = _load(args.compare)
+    else:
+        baseline, current = _load(args.baseline), _load(args.current)
+
+    rows = compare(baseline, current, args.threshold)
+    print_comparison(rows, baseline, current)
+    regressed = [row["name"] for row in rows if row["regressed"]]
+    if regressed:
+        print(f"❌ Regresiones: {', '.join(regressed)}")
+        return 1
+    print("✅ Sin regresiones")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
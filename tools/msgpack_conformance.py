@@ -0,0 +1,217 @@
+"""
+Conformidad y benchmark del camino MessagePack de /feedback/generate
+
+1. Conformidad: genera payloads aleatorios (válidos e inválidos) y los
+   envía como JSON y como MessagePack a la app en proceso (TestClient,
+   con el feedback algorítmico para que la respuesta sea determinista).
+   Verifica que ambos caminos respondan el mismo status y, si es 200,
+   el mismo feedback.
+2. Benchmark: mide por request el costo de decodificar + validar +
+   construir el AnalysisContext (JSON + pydantic vs MessagePack +
+   decode_fields) y el tamaño del body, y el tiempo end-to-end por
+   request a través de la app.
+
+Uso:
+    python -m tools.msgpack_conformance --cases 2000 --bench 20000
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import time
+from typing import List, Optional, Tuple
+
+import msgpack
+
+
+EXERCISE_TYPES = ["fonema", "ritmo", "entonacion"]
+
+
+def random_payload(rng: random.Random) -> dict:
+    """Payload válido con la forma de los requests del ML Service"""
+    overall = round(rng.uniform(0, 100), 1)
+    payload = {
+        "attempt_id": f"attempt-{rng.getrandbits(64):x}",
+        "user_id": f"user-{rng.randrange(10000)}",
+        "exercise_id": f"{rng.choice(EXERCISE_TYPES)}_{rng.randrange(40)}",
+        "pronunciation_score": round(rng.uniform(0, 100), 1),
+        "fluency_score": round(rng.uniform(0, 100), 1),
+        "rhythm_score": round(rng.uniform(0, 100), 1),
+        "overall_score": overall,
+        "exercise_type": rng.choice(EXERCISE_TYPES),
+        "exercise_content": "palabras con /r/ suave",
+        "difficulty_level": rng.randint(1, 5),
+        "reference_text": "raro, caro, pera, coro",
+        "passed": overall >= 70,
+        "stars_earned": rng.randint(0, 3),
+        "unlocked_next": rng.random() < 0.3,
+    }
+    # Campos opcionales presentes solo a veces
+    if rng.random() < 0.5:
+        payload["user_age"] = rng.randint(3, 18)
+    if rng.random() < 0.5:
+        payload["attempt_number"] = rng.randint(1, 20)
+    if rng.random() < 0.5:
+        payload["previous_best_score"] = round(rng.uniform(0, 100), 1)
+    # Enteros donde se espera float (pydantic los acepta)
+    if rng.random() < 0.2:
+        payload["fluency_score"] = rng.randint(0, 100)
+    return payload
+
+
+def mutate_invalid(rng: random.Random, payload: dict) -> dict:
+    """Introduce un error que ambos caminos deben rechazar"""
+    payload = dict(payload)
+    kind = rng.randrange(5)
+    if kind == 0:
+        payload.pop(rng.choice(["attempt_id", "overall_score", "passed", "exercise_type"]))
+    elif kind == 1:
+        # NaN pasa las comparaciones con ge/le: ambos caminos deben dar 422
+        payload["overall_score"] = rng.choice([-1.0, 100.5, float("nan")])
+    elif kind == 2:
+        payload["difficulty_level"] = rng.choice([0, 6])
+    elif kind == 3:
+        payload["exercise_type"] = "desconocido"
+    else:
+        payload["stars_earned"] = 4
+    return payload
+
+
+def check_conformance(client, cases: int, seed: int) -> Tuple[int, List[str]]:
+    """
+    Envía cada caso por ambos caminos y compara.
+
+    Returns:
+        tuple: (casos verificados, lista de diferencias)
+    """
+    rng = random.Random(seed)
+    failures = []
+    for i in range(cases):
+        payload = random_payload(rng)
+        if i % 4 == 3:
+            payload = mutate_invalid(rng, payload)
+
+        json_response = client.post("/feedback/generate", json=payload)
+        msgpack_response = client.post(
+            "/feedback/generate",
+            content=msgpack.packb(payload),
+            headers={"Content-Type": "application/msgpack", "Accept": "application/msgpack"}
+        )
+
+        if json_response.status_code != msgpack_response.status_code:
+            failures.append(
+                f"caso {i}: status JSON={json_response.status_code} "
+                f"msgpack={msgpack_response.status_code} payload={payload}"
+            )
+            continue
+        if json_response.status_code != 200:
+            continue
+
+        json_body = json_response.json()
+        msgpack_body = msgpack.unpackb(msgpack_response.content)
+        if json_body != msgpack_body:
+            failures.append(f"caso {i}: respuestas distintas\n  JSON={json_body}\n  msgpack={msgpack_body}")
+
+    return cases, failures
+
+
+def bench_decode(iterations: int, seed: int) -> dict:
+    """Costo por request de body -> AnalysisContext en cada camino"""
+    from src.api.routes.feedback_routes import GenerateFeedbackRequest
+    from src.api.content_negotiation import decode_fields
+    from src.domain.models import AnalysisContext
+
+    rng = random.Random(seed)
+    payloads = [random_payload(rng) for _ in range(1000)]
+    json_bodies = [json.dumps(p).encode() for p in payloads]
+    msgpack_bodies = [msgpack.packb(p) for p in payloads]
+
+    def run_json():
+        for i in range(iterations):
+            data = json.loads(json_bodies[i % 1000])
+            GenerateFeedbackRequest(**data).to_context()
+
+    def run_msgpack():
+        for i in range(iterations):
+            data = msgpack.unpackb(msgpack_bodies[i % 1000])
+            AnalysisContext(**decode_fields(GenerateFeedbackRequest, data))
+
+    results = {}
+    for name, fn in (("json_pydantic", run_json), ("msgpack_direct", run_msgpack)):
+        fn()  # warm-up
+        started = time.perf_counter()
+        fn()
+        results[name] = (time.perf_counter() - started) / iterations * 1e6
+
+    results["json_body_bytes"] = sum(map(len, json_bodies)) / len(json_bodies)
+    results["msgpack_body_bytes"] = sum(map(len, msgpack_bodies)) / len(msgpack_bodies)
+    return results
+
+
+def bench_end_to_end(client, iterations: int, seed: int) -> dict:
+    """Tiempo por request a través de la app (ASGI en proceso, sin red)"""
+    rng = random.Random(seed)
+    payloads = [random_payload(rng) for _ in range(200)]
+    json_bodies = [json.dumps(p).encode() for p in payloads]
+    msgpack_bodies = [msgpack.packb(p) for p in payloads]
+
+    variants = {
+        "json": (json_bodies, {"Content-Type": "application/json"}),
+        "msgpack": (msgpack_bodies, {"Content-Type": "application/msgpack", "Accept": "application/msgpack"}),
+    }
+    results = {}
+    for name, (bodies, headers) in variants.items():
+        for body in bodies[:50]:
+            client.post("/feedback/generate", content=body, headers=headers)
+        started = time.perf_counter()
+        for i in range(iterations):
+            client.post("/feedback/generate", content=bodies[i % len(bodies)], headers=headers)
+        results[name] = (time.perf_counter() - started) / iterations * 1e6
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Conformidad y benchmark JSON vs MessagePack")
+    parser.add_argument("--cases", type=int, default=2000, help="Casos de conformidad")
+    parser.add_argument("--bench", type=int, default=20000, help="Iteraciones del benchmark de decode")
+    parser.add_argument("--e2e", type=int, default=2000, help="Requests del benchmark end-to-end")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args(argv)
+
+    # Respuestas deterministas y sin efectos laterales
+    os.environ.setdefault("GOOGLE_API_KEY", "conformance")
+    os.environ["LLM_FEEDBACK_ENABLED"] = "false"
+    os.environ["TRACING_SERVER_TIMING"] = "false"
+    os.environ["TRAFFIC_CAPTURE_ENABLED"] = "false"
+    os.environ["ATTEMPT_LOG_ENABLED"] = "false"
+
+    from fastapi.testclient import TestClient
+    import main as service
+
+    with TestClient(service.app) as client:
+        checked, failures = check_conformance(client, args.cases, args.seed)
+        print(f"\n🔎 Conformidad: {checked - len(failures)}/{checked} casos equivalentes")
+        for failure in failures[:20]:
+            print(f"   ❌ {failure}")
+
+        decode = bench_decode(args.bench, args.seed)
+        print(f"\n⏱️ Body -> AnalysisContext ({args.bench} iteraciones)")
+        print(f"   JSON + pydantic:      {decode['json_pydantic']:.2f} µs/request")
+        print(f"   MessagePack directo:  {decode['msgpack_direct']:.2f} µs/request "
+              f"({decode['json_pydantic'] / decode['msgpack_direct']:.1f}x)")
+        print(f"   Body promedio: JSON {decode['json_body_bytes']:.0f} B, "
+              f"MessagePack {decode['msgpack_body_bytes']:.0f} B")
+
+        if args.e2e:
+            e2e = bench_end_to_end(client, args.e2e, args.seed)
+            print(f"\n⏱️ End-to-end en proceso ({args.e2e} requests)")
+            print(f"   JSON:        {e2e['json']:.0f} µs/request")
+            print(f"   MessagePack: {e2e['msgpack']:.0f} µs/request")
+
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
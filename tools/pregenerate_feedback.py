@@ -0,0 +1,271 @@
+"""
+Pre-generación offline de feedback para el catálogo de ejercicios
+
+Recorre cada ejercicio del catálogo contra una grilla de scores
+(pronunciación × fluidez × ritmo) y estados de aprobación, genera el
+feedback con el LLM respetando la cuota y escribe un snapshot que el
+servicio carga al iniciar (FEEDBACK_SNAPSHOT_PATH).
+
+Cada combinación cubre su bucket completo: el servicio redondea los
+scores de un intento al punto más cercano de la grilla (ver
+SimilarityFeedbackCache.set_bucket_grid), así que la grilla define la
+granularidad del feedback, no la cobertura.
+
+Pensado para correr fuera de horario pico (cron). Con --resume se
+saltan las combinaciones que ya están en el snapshot.
+
+Uso:
+    python -m tools.pregenerate_feedback tools/exercise_catalogue.example.json \\
+        --output data/feedback_snapshot.jsonl.gz \\
+        --buckets 40,60,75,90 --rpm 10 --max-requests 500
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import sys
+import time
+from typing import Iterator, List, Optional, Tuple
+
+from src.domain.models import AnalysisContext
+from src.infrastructure.cache import write_snapshot, read_snapshot, read_snapshot_header
+from src.infrastructure.cache.similarity_cache import index_key
+from src.infrastructure.config import get_settings
+
+
+# El servicio usa 70 como umbral de aprobación
+PASS_THRESHOLD = 70
+
+# Desempate del aspecto más débil en puntos de la grilla con empates
+TIE_NUDGE = 0.1
+
+
+def load_catalogue(path: str) -> List[dict]:
+    """
+    Carga el catálogo de ejercicios.
+
+    Args:
+        path: JSON con una lista de ejercicios (exercise_id, exercise_type,
+            exercise_content, difficulty_level, reference_text)
+
+    Returns:
+        list: Ejercicios
+    """
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def enumerate_contexts(
+    exercise: dict,
+    buckets: List[float],
+    pass_states: List[bool],
+    unlocked_states: List[bool]
+) -> Iterator[Tuple[Tuple[float, float, float], AnalysisContext]]:
+    """
+    Genera los contextos de la grilla para un ejercicio.
+
+    El score general es el promedio de los tres aspectos; solo se
+    generan combinaciones coherentes con ese promedio (no existe un
+    intento aprobado con promedio < 70) y unlocked_next solo aplica
+    a intentos aprobados.
+
+    Si varios aspectos empatan como el más débil, se genera un contexto
+    por cada uno (los otros suben TIE_NUDGE): los intentos que caen en
+    ese bucket pueden tener cualquiera de ellos como el más débil.
+
+    Args:
+        exercise: Entrada del catálogo
+        buckets: Valores de score por aspecto
+        pass_states: Estados de aprobación a incluir
+        unlocked_states: Estados de desbloqueo a incluir (si aprobó)
+
+    Yields:
+        Tuple: (punto de la grilla, contexto sintético)
+    """
+    for point in itertools.product(buckets, repeat=3):
+        overall = sum(point) / 3
+        passed = overall >= PASS_THRESHOLD
+        if passed not in pass_states:
+            continue
+
+        lowest = min(point)
+        tied = [i for i, value in enumerate(point) if value == lowest]
+        variants = [point] if len(tied) == 1 else [
+            tuple(value + TIE_NUDGE if i in tied and i != weakest else value for i, value in enumerate(point))
+            for weakest in tied
+        ]
+
+        for (pronunciation, fluency, rhythm), unlocked in itertools.product(
+            variants, unlocked_states if passed else [False]
+        ):
+            yield point, AnalysisContext(
+                attempt_id="pregenerated",
+                user_id="pregenerated",
+                exercise_id=exercise["exercise_id"],
+                pronunciation_score=pronunciation,
+                fluency_score=fluency,
+                rhythm_score=rhythm,
+                overall_score=overall,
+                exercise_type=exercise["exercise_type"],
+                exercise_content=exercise["exercise_content"],
+                difficulty_level=exercise["difficulty_level"],
+                reference_text=exercise["reference_text"],
+                passed=passed,
+                stars_earned=_stars_for(overall),
+                unlocked_next=unlocked
+            )
+
+
+def _stars_for(overall: float) -> int:
+    if overall >= 90:
+        return 3
+    if overall >= 80:
+        return 2
+    if overall >= PASS_THRESHOLD:
+        return 1
+    return 0
+
+
+def _entry(point, context: AnalysisContext, feedback) -> dict:
+    return {
+        "exercise_id": context.exercise_id,
+        "passed": context.passed,
+        "unlocked_next": context.unlocked_next,
+        "weakest": context.get_weakest_aspect(),
+        "scores": list(point),
+        "feedback": feedback.to_dict(),
+    }
+
+
+def _parse_bools(value: str) -> List[bool]:
+    mapping = {"true": True, "passed": True, "false": False, "failed": False}
+    return [mapping[v.strip().lower()] for v in value.split(",") if v.strip()]
+
+
+async def pregenerate(
+    catalogue: List[dict],
+    output: str,
+    buckets: List[float],
+    pass_states: List[bool],
+    unlocked_states: List[bool],
+    rpm: float,
+    max_requests: Optional[int],
+    resume: bool
+) -> int:
+    """
+    Ejecuta la pre-generación y escribe el snapshot.
+
+    Returns:
+        int: Entradas escritas en el snapshot
+    """
+    # Import diferido: el SDK del LLM solo se carga si hay trabajo
+    from src.api.dependencies import (
+        get_gemini_client,
+        get_feedback_response_schema,
+        get_output_guardrail
+    )
+    from src.application.use_cases import GenerateFeedbackUseCase
+
+    entries = []
+    done = set()
+
+    # La grilla va en el header: en el servicio cada entrada cubre su bucket
+    grid = list(buckets)
+    if resume and os.path.exists(output):
+        grid.extend(read_snapshot_header(output).get("buckets", []))
+        for entry in read_snapshot(output):
+            key = (entry["exercise_id"], entry["passed"], entry["unlocked_next"], entry["weakest"])
+            done.add((key, tuple(entry["scores"])))
+            entries.append(entry)
+        print(f"↩️ Reanudando con {len(entries)} entradas existentes")
+
+    use_case = GenerateFeedbackUseCase(
+        llm_client=get_gemini_client(),
+        use_llm=True,
+        response_schema=get_feedback_response_schema(),
+        # El snapshot se sirve sin pasar por el LLM: se guarda ya revisado
+        output_guardrail=get_output_guardrail()
+    )
+
+    interval = 60.0 / rpm if rpm > 0 else 0.0
+    requests_made = 0
+    failures = 0
+    next_call = time.monotonic()
+
+    try:
+        for exercise in catalogue:
+            for point, context in enumerate_contexts(exercise, buckets, pass_states, unlocked_states):
+                combination = (index_key(context), point)
+                if combination in done:
+                    continue
+                if max_requests is not None and requests_made >= max_requests:
+                    print(f"⏹️ Presupuesto de {max_requests} requests agotado")
+                    return write_snapshot(output, entries, grid)
+
+                # Respetar la cuota (requests por minuto)
+                delay = next_call - time.monotonic()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+                next_call = time.monotonic() + interval
+
+                requests_made += 1
+                try:
+                    feedback = await use_case.generate_llm_feedback(context)
+                except Exception as e:
+                    failures += 1
+                    print(f"⚠️ Falló {context.exercise_id} "
+                          f"({context.pronunciation_score:.0f}/{context.fluency_score:.0f}/"
+                          f"{context.rhythm_score:.0f}): {e}")
+                    continue
+
+                done.add(combination)
+                entries.append(_entry(point, context, feedback))
+    except (KeyboardInterrupt, asyncio.CancelledError):
+        print("⏹️ Interrumpido, guardando lo generado")
+    finally:
+        print(f"📊 Requests: {requests_made}, fallidos: {failures}, entradas: {len(entries)}")
+        if use_case.output_guardrail is not None:
+            print(f"🛡️ Guardrail: {use_case.output_guardrail.stats()}")
+
+    return write_snapshot(output, entries, grid)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    settings = get_settings()
+
+    parser = argparse.ArgumentParser(description="Pre-generación de feedback para el catálogo")
+    parser.add_argument("catalogue", help="JSON con la lista de ejercicios")
+    parser.add_argument("--output", default=settings.FEEDBACK_SNAPSHOT_PATH or "data/feedback_snapshot.jsonl.gz")
+    parser.add_argument("--buckets", default="40,60,75,90",
+                        help="Scores por aspecto separados por coma")
+    parser.add_argument("--pass-states", default="passed,failed",
+                        help="Estados de aprobación a incluir (passed,failed)")
+    parser.add_argument("--unlocked-states", default="false,true",
+                        help="Estados de unlocked_next a incluir para intentos aprobados")
+    parser.add_argument("--rpm", type=float, default=10.0, help="Máximo de requests por minuto")
+    parser.add_argument("--max-requests", type=int, help="Presupuesto total de requests")
+    parser.add_argument("--resume", action="store_true",
+                        help="Conservar el snapshot existente y generar solo lo que falta")
+    args = parser.parse_args(argv)
+
+    catalogue = load_catalogue(args.catalogue)
+    buckets = [float(v) for v in args.buckets.split(",") if v.strip()]
+
+    written = asyncio.run(pregenerate(
+        catalogue,
+        output=args.output,
+        buckets=buckets,
+        pass_states=_parse_bools(args.pass_states),
+        unlocked_states=_parse_bools(args.unlocked_states),
+        rpm=args.rpm,
+        max_requests=args.max_requests,
+        resume=args.resume
+    ))
+    print(f"💾 Snapshot con {written} entradas en {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,243 @@
+"""
+Replay de tráfico capturado contra una instancia en ejecución
+
+Reproduce un corpus JSONL generado por TrafficCapture respetando los
+tiempos entre llegadas originales (o acelerados N veces), y reporta
+percentiles de latencia. Con --baseline, cada request se envía a las
+dos builds y se comparan las respuestas campo por campo.
+
+Uso:
+    python -m tools.replay_traffic data/traffic/corpus.jsonl \\
+        --target http://localhost:8003 \\
+        --baseline http://localhost:8004 \\
+        --speed 4 --report report.json
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+import time
+from typing import Dict, List, Optional
+
+import httpx
+
+
+# Campos que cambian en cada respuesta y no cuentan como diferencia
+IGNORED_FIELDS = {"generated_at"}
+
+
+def load_corpus(path: str, limit: Optional[int] = None) -> List[dict]:
+    """
+    Carga el corpus ordenado por timestamp.
+
+    Args:
+        path: Archivo JSONL de TrafficCapture
+        limit: Máximo de registros a cargar
+
+    Returns:
+        list: Registros {"ts", "route", "payload"}
+    """
+    records = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                records.append(json.loads(line))
+    records.sort(key=lambda r: r["ts"])
+    if limit:
+        records = records[:limit]
+    return records
+
+
+def percentile(values: List[float], q: float) -> float:
+    """Percentil por interpolación lineal (q en 0-100)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    pos = (len(ordered) - 1) * q / 100
+    lower = int(pos)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (pos - lower)
+
+
+def summarize_latencies(results: List[dict]) -> dict:
+    """Resumen de latencia y errores de una build"""
+    latencies = [r["latency_ms"] for r in results if r["status"] is not None]
+    errors = sum(1 for r in results if r["status"] is None or r["status"] >= 400)
+    return {
+        "requests": len(results),
+        "errors": errors,
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p90_ms": round(percentile(latencies, 90), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "max_ms": round(max(latencies), 2) if latencies else 0.0,
+    }
+
+
+def diff_responses(baseline: Optional[dict], target: Optional[dict]) -> List[str]:
+    """
+    Compara dos respuestas JSON.
+
+    Returns:
+        list: Campos que difieren (vacía si son equivalentes)
+    """
+    if baseline is None or target is None:
+        return [] if baseline == target else ["<body>"]
+    keys = (set(baseline) | set(target)) - IGNORED_FIELDS
+    return sorted(k for k in keys if baseline.get(k) != target.get(k))
+
+
+async def _send(client: httpx.AsyncClient, base_url: str, record: dict) -> dict:
+    started = time.perf_counter()
+    try:
+        response = await client.post(base_url.rstrip("/") + record["route"], json=record["payload"])
+        latency_ms = (time.perf_counter() - started) * 1000
+        try:
+            body = response.json()
+        except ValueError:
+            body = None
+        return {"status": response.status_code, "latency_ms": latency_ms, "body": body}
+    except httpx.HTTPError as e:
+        latency_ms = (time.perf_counter() - started) * 1000
+        return {"status": None, "latency_ms": latency_ms, "body": None, "error": str(e)}
+
+
+async def replay(
+    records: List[dict],
+    target: str,
+    baseline: Optional[str] = None,
+    speed: float = 1.0,
+    concurrency: int = 64,
+    timeout: float = 30.0
+) -> Dict[str, List[dict]]:
+    """
+    Reproduce el corpus.
+
+    Args:
+        records: Registros del corpus ordenados por ts
+        target: URL base de la build a evaluar
+        baseline: URL base de la build de referencia (opcional)
+        speed: Factor de aceleración (0 = sin esperas)
+        concurrency: Máximo de requests en vuelo por build
+        timeout: Timeout por request en segundos
+
+    Returns:
+        dict: Resultados por build ("target" y opcionalmente "baseline")
+    """
+    builds = {"target": target}
+    if baseline:
+        builds["baseline"] = baseline
+
+    results: Dict[str, List[Optional[dict]]] = {name: [None] * len(records) for name in builds}
+    semaphores = {name: asyncio.Semaphore(concurrency) for name in builds}
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(timeout=timeout, limits=limits) as client:
+
+        async def fire(index: int, record: dict) -> None:
+            async def one(name: str, url: str) -> None:
+                async with semaphores[name]:
+                    results[name][index] = await _send(client, url, record)
+            await asyncio.gather(*(one(name, url) for name, url in builds.items()))
+
+        tasks = []
+        first_ts = records[0]["ts"] if records else 0.0
+        start = time.perf_counter()
+
+        for index, record in enumerate(records):
+            if speed > 0:
+                offset = (record["ts"] - first_ts) / speed
+                delay = offset - (time.perf_counter() - start)
+                if delay > 0:
+                    await asyncio.sleep(delay)
+            tasks.append(asyncio.create_task(fire(index, record)))
+
+        await asyncio.gather(*tasks)
+
+    return results
+
+
+def build_report(records: List[dict], results: Dict[str, List[dict]], max_examples: int = 10) -> dict:
+    """Arma el reporte de latencias y diferencias"""
+    report = {name: summarize_latencies(build_results) for name, build_results in results.items()}
+
+    if "baseline" in results:
+        field_counts: Dict[str, int] = {}
+        different = 0
+        examples = []
+        for index, (base, cand) in enumerate(zip(results["baseline"], results["target"])):
+            fields = diff_responses(base["body"], cand["body"])
+            if base["status"] != cand["status"]:
+                fields = ["<status>"] + fields
+            if not fields:
+                continue
+            different += 1
+            for field in fields:
+                field_counts[field] = field_counts.get(field, 0) + 1
+            if len(examples) < max_examples:
+                examples.append({
+                    "index": index,
+                    "exercise_id": records[index]["payload"].get("exercise_id"),
+                    "fields": fields,
+                    "baseline": base["body"],
+                    "target": cand["body"],
+                })
+        report["diff"] = {
+            "compared": len(records),
+            "different": different,
+            "fields": field_counts,
+            "examples": examples,
+        }
+
+    return report
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Replay de tráfico capturado")
+    parser.add_argument("corpus", help="Archivo JSONL generado por la captura")
+    parser.add_argument("--target", required=True, help="URL base de la build a evaluar")
+    parser.add_argument("--baseline", help="URL base de la build de referencia")
+    parser.add_argument("--speed", type=float, default=1.0,
+                        help="Factor de velocidad (1 = tiempos originales, 0 = sin esperas)")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--limit", type=int, help="Máximo de requests a reproducir")
+    parser.add_argument("--report", help="Archivo donde guardar el reporte JSON")
+    args = parser.parse_args(argv)
+
+    records = load_corpus(args.corpus, args.limit)
+    if not records:
+        print("⚠️ Corpus vacío")
+        return 1
+
+    print(f"▶️ Reproduciendo {len(records)} requests (speed={args.speed}x)")
+    results = asyncio.run(replay(
+        records,
+        target=args.target,
+        baseline=args.baseline,
+        speed=args.speed,
+        concurrency=args.concurrency,
+        timeout=args.timeout
+    ))
+    report = build_report(records, results)
+
+    for name in results:
+        s = report[name]
+        print(f"{name:>9}: n={s['requests']} errors={s['errors']} "
+              f"p50={s['p50_ms']}ms p90={s['p90_ms']}ms p99={s['p99_ms']}ms max={s['max_ms']}ms")
+    if "diff" in report:
+        d = report["diff"]
+        print(f"     diff: {d['different']}/{d['compared']} respuestas distintas {d['fields']}")
+
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"📄 Reporte guardado en {args.report}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,395 @@
+"""
+Servidor RESP2 en proceso para probar RedisBackend sin Redis
+
+Implementa lo que usa el backend L2: PING, AUTH, SELECT, GET,
+SET (con PX / EX) y DEL, con las mismas respuestas de error que Redis
+(-NOAUTH, -WRONGPASS, -ERR). Además permite inyectar un error o una
+demora en la próxima respuesta y cuenta las conexiones abiertas, para
+verificar que el backend no pierde conexiones ni excede pool_size.
+
+Sin argumentos corre la verificación del backend contra el stand-in;
+con --serve queda escuchando para pruebas manuales (redis-cli, el
+servicio con FEEDBACK_CACHE_REDIS_URL, etc).
+
+Uso:
+    python -m tools.resp_standin
+    python -m tools.resp_standin --serve --port 6390 --password secreto
+"""
+
+import argparse
+import asyncio
+import sys
+import time
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+
+class RespStandIn:
+    """
+    Servidor RESP2 mínimo sobre asyncio.
+
+    Se usa desde el event loop en el que se arrancó.
+    """
+
+    def __init__(self, password: Optional[str] = None, databases: int = 16):
+        """
+        Args:
+            password: Contraseña requerida (None = sin AUTH)
+            databases: Cantidad de bases para SELECT
+        """
+        self.password = password
+        self.databases = databases
+        self.port: Optional[int] = None
+
+        self._data: List[Dict[bytes, Tuple[bytes, Optional[float]]]] = [{} for _ in range(databases)]
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._fail_next: Optional[str] = None
+        self._delay_next = 0.0
+
+        self.connections = 0
+        self.max_connections = 0
+        self.commands = 0
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> int:
+        """
+        Empieza a escuchar.
+
+        Args:
+            host: Interfaz
+            port: Puerto (0 = uno libre)
+
+        Returns:
+            int: Puerto asignado
+        """
+        self._server = await asyncio.start_server(self._handle, host, port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self.port
+
+    async def close(self) -> None:
+        """Deja de escuchar y cierra las conexiones"""
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    def fail_next(self, message: str = "ERR injected failure") -> None:
+        """La próxima respuesta es el error indicado (sin el '-')"""
+        self._fail_next = message
+
+    def delay_next(self, seconds: float) -> None:
+        """La próxima respuesta se demora los segundos indicados"""
+        self._delay_next = seconds
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.connections += 1
+        self.max_connections = max(self.max_connections, self.connections)
+        session = {"db": 0, "authenticated": self.password is None}
+        try:
+            while True:
+                try:
+                    args = await _read_command(reader)
+                except (asyncio.IncompleteReadError, ValueError):
+                    break
+                if args is None:
+                    break
+                self.commands += 1
+
+                if self._delay_next:
+                    delay, self._delay_next = self._delay_next, 0.0
+                    await asyncio.sleep(delay)
+                if self._fail_next is not None:
+                    reply, self._fail_next = _error(self._fail_next), None
+                else:
+                    reply = self._dispatch(session, args)
+
+                writer.write(reply)
+                await writer.drain()
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            self.connections -= 1
+            writer.close()
+
+    def _dispatch(self, session: dict, args: List[bytes]) -> bytes:
+        if not args:
+            return _error("ERR empty command")
+        name = args[0].decode(errors="replace").upper()
+
+        if name == "AUTH":
+            if len(args) != 2:
+                return _wrong_args(name)
+            if self.password is None:
+                return _error("ERR AUTH <password> called without any password configured for the default user")
+            if args[1].decode() != self.password:
+                return _error("WRONGPASS invalid username-password pair or user is disabled.")
+            session["authenticated"] = True
+            return b"+OK\r\n"
+
+        if not session["authenticated"]:
+            return _error("NOAUTH Authentication required.")
+
+        if name == "PING":
+            return b"+PONG\r\n"
+        if name == "SELECT":
+            if len(args) != 2:
+                return _wrong_args(name)
+            try:
+                index = int(args[1])
+            except ValueError:
+                return _error("ERR value is not an integer or out of range")
+            if not 0 <= index < self.databases:
+                return _error("ERR DB index is out of range")
+            session["db"] = index
+            return b"+OK\r\n"
+
+        data = self._data[session["db"]]
+        if name == "GET":
+            if len(args) != 2:
+                return _wrong_args(name)
+            value = self._get(data, args[1])
+            if value is None:
+                return b"$-1\r\n"
+            return b"$%d\r\n%s\r\n" % (len(value), value)
+        if name == "SET":
+            return self._set(data, args)
+        if name == "DEL":
+            if len(args) < 2:
+                return _wrong_args(name)
+            deleted = 0
+            for key in args[1:]:
+                if self._get(data, key) is not None:
+                    del data[key]
+                    deleted += 1
+            return b":%d\r\n" % deleted
+
+        return _error(f"ERR unknown command '{name.lower()}'")
+
+    def _get(self, data: dict, key: bytes) -> Optional[bytes]:
+        entry = data.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del data[key]
+            return None
+        return value
+
+    def _set(self, data: dict, args: List[bytes]) -> bytes:
+        if len(args) < 3:
+            return _wrong_args("SET")
+        expires_at = None
+        options = [arg.decode(errors="replace").upper() for arg in args[3:]]
+        if options:
+            if len(options) != 2 or options[0] not in ("PX", "EX"):
+                return _error("ERR syntax error")
+            try:
+                amount = int(options[1])
+            except ValueError:
+                return _error("ERR value is not an integer or out of range")
+            if amount <= 0:
+                return _error("ERR invalid expire time in 'set' command")
+            expires_at = time.monotonic() + (amount / 1000 if options[0] == "PX" else amount)
+        data[args[1]] = (args[2], expires_at)
+        return b"+OK\r\n"
+
+
+async def _read_command(reader: asyncio.StreamReader) -> Optional[List[bytes]]:
+    """Lee un array de bulk strings; None si el cliente cerró"""
+    line = await reader.readline()
+    if not line:
+        return None
+    if line[:1] != b"*":
+        raise ValueError(f"Comando RESP inválido: {line!r}")
+    args = []
+    for _ in range(int(line[1:-2])):
+        header = await reader.readline()
+        if header[:1] != b"$":
+            raise ValueError(f"Argumento RESP inválido: {header!r}")
+        data = await reader.readexactly(int(header[1:-2]) + 2)
+        args.append(data[:-2])
+    return args
+
+
+def _error(message: str) -> bytes:
+    return f"-{message}\r\n".encode()
+
+
+def _wrong_args(name: str) -> bytes:
+    return _error(f"ERR wrong number of arguments for '{name.lower()}' command")
+
+
+# ============================================================================
+# VERIFICACIÓN DE RedisBackend
+# ============================================================================
+
+async def _settle(server: RespStandIn, expected: int, timeout: float = 1.0) -> bool:
+    """Espera a que el servidor vea `expected` conexiones abiertas"""
+    deadline = time.monotonic() + timeout
+    while server.connections != expected and time.monotonic() < deadline:
+        await asyncio.sleep(0.01)
+    return server.connections == expected
+
+
+async def check_backend(pool_size: int = 4) -> List[Tuple[str, bool, str]]:
+    """
+    Verifica RedisBackend contra el stand-in.
+
+    Returns:
+        List[Tuple[str, bool, str]]: (caso, pasó, detalle)
+    """
+    from src.infrastructure.cache import CacheBackendError, RedisBackend
+
+    results: List[Tuple[str, bool, str]] = []
+    server = RespStandIn(password="secreto")
+    port = await server.start()
+    url = f"redis://:secreto@127.0.0.1:{port}/2"
+
+    async def case(name: str, fn: Callable[[], Awaitable[str]]) -> None:
+        try:
+            detail = await fn()
+            results.append((name, True, detail))
+        except Exception as e:
+            results.append((name, False, f"{type(e).__name__}: {e}"))
+
+    async def expect_error(operation: Awaitable) -> str:
+        try:
+            await operation
+        except CacheBackendError as e:
+            return str(e)
+        raise AssertionError("se esperaba CacheBackendError")
+
+    backend = RedisBackend(url=url, timeout=0.2, pool_size=pool_size)
+    try:
+        async def roundtrip() -> str:
+            await backend.set("a", b"\x00valor\r\n", 60)
+            value = await backend.get("a")
+            assert value == b"\x00valor\r\n", value
+            assert await backend.get("no-existe") is None
+            return "SET/GET binario y clave inexistente"
+
+        async def expiry() -> str:
+            await backend.set("ttl", b"x", 0.05)
+            assert await backend.get("ttl") == b"x"
+            await asyncio.sleep(0.1)
+            assert await backend.get("ttl") is None
+            return "SET PX vence"
+
+        async def delete() -> str:
+            await backend.set("d", b"x", 60)
+            await backend.delete("d")
+            assert await backend.get("d") is None
+            return "DEL"
+
+        async def select() -> str:
+            other = RedisBackend(url=f"redis://:secreto@127.0.0.1:{port}/0", timeout=0.2)
+            try:
+                await backend.set("db", b"2", 60)
+                assert await other.get("db") is None, "SELECT no aisló la base"
+            finally:
+                await other.close()
+            return "SELECT aísla bases"
+
+        async def wrong_password() -> str:
+            before = server.connections
+            bad = RedisBackend(url=f"redis://:otra@127.0.0.1:{port}/0", timeout=0.2)
+            detail = await expect_error(bad.get("a"))
+            assert "WRONGPASS" in detail, detail
+            assert await _settle(server, before), "conexión abierta tras AUTH fallido"
+            return detail
+
+        async def no_auth() -> str:
+            bare = RedisBackend(url=f"redis://127.0.0.1:{port}/0", timeout=0.2)
+            detail = await expect_error(bare.get("a"))
+            assert "NOAUTH" in detail, detail
+            await bare.close()
+            return detail
+
+        async def error_reply() -> str:
+            await backend.get("a")
+            idle = len(backend._idle)
+            server.fail_next("ERR injected failure")
+            detail = await expect_error(backend.get("a"))
+            assert len(backend._idle) == idle - 1, "la conexión con error volvió al pool"
+            assert await backend.get("a") is not None
+            return detail
+
+        async def timeout() -> str:
+            server.delay_next(0.5)
+            detail = await expect_error(backend.get("a"))
+            assert await _settle(server, len(backend._idle)), "conexión abierta tras timeout"
+            return detail
+
+        async def cancellation() -> str:
+            server.delay_next(0.5)
+            task = asyncio.ensure_future(backend.get("a"))
+            await asyncio.sleep(0.05)
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+            assert await _settle(server, len(backend._idle)), "conexión perdida tras cancelar"
+            assert await backend.get("a") is not None, "el lugar del pool no se liberó"
+            return "conexión cerrada y lugar liberado"
+
+        async def pool_bound() -> str:
+            server.max_connections = server.connections
+            await asyncio.gather(*(backend.get("a") for _ in range(pool_size * 10)))
+            assert server.max_connections <= pool_size, server.max_connections
+            return f"máximo {server.max_connections} conexiones para {pool_size * 10} GET concurrentes"
+
+        for name, fn in (
+            ("roundtrip", roundtrip),
+            ("expiry", expiry),
+            ("delete", delete),
+            ("select", select),
+            ("wrong_password", wrong_password),
+            ("no_auth", no_auth),
+            ("error_reply", error_reply),
+            ("timeout", timeout),
+            ("cancellation", cancellation),
+            ("pool_bound", pool_bound),
+        ):
+            await case(name, fn)
+    finally:
+        await backend.close()
+        await server.close()
+
+    return results
+
+
+async def _serve(host: str, port: int, password: Optional[str]) -> None:
+    server = RespStandIn(password=password)
+    port = await server.start(host, port)
+    print(f"🧪 RESP stand-in escuchando en redis://{host}:{port}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.close()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Stand-in RESP2 y verificación de RedisBackend")
+    parser.add_argument("--serve", action="store_true", help="Solo escuchar (sin verificar)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6390)
+    parser.add_argument("--password", default=None)
+    parser.add_argument("--pool-size", type=int, default=4, help="pool_size del backend verificado")
+    args = parser.parse_args(argv)
+
+    if args.serve:
+        try:
+            asyncio.run(_serve(args.host, args.port, args.password))
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+    results = asyncio.run(check_backend(args.pool_size))
+    for name, ok, detail in results:
+        print(f"   {'✅' if ok else '❌'} {name}: {detail}")
+    failed = sum(1 for _, ok, _ in results if not ok)
+    print(f"\n🔎 RedisBackend: {len(results) - failed}/{len(results)} casos OK")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
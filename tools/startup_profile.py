@@ -0,0 +1,144 @@
+"""
+Perfil de arranque del servicio
+
+Mide el tiempo de import de cada paquete (con `python -X importtime`
+en un proceso limpio) y el de inicialización de los componentes, y
+falla si el total supera STARTUP_BUDGET_SECONDS.
+
+Uso:
+    python main.py --startup-profile [--top 15] [--budget 2.0] [--include-warmup]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure_imports(module: str = "main") -> Tuple[float, Dict[str, float]]:
+    """
+    Importa el módulo en un proceso nuevo con -X importtime.
+
+    Args:
+        module: Módulo a importar
+
+    Returns:
+        tuple: (segundos totales, segundos propios por paquete raíz)
+    """
+    env = dict(os.environ)
+    env["PYTHONPATH"] = ROOT + os.pathsep + env.get("PYTHONPATH", "")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=ROOT,
+        env=env,
+        capture_output=True,
+        text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Falló el import de {module}:\n{result.stderr[-2000:]}")
+
+    total_us = 0
+    by_package: Dict[str, float] = {}
+    for line in result.stderr.splitlines():
+        # "import time:       self [us] |  cumulative | imported package"
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3:
+            continue
+        try:
+            self_us = int(parts[0].strip())
+            cumulative = int(parts[1].strip())
+        except ValueError:
+            continue
+        name = parts[2].strip()
+        root = name.split(".")[0]
+        by_package[root] = by_package.get(root, 0.0) + self_us / 1e6
+        if name == module:
+            total_us = cumulative
+
+    return total_us / 1e6, by_package
+
+
+def measure_initialization(include_warmup: bool) -> List[Tuple[str, float]]:
+    """
+    Mide la inicialización de los componentes en este proceso.
+
+    Args:
+        include_warmup: Si True, incluye importar el SDK y crear el modelo
+
+    Returns:
+        list: (etapa, segundos)
+    """
+    steps = []
+
+    started = time.perf_counter()
+    import main  # noqa: F401
+    steps.append(("import main", time.perf_counter() - started))
+
+    from src.infrastructure.config import get_settings
+    from src.api import dependencies
+
+    started = time.perf_counter()
+    settings = get_settings()
+    steps.append(("settings", time.perf_counter() - started))
+
+    started = time.perf_counter()
+    try:
+        dependencies.get_generate_feedback_use_case()
+        steps.append(("use case + cliente LLM", time.perf_counter() - started))
+    except ValueError as e:
+        print(f"⚠️ Cliente LLM no inicializado: {e}")
+
+    started = time.perf_counter()
+    dependencies.load_feedback_snapshot()
+    steps.append(("snapshot de feedback", time.perf_counter() - started))
+
+    if include_warmup and settings.GOOGLE_API_KEY:
+        started = time.perf_counter()
+        dependencies.get_gemini_client().warm_up()
+        steps.append(("warm-up LLM (background en producción)", time.perf_counter() - started))
+
+    return steps
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Perfil de arranque")
+    parser.add_argument("--top", type=int, default=15, help="Paquetes a mostrar")
+    parser.add_argument("--budget", type=float, help="Presupuesto en segundos (default: STARTUP_BUDGET_SECONDS)")
+    parser.add_argument("--include-warmup", action="store_true",
+                        help="Incluir import del SDK y creación del modelo en el total")
+    args = parser.parse_args(argv)
+
+    sys.path.insert(0, ROOT)
+    os.chdir(ROOT)
+
+    import_total, by_package = measure_imports()
+    print(f"📦 Imports (proceso limpio): {import_total * 1000:.1f} ms")
+    for name, seconds in sorted(by_package.items(), key=lambda kv: kv[1], reverse=True)[:args.top]:
+        print(f"   {name:<30} {seconds * 1000:8.1f} ms")
+
+    steps = measure_initialization(args.include_warmup)
+    init_total = sum(seconds for name, seconds in steps if name != "import main")
+    print(f"⚙️ Inicialización: {init_total * 1000:.1f} ms")
+    for name, seconds in steps:
+        print(f"   {name:<30} {seconds * 1000:8.1f} ms")
+
+    from src.infrastructure.config import get_settings
+    budget = args.budget if args.budget is not None else get_settings().STARTUP_BUDGET_SECONDS
+    total = import_total + init_total
+    if total > budget:
+        print(f"❌ Arranque {total:.3f}s excede el presupuesto de {budget:.3f}s")
+        return 1
+
+    print(f"✅ Arranque {total:.3f}s dentro del presupuesto de {budget:.3f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())